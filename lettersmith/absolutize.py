@@ -1,38 +1,62 @@
 """
 Tools for making relative URLs absolute in doc content.
 """
-import re
-from lettersmith.util import replace
+from functools import lru_cache
 from lettersmith import path as pathtools
+from lettersmith import rewrite
 
 
 URL_ATTR = r"""(src|href)=["'](.*?)["']"""
 
+QUALIFY_CACHE_SIZE = 4096
 
-def absolutize(base_url="/"):
+
+def has_url_attrs(s):
     """
-    Absolutize URLs in content. Replaces any relative URLs in content
-    that start with `/` and instead starts them with `base_url`.
+    Quick check for `src=` or `href=` in a string. Much cheaper than
+    running the regex over content that has nothing to absolutize.
+    """
+    return "href=" in s or "src=" in s
 
-    URLS are found by matching against `href=` and `src=`.
+
+def _never(s):
+    return False
+
+
+def rewriter(base_url="/"):
     """
+    Create a rewriter that absolutizes URLs, for use with
+    `lettersmith.rewrite`.
+
+    URL qualification is memoized per distinct URL, since most pages
+    link to the same handful of URLs over and over.
+    """
+    base_url = str(base_url)
+
+    @lru_cache(maxsize=QUALIFY_CACHE_SIZE)
+    def render_attr(attr, url):
+        return attr + '="' + pathtools.qualify_url(url, base_url) + '"'
+
     def render_inner_match(match):
-        attr = match.group(1)
-        value = match.group(2)
-        url = pathtools.qualify_url(value, base_url)
-        return '{attr}="{url}"'.format(attr=attr, url=url)
+        return render_attr(match.group(1), match.group(2))
+
+    # Nothing to do if base URL is just "/".
+    test = _never if base_url == "/" else has_url_attrs
+    return rewrite.rewriter(URL_ATTR, render_inner_match, test)
 
-    def absolutize_doc_urls(doc):
-        # Early return if base URL is just "/"
-        if str(base_url) == "/":
-            return doc
 
-        content = re.sub(
-            URL_ATTR,
-            render_inner_match,
-            doc.content
-        )
+def absolutizer(base_url="/"):
+    """
+    Create a function that absolutizes URLs in a string.
+    """
+    return rewrite.compose(rewriter(base_url))
 
-        return replace(doc, content=content)
 
-    return absolutize_doc_urls
\ No newline at end of file
+def absolutize(base_url="/"):
+    """
+    Absolutize URLs in content. Replaces any relative URLs in content
+    that start with `/` and instead starts them with `base_url`.
+
+    URLS are found by matching against `href=` and `src=`.
+    """
+    return rewrite.doc_rewriter(rewriter(base_url))
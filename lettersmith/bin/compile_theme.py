@@ -0,0 +1,31 @@
+"""
+Command line tool for compiling Lettersmith themes ahead of time.
+"""
+import argparse
+
+from lettersmith import jinjatools
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="""Compile a Lettersmith theme to Python modules.
+        Builds load compiled templates instead of parsing them from source,
+        until a source template changes.""")
+    parser.add_argument("theme_path",
+        help="Path to your theme directory")
+    parser.add_argument("-o", "--output",
+        default=None,
+        help="""Where to write the compiled theme.
+        Defaults to a sibling of the theme directory, e.g. "theme.compiled".
+        Set `compiled_theme_path` in your config if you change it.""")
+    args = parser.parse_args()
+
+    compiled_path = jinjatools.compile_theme(args.theme_path, args.output)
+    print('Compiled theme "{theme_path}" to "{compiled_path}"'.format(
+        theme_path=args.theme_path,
+        compiled_path=compiled_path
+    ))
+
+
+if __name__ == "__main__":
+    main()
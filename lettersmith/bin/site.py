@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
+import sys
 from datetime import datetime
 from pathlib import PurePath, Path
 from itertools import chain
+from functools import partial
 from subprocess import CalledProcessError
 
 from lettersmith.util import get_deep, replace
+from lettersmith import util
 from lettersmith.argparser import lettersmith_argparser
 from lettersmith import path as pathtools
 from lettersmith import docs as Docs
@@ -13,17 +16,27 @@ from lettersmith import stub as Stub
 from lettersmith import markdowntools
 from lettersmith import wikilink
 from lettersmith import absolutize
+from lettersmith import rewrite
 from lettersmith import permalink
 from lettersmith import templatetools
 from lettersmith import paging
 from lettersmith import taxonomy
-from lettersmith import jinjatools
 from lettersmith import rss
 from lettersmith import sitemap
-from lettersmith.data import load_data_files
+from lettersmith import memory
+from lettersmith import spool
+from lettersmith import stubdb
+from lettersmith import codec
+from lettersmith import gitdates
+from lettersmith.date import read_file_times
+from lettersmith.data import DataDir
 from lettersmith.file import copy_all
 
 
+parse_yaml_doc = Doc.maps_if_ext(".yaml")(Doc.parse_yaml)
+parse_json_doc = Doc.maps_if_ext(".json")(Doc.parse_json)
+
+
 def main():
     parser = lettersmith_argparser(
         description="""Generates a blog-aware site with Lettersmith""")
@@ -32,6 +45,7 @@ def main():
     input_path = Path(config.get("input_path", "content"))
     output_path = config.get("output_path", "public")
     theme_path = config.get("theme_path", "theme")
+    compiled_theme_path = config.get("compiled_theme_path")
     base_url = config.get("base_url", "/")
     build_drafts = config.get("build_drafts", False)
     data_path = config.get("data_path", "data")
@@ -39,55 +53,198 @@ def main():
     permalink_templates = config.get("permalink_templates", {})
     rss_config = config.get("rss", {"*": {"output_path": "feed.rss"}})
     paging_config = config.get("paging", {})
-    taxonomies = get_deep(config, ("taxonomies", "keys"), tuple())
-    taxonomy_output_path_template = get_deep(config,
-        ("taxonomy", "output_path_template"))
+    taxonomies = config.get("taxonomies", tuple())
+    # Taxonomies may be a list of keys, or a dict with a list of `keys`.
+    if isinstance(taxonomies, dict):
+        taxonomies = taxonomies.get("keys", tuple())
+    # Setting any `taxonomy` options turns on term archives.
+    taxonomy_config = config.get("taxonomy")
     site_title = get_deep(config, ("site", "title"), "Untitled")
     site_description = get_deep(config, ("site", "description"), "")
     site_author = get_deep(config, ("site", "author"), "")
+    memory_budget = memory.parse_size(config.get("memory_budget"))
+    # Setting a memory budget implies low memory mode.
+    low_memory = config.get("low_memory", memory_budget is not None)
+    index_db_path = config.get("index_db")
+    lazy_content = config.get("lazy_content", False)
+    doc_codec = codec.from_config(
+        Doc.Doc,
+        codec=get_deep(config, ("cache", "codec"), "pickle"),
+        compression=get_deep(config, ("cache", "compression")),
+        level=get_deep(config, ("cache", "level"))
+    )
+    source_cache_path = get_deep(config, ("cache", "path"))
+    # In-memory buffers are sized to fit the memory budget, unless they
+    # are configured explicitly.
+    load_cache_size = memory.parse_size(
+        get_deep(config, ("cache", "load_cache_size"), memory.share(
+            memory_budget, memory.LOAD_CACHE_SHARE, Doc.LRU_SIZE)))
+    date_source = config.get("date_source", "file")
     now = datetime.now()
 
-    data = load_data_files(data_path)
-
-    # Grab all markdown, YAML, and JSON files.
-    md_paths = input_path.glob("**/*.md")
-    md_paths = (x for x in md_paths if pathtools.should_pub(x, build_drafts))
-    md_docs = (Doc.load(path, relative_to=input_path) for path in md_paths)
-    md_docs = (markdowntools.render_doc(doc) for doc in md_docs)
-
-    yaml_paths = input_path.glob("**/*.yaml")
-    yaml_paths = (x for x in yaml_paths if pathtools.should_pub(x, build_drafts))
-    yaml_docs = (Doc.load(path, relative_to=input_path) for path in yaml_paths)
-    yaml_docs = (Doc.parse_yaml(doc) for doc in yaml_docs)
-
-    json_paths = input_path.glob("**/*.json")
-    json_paths = (x for x in json_paths if pathtools.should_pub(x, build_drafts))
-    json_docs = (Doc.load(path, relative_to=input_path) for path in json_paths)
-    json_docs = (Doc.parse_json(doc) for doc in json_docs)
-
-    docs = chain(md_docs, yaml_docs, json_docs)
-
-    docs = (wikilink.uplift_wikilinks(doc) for doc in docs)
-    absolutize_doc_urls = absolutize.absolutize(base_url)
-    docs = (absolutize_doc_urls(doc) for doc in docs)
-    docs = (Doc.change_ext(doc, ".html") for doc in docs)
-    docs = (templatetools.add_templates(doc) for doc in docs)
-    docs = (
-        permalink.map_doc_permalink(doc, permalink_templates)
-        for doc in docs
+    # Read created and modified dates from git history, rather than the
+    # file system. History is walked once for the whole input directory.
+    # Kept in a subdirectory, so cache garbage collection leaves it be.
+    if date_source == "git":
+        read_times = gitdates.git_times_reader(
+            input_path,
+            cache_path=(
+                PurePath(source_cache_path, "git", "times.pkl")
+                if source_cache_path is not None else None
+            )
+        )
+    else:
+        read_times = read_file_times
+
+    # Data files are parsed on first use in templates. With a persistent
+    # cache, parsed data is kept between builds too.
+    data = DataDir(
+        data_path,
+        snapshot_path=(
+            PurePath(source_cache_path, "data")
+            if source_cache_path is not None else None
+        )
     )
 
+    def read_paths():
+        """
+        Grab all markdown, YAML, and JSON files that should be published.
+        Paths are sorted, so builds read docs in the same order on
+        every machine.
+        """
+        paths = sorted(chain(
+            input_path.glob("**/*.md"),
+            input_path.glob("**/*.yaml"),
+            input_path.glob("**/*.json")
+        ))
+        return (x for x in paths if pathtools.should_pub(x, build_drafts))
+
+    def parse_doc(doc):
+        """
+        Parse the content of a loaded doc.
+        """
+        doc = markdowntools.render_doc(doc)
+        doc = parse_yaml_doc(doc)
+        return parse_json_doc(doc)
+
+    if source_cache_path is not None:
+        # Reuse parsed docs from previous builds when their source
+        # hasn't changed. Config that is applied after parsing (base_url,
+        # permalinks, templates) doesn't need to be part of the key.
+        source_cache = Doc.SourceCache(
+            source_cache_path,
+            fingerprint=markdowntools.fingerprint(),
+            codec=doc_codec
+        )
+        # Highlighted code blocks are kept between builds too, so blocks
+        # that haven't changed are never highlighted again.
+        markdowntools.highlight_cache().persist(
+            PurePath(source_cache_path, "highlight", "blocks.pkl"))
+
+        def load_doc(path):
+            return source_cache.load(
+                path, relative_to=input_path, parse=parse_doc,
+                read_times=read_times)
+    else:
+        source_cache = None
+
+        def load_doc(path):
+            return parse_doc(Doc.load(
+                path, relative_to=input_path, read_times=read_times))
+
+    def load_doc_head(path):
+        """
+        Load a doc for indexing, with its wikilinks uplifted.
+        """
+        # YAML and JSON docs are all meta, so we always load them whole.
+        if not pathtools.has_ext(path, ".md"):
+            return wikilink.uplift_wikilinks(load_doc(path))
+        # Markdown docs are loaded from their heads. Wikilinks are found
+        # in the rest of the body as it streams past, in the same pass.
+        wikilinks = []
+
+        def scan_body(lines):
+            wikilinks.extend(
+                slug for slug, title in wikilink.find_line_wikilinks(lines))
+
+        doc = parse_doc(Doc.load_head(
+            path, relative_to=input_path, read_times=read_times,
+            scan_body=scan_body))
+        return Doc.replace_meta(doc, wikilinks=tuple(wikilinks))
+
+    # Compile permalink templates once, up front.
+    map_permalink = permalink.permalinker(permalink_templates)
+
+    # Resolve each doc's template against the theme, so rendering
+    # doesn't probe the theme for every candidate.
+    add_templates = templatetools.template_resolver(theme_path)
+
+    def prepare_docs(docs, uplift_wikilinks=wikilink.uplift_wikilinks):
+        """
+        Prepare parsed docs for indexing and rendering.
+        """
+        docs = (uplift_wikilinks(doc) for doc in docs)
+        docs = (Doc.change_ext(doc, ".html") for doc in docs)
+        docs = (add_templates(doc) for doc in docs)
+        docs = (map_permalink(doc) for doc in docs)
+        return docs
+
     # Create a temporary directory for cache.
-    with Doc.DocCacheDir(docs) as cache:
-        docs = cache.load_all()
+    with Doc.DocCacheDir(codec=doc_codec) as cache:
+        # In low memory mode, we collect stubs into disk-backed spools
+        # in the cache directory, instead of tuples in memory.
+        if low_memory:
+            collect = partial(spool.Spool, dir=cache.cache_path)
+        else:
+            collect = tuple
+
+        if lazy_content:
+            # Index docs from their heads, without reading whole files.
+            # Full docs are loaded from source when we render them.
+            docs = prepare_docs(
+                (load_doc_head(path) for path in read_paths()),
+                uplift_wikilinks=util.id
+            )
+
+            def load_prepared(id_path):
+                doc = load_doc(PurePath(input_path, id_path))
+                return next(prepare_docs((doc,)))
+
+            load_prepared_many = None
+        else:
+            # Spill docs to cache as they stream past. We build stubs from
+            # the same pass, and load docs back from cache only to render.
+            docs = cache.dump_each(prepare_docs(
+                load_doc(path) for path in read_paths()))
+            load_prepared = cache.load
+            load_prepared_many = cache.load_many
+
         # Strip special syntax before converting docs to stubs
         docs = (wikilink.strip_doc_wikilinks(doc) for doc in docs)
 
-        # Convert to stubs in memory
-        stubs = tuple(Stub.from_doc(doc) for doc in docs)
+        # Index output paths during the same pass, so we can report
+        # docs that would overwrite each other before writing anything.
+        outputs = permalink.OutputIndex()
+        docs = outputs.track(docs)
+
+        # Convert to stubs
+        stubs = collect(Stub.from_doc(doc) for doc in docs)
+
+        # Paging and RSS groups that sort by the same key share a single
+        # sort. Paging is newest first, unless configured otherwise.
+        sort_stubs = util.sorter(stubs)
 
         # Gen paging groups and then flatten iterable of iterables.
-        paging_doc_iters = paging.gen_paging(stubs, paging_config)
+        paging_doc_iters = paging.gen_paging(
+            stubs, paging_config,
+            defaults={
+                "base_url": base_url,
+                "sort_by": "created",
+                "reverse": True
+            },
+            collect=collect,
+            sort=sort_stubs
+        )
         paging_docs = tuple(chain.from_iterable(paging_doc_iters))
 
         # Gen rss feed docs. Then collect into a tuple, because we'll be going
@@ -99,33 +256,93 @@ def main():
             "description": site_description,
             "author": site_author
         }
+        # RSS feeds only need a single pass over each group, so we
+        # stream matches rather than collecting them.
         rss_docs_iter = rss.gen_rss_feed(stubs, {
             glob: replace(RSS_DEFAULTS, **group_kwargs)
             for glob, group_kwargs
             in rss_config.items()
-        })
+        }, collect=iter, sort=sort_stubs)
         rss_docs = tuple(rss_docs_iter)
 
         sitemap_doc = sitemap.gen_sitemap(stubs, base_url=base_url)
 
+        stubs = collect(wikilink.collate_links(stubs))
+
+        # Index stubs by taxonomy in a single pass. The same index is
+        # used for term archives, and for `index` in templates.
+        if index_db_path is None or taxonomy_config is not None:
+            tax_index = taxonomy.index_by_taxonomy(stubs, taxonomies)
+
+        if taxonomy_config is not None:
+            archive_docs = tuple(taxonomy.gen_archives_from_index(
+                tax_index,
+                output_path_template=taxonomy_config.get(
+                    "output_path_template"),
+                per_page=taxonomy_config.get("per_page"),
+                base_url=base_url,
+                now=now
+            ))
+        else:
+            archive_docs = tuple()
+
         # Add generated docs to stubs
-        gen_docs = paging_docs + rss_docs + (sitemap_doc,)
-        gen_stubs = tuple(Stub.from_doc(doc) for doc in gen_docs)
+        gen_docs = paging_docs + archive_docs + rss_docs + (sitemap_doc,)
+        gen_stubs = tuple(Stub.from_doc(doc) for doc in outputs.track(gen_docs))
+        outputs.check()
 
-        stubs = tuple(wikilink.collate_links(stubs))
+        # Rewrite wikilinks and URLs in doc content in a single scan.
+        # Only wikilinks that exist in stubs are rendered as links.
+        rewrite_doc = rewrite.doc_rewriter(
+            wikilink.rewriter(stubs, base_url),
+            absolutize.rewriter(base_url)
+        )
 
-        index = {}
-        index["taxonomy"] = taxonomy.index_by_taxonomy(stubs, taxonomies)
+        def load_rewritten(id_path):
+            return rewrite_doc(load_prepared(id_path))
 
-        # Create dict index for ad-hoc stub access in templates.
-        index["id_path"] = {
-            stub.id_path: stub
-            for stub in (stubs + gen_stubs)
-        }
+        if load_prepared_many is not None:
+            def load_rewritten_many(id_paths):
+                return tuple(
+                    rewrite_doc(doc) for doc in load_prepared_many(id_paths))
+        else:
+            load_rewritten_many = None
+
+        # Templates often load the same popular docs on many pages, so
+        # we keep recently loaded docs in memory, up to a content size.
+        load_lru = Doc.DocLRU(
+            load_rewritten,
+            max_size=load_cache_size,
+            load_many=load_rewritten_many
+        )
+
+        # Create indexes for ad-hoc stub access in templates.
+        index = {}
+        db = None
+        if index_db_path is not None:
+            # Update the persistent SQLite index, and query it from
+            # templates instead of building dicts.
+            db = stubdb.StubDB(index_db_path)
+            db.update(
+                chain(stubs, gen_stubs),
+                taxonomies or taxonomy.DEFAULT_TAXONOMIES
+            )
+            index["taxonomy"] = db.taxonomy
+            index["id_path"] = db.id_path
+        elif low_memory:
+            index["taxonomy"] = tax_index
+            index["id_path"] = spool.Index("id_path", stubs, gen_stubs)
+        else:
+            index["taxonomy"] = tax_index
+            index["id_path"] = {
+                stub.id_path: stub
+                for stub in (stubs + gen_stubs)
+            }
 
         # Set up template globals
         context = {
-            "load_cache": cache.load,
+            "load_cache": load_lru.load,
+            "load_many": load_lru.load_many,
             "rss_docs": rss_docs,
             "index": index,
             "site": config.get("site", {}),
@@ -134,26 +351,57 @@ def main():
             "now": now
         }
 
-        # The previous doc generator has been exhausted, so load docs from
-        # cache again.
-        docs = cache.load_all()
+        # The previous doc generator has been exhausted, so load docs
+        # again, from source or from cache.
+        if lazy_content:
+            docs = prepare_docs(load_doc(path) for path in read_paths())
+        else:
+            docs = cache.load_all(prefetch=memory.fit(
+                memory.share(memory_budget, memory.PREFETCH_SHARE),
+                cache.max_file_size,
+                Doc.PREFETCH_SIZE
+            ))
 
-        # Map wikilinks, but only those that exist in wikilink_index.
-        render_wikilinks = wikilink.doc_renderer(stubs, base_url)
-        docs = (render_wikilinks(doc) for doc in docs)
+        docs = (rewrite_doc(doc) for doc in docs)
 
         # Chain together all doc iterators
         docs = chain(docs, gen_docs)
 
-        # Create a render function
+        # Create a render function. Jinja is imported here, rather than
+        # at startup, so `--help` and config errors come back quickly.
+        from lettersmith import jinjatools
+        from lettersmith.fragmentcache import FragmentCache
+
+        # `{% cache %}` fragments are rendered once per build. With a
+        # persistent cache, fragments with dependencies are kept between
+        # builds, until they or the theme change.
+        if source_cache_path is not None:
+            fragment_cache = FragmentCache(
+                PurePath(source_cache_path, "fragments"),
+                fingerprint=jinjatools.theme_fingerprint(theme_path)
+            )
+        else:
+            fragment_cache = FragmentCache()
+
         render_jinja = jinjatools.lettersmith_doc_renderer(
             theme_path,
-            context=context
+            context=context,
+            compiled_path=compiled_theme_path,
+            fragment_cache=fragment_cache
         )
         docs = (render_jinja(doc) for doc in docs)
 
         stats = Docs.write(docs, output_path=output_path)
 
+        if db is not None:
+            db.close()
+
+    if source_cache is not None:
+        source_cache.collect_garbage()
+        fragment_cache.collect_garbage()
+        data.collect_garbage()
+        markdowntools.highlight_cache().save()
+
     try:
         static_paths = config.get("static_paths", [])
         static_paths.append(PurePath(theme_path, "static"))
@@ -165,6 +413,23 @@ def main():
         output_path=output_path,
         sum=stats["written"]
     ))
+    if source_cache is not None:
+        print("Reused {hits} of {total} parsed docs from cache".format(
+            hits=source_cache.stats["hits"],
+            total=source_cache.stats["hits"] + source_cache.stats["misses"]
+        ))
+    if load_lru.stats["hits"] + load_lru.stats["misses"] > 0:
+        print("Served {hits} of {total} template doc loads from memory".format(
+            hits=load_lru.stats["hits"],
+            total=load_lru.stats["hits"] + load_lru.stats["misses"]
+        ))
+    print(memory.report(memory_budget))
+    if memory.is_over_budget(memory_budget):
+        print(
+            "Warning: the build went over its memory budget. "
+            "Try a lower cache.load_cache_size, or lazy_content.",
+            file=sys.stderr
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,142 @@
+"""
+Codecs for serializing docs to bytes. Used by `lettersmith.doc.DocCache`.
+
+A codec is a namedtuple of `dumps` and `loads` functions, plus the file
+suffix used for serialized files. Any codec can be wrapped with zlib or
+lzma compression, trading build speed for disk footprint.
+"""
+import pickle
+import zlib
+import lzma
+from functools import partial
+from collections import namedtuple
+from datetime import date, datetime
+
+try:
+    import msgpack
+except ImportError:
+    # msgpack is an optional dependency.
+    msgpack = None
+
+
+Codec = namedtuple("Codec", ("dumps", "loads", "suffix"))
+Codec.__doc__ = """
+A codec serializes items to bytes with `dumps`, and reads them back
+with `loads`. `suffix` is the file extension used for serialized files.
+"""
+
+
+def pickle_codec(protocol=pickle.HIGHEST_PROTOCOL):
+    """
+    Serialize with pickle. Defaults to the highest pickle protocol,
+    which is the fastest and most compact.
+    """
+    return Codec(
+        dumps=partial(pickle.dumps, protocol=protocol),
+        loads=pickle.loads,
+        suffix=".pkl"
+    )
+
+
+_DATETIME_EXT = 1
+_DATE_EXT = 2
+
+
+def _encode_ext(x):
+    if isinstance(x, datetime):
+        return msgpack.ExtType(_DATETIME_EXT, x.isoformat().encode())
+    if isinstance(x, date):
+        return msgpack.ExtType(_DATE_EXT, x.isoformat().encode())
+    raise TypeError("Cannot serialize {} with msgpack".format(type(x)))
+
+
+def _decode_ext(code, data):
+    if code == _DATETIME_EXT:
+        return datetime.fromisoformat(data.decode())
+    if code == _DATE_EXT:
+        return date.fromisoformat(data.decode())
+    return msgpack.ExtType(code, data)
+
+
+def msgpack_codec(record_type):
+    """
+    Serialize namedtuple records as compact msgpack arrays of field
+    values, without field names or class references. `record_type` is
+    the namedtuple class to load records into.
+
+    Requires the optional `msgpack` package. Note that msgpack does not
+    distinguish lists from tuples, so all arrays are loaded as tuples.
+    """
+    if msgpack is None:
+        raise ImportError(
+            "The msgpack codec requires msgpack. "
+            "Install it with `pip install msgpack`."
+        )
+
+    def dumps(record):
+        return msgpack.packb(
+            tuple(record),
+            default=_encode_ext,
+            use_bin_type=True
+        )
+
+    def loads(data):
+        fields = msgpack.unpackb(
+            data,
+            ext_hook=_decode_ext,
+            raw=False,
+            use_list=False,
+            strict_map_key=False
+        )
+        return record_type(*fields)
+
+    return Codec(dumps=dumps, loads=loads, suffix=".msgpack")
+
+
+def compressed(codec, compression="zlib", level=None):
+    """
+    Wrap a codec with compression.
+
+    `compression` is "zlib" or "lzma". `level` is the speed/size knob:
+    0-9 for both, where lower is faster and higher is smaller. Defaults
+    to a fast level, since we usually read the cache back within the
+    same build.
+    """
+    if compression == "zlib":
+        level = 1 if level is None else level
+        compress = partial(zlib.compress, level=level)
+        decompress = zlib.decompress
+        suffix = ".z"
+    elif compression == "lzma":
+        level = 0 if level is None else level
+        compress = partial(lzma.compress, preset=level)
+        decompress = lzma.decompress
+        suffix = ".xz"
+    else:
+        raise ValueError("Unknown compression: {}".format(compression))
+
+    def dumps(x):
+        return compress(codec.dumps(x))
+
+    def loads(data):
+        return codec.loads(decompress(data))
+
+    return Codec(dumps=dumps, loads=loads, suffix=codec.suffix + suffix)
+
+
+def from_config(record_type, codec="pickle", compression=None, level=None):
+    """
+    Create a codec from config values.
+
+    `codec` is "pickle" or "msgpack". `compression` is None, "zlib"
+    or "lzma".
+    """
+    if codec == "pickle":
+        base = pickle_codec()
+    elif codec == "msgpack":
+        base = msgpack_codec(record_type)
+    else:
+        raise ValueError("Unknown codec: {}".format(codec))
+    if compression is None or compression == "none":
+        return base
+    return compressed(base, compression, level=level)
@@ -1,10 +1,17 @@
 from pathlib import Path
-import yaml
+from collections.abc import Mapping
+import os
+import json
+import pickle
+from lettersmith.hash import hash_digest
+from lettersmith import yamltools
 from lettersmith.path import glob_all
+from lettersmith.file import write_file_atomic
 
 
 YAML_EXT = (".yaml", ".yml")
-JSON_EXT = (".json")
+JSON_EXT = (".json",)
+DATA_EXT = YAML_EXT + JSON_EXT
 
 
 def _smart_read_data_file(file_path):
@@ -22,7 +29,7 @@ def _smart_read_data_file(file_path):
         if ext in JSON_EXT:
             return json.load(f)
         elif ext in YAML_EXT:
-            return yaml.load(f)
+            return yamltools.loads(f)
         else:
             raise ValueError("Unsupported file type: {}".format(ext))
 
@@ -43,4 +50,140 @@ def load_data_files(dir_path):
             data[stem] = _smart_read_data_file(file_path)
         except ValueError:
             pass
-    return data
\ No newline at end of file
+    return data
+
+
+def _stat_key(file_path):
+    stat = os.stat(file_path)
+    return "{}:{}".format(stat.st_mtime_ns, stat.st_size).encode()
+
+
+class DataDir(Mapping):
+    """
+    A lazy, read-only mapping of a data directory.
+
+    Keys are file names (without extension) and subdirectory names.
+    Subdirectories are nested `DataDir` mappings. Where names collide,
+    files win over directories, and .json over .yml over .yaml, as in
+    `load_data_files`. Data files are only
+    parsed when they are first accessed, so templates only pay for the
+    data they use.
+
+    If `snapshot_path` is given, parsed data is also kept there as a
+    pickle between builds, keyed by the data file's mtime and size.
+    Unchanged files are loaded from their snapshot instead of being
+    parsed again. Call `collect_garbage` at the end of a build to evict
+    snapshots of files that were deleted or changed.
+
+    Usage:
+
+        data = DataDir("data", snapshot_path=".lettersmith/data")
+        data["products"]["shoes"]
+    """
+    def __init__(self, dir_path, snapshot_path=None):
+        self.dir_path = Path(dir_path)
+        self.snapshot_path = (
+            Path(snapshot_path) if snapshot_path is not None else None)
+        self._entries = None
+        self._values = {}
+
+    def _read_entries(self):
+        if self._entries is None:
+            entries = {}
+            try:
+                paths = sorted(os.scandir(self.dir_path), key=lambda e: e.name)
+            except FileNotFoundError:
+                paths = ()
+            found = []
+            for entry in paths:
+                if entry.name.startswith("."):
+                    continue
+                path = Path(entry.path)
+                if entry.is_dir():
+                    found.append((0, path.name, path))
+                elif path.suffix in DATA_EXT:
+                    rank = 1 + DATA_EXT.index(path.suffix)
+                    found.append((rank, path.stem, path))
+            # When names collide, the last one wins, in the order
+            # `load_data_files` globs: directories, then .yaml, .yml
+            # and .json files.
+            for rank, name, path in sorted(found, key=lambda x: x[0]):
+                entries[name] = path
+            self._entries = dict(sorted(entries.items()))
+        return self._entries
+
+    def _snapshot_file(self, file_path):
+        return self.snapshot_path.joinpath(
+            hash_digest(str(file_path.resolve())) + ".pkl")
+
+    def _load_file(self, file_path):
+        if self.snapshot_path is None:
+            return _smart_read_data_file(file_path)
+        snapshot_file = self._snapshot_file(file_path)
+        key = _stat_key(file_path)
+        try:
+            with open(snapshot_file, "rb") as f:
+                if f.readline().rstrip(b"\n") == key:
+                    return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            pass
+        data = _smart_read_data_file(file_path)
+        write_file_atomic(
+            snapshot_file,
+            key + b"\n" + pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        )
+        return data
+
+    def _walk_files(self):
+        for path in self._read_entries().values():
+            if path.is_dir():
+                yield from DataDir(path)._walk_files()
+            else:
+                yield path
+
+    def collect_garbage(self):
+        """
+        Evict snapshots whose data file was deleted, or has changed since
+        the snapshot was taken. Call this on the root data directory,
+        since snapshots of subdirectories are kept in the same place.
+        Returns the number of snapshots evicted.
+        """
+        if self.snapshot_path is None:
+            return 0
+        keys = {
+            self._snapshot_file(file_path).name: _stat_key(file_path)
+            for file_path in self._walk_files()
+        }
+        evicted = 0
+        for snapshot_file in self.snapshot_path.glob("*.pkl"):
+            try:
+                with open(snapshot_file, "rb") as f:
+                    key = f.readline().rstrip(b"\n")
+            except OSError:
+                continue
+            if keys.get(snapshot_file.name) != key:
+                snapshot_file.unlink()
+                evicted = evicted + 1
+        return evicted
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+        path = self._read_entries()[key]
+        if path.is_dir():
+            value = DataDir(path, snapshot_path=self.snapshot_path)
+        else:
+            value = self._load_file(path)
+        self._values[key] = value
+        return value
+
+    def __iter__(self):
+        return iter(self._read_entries())
+
+    def __len__(self):
+        return len(self._read_entries())
+
+    def __contains__(self, key):
+        return key in self._read_entries()
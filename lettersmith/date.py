@@ -1,6 +1,6 @@
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 from os import path
-from functools import singledispatch
+from functools import singledispatch, lru_cache
 
 
 def read_file_times(pathlike):
@@ -19,6 +19,25 @@ def read_file_times(pathlike):
         return EPOCH, EPOCH
 
 
+def _to_naive(dt):
+    """
+    Convert timezone-aware datetimes to naive UTC, so they can be
+    compared with naive datetimes. UTC, rather than local time, keeps
+    rendered dates the same no matter where the site is built.
+    """
+    if dt.tzinfo is None:
+        return dt
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def from_timestamp(timestamp):
+    """
+    Convert a Unix timestamp to a naive UTC datetime, the same way
+    timezone-aware dates are normalized.
+    """
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
 @singledispatch
 def to_datetime(x):
     """
@@ -30,7 +49,7 @@ def to_datetime(x):
 
 @to_datetime.register(datetime)
 def datetime_to_datetime(dt):
-    return dt
+    return _to_naive(dt)
 
 
 @to_datetime.register(date)
@@ -49,6 +68,15 @@ def date_to_datetime(s):
     return parse_isoformat(s)
 
 
+# Parsed dates, keyed by date string. Sites tend to repeat the same dates.
+DATE_CACHE_SIZE = 4096
+
+
+# Date styles parsed with `strptime`, when faster parsers fail.
+_STRPTIME_FORMATS = ("%Y-%m-%d", "%Y%m%d", "%Y %m %d")
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
 def parse_isoformat(dt_str):
     """
     Parse an ISO 8601 date string into a datetime. Supports the following date
@@ -57,16 +85,36 @@ def parse_isoformat(dt_str):
     2017-01-01
     20170101
     2017 01 01
+    2017-01-01T10:30:00
+    2017-01-01T10:30:00+02:00
+    2017-01-01T10:30:00Z
+
+    Datetimes with a timezone are converted to naive UTC.
+    Results are cached, since the same dates tend to be repeated.
     """
+    s = dt_str.strip()
+    # Fast paths for compact date styles.
+    if len(s) == 8 and s.isdigit():
+        return datetime(int(s[0:4]), int(s[4:6]), int(s[6:8]))
+    if len(s) == 10 and s[4] == " " and s[7] == " ":
+        return datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]))
+    if s.endswith(("Z", "z")):
+        s = s[:-1] + "+00:00"
     try:
-        return datetime.strptime(dt_str, "%Y-%m-%d")
-    except ValueError:
-        pass
-    try:
-        return datetime.strptime(dt_str, "%Y%m%d")
+        return _to_naive(datetime.fromisoformat(s))
     except ValueError:
         pass
-    return datetime.strptime(dt_str, "%Y %m %d")
+    # `fromisoformat` and the fast paths want zero-padded fields.
+    # `strptime` also accepts dates like 2017-1-2 or 2017 1 2.
+    for date_format in _STRPTIME_FORMATS:
+        try:
+            return datetime.strptime(s, date_format)
+        except ValueError:
+            pass
+    raise ValueError(
+        "Could not parse date {!r}. Expected ISO 8601, "
+        "like 2017-01-01.".format(dt_str)
+    )
 
 
 def format_isoformat(dt):
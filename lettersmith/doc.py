@@ -1,16 +1,17 @@
 from pathlib import PurePath, Path
 import json
 import hashlib
-from collections import namedtuple
-import pickle
+from collections import namedtuple, OrderedDict
 from functools import wraps
+from itertools import chain
 from tempfile import TemporaryDirectory
-
-import frontmatter
-import yaml
+from threading import Thread, Event
+from queue import Queue, Full
 
 from lettersmith.date import read_file_times, EPOCH, to_datetime
-from lettersmith.file import write_file_deep
+from lettersmith.file import write_file_deep, write_file_atomic
+from lettersmith import yamltools
+from lettersmith import codec as codectools
 from lettersmith import path as pathtools
 from lettersmith.util import replace, get, maps_if
 
@@ -78,17 +79,28 @@ def replace_meta(doc, **kwargs):
     return replace(doc, meta=replace(doc.meta, **kwargs))
 
 
-def load(pathlike, relative_to=""):
+def load(pathlike, relative_to="", read_times=read_file_times):
     """
     Loads a basic doc dictionary from a file path.
     `content` field will contain contents of file.
     Typically, you decorate the doc later with meta and other fields.
 
+    `read_times` is a function that returns a tuple of
+    `(created, modified)` for a path. Defaults to file system times.
+
     Returns a doc.
     """
-    file_created, file_modified = read_file_times(pathlike)
     with open(pathlike, 'r') as f:
         content = f.read()
+    return _from_file(
+        pathlike, content, relative_to=relative_to, read_times=read_times)
+
+
+def _from_file(pathlike, content, relative_to="", read_times=read_file_times):
+    """
+    Create a doc for a file path, with the given content.
+    """
+    file_created, file_modified = read_times(pathlike)
     input_path = PurePath(pathlike)
     id_path = input_path.relative_to(relative_to)
     output_path = pathtools.to_nice_path(id_path)
@@ -107,6 +119,34 @@ def load(pathlike, relative_to=""):
     )
 
 
+def load_head(pathlike, relative_to="", peek_size=4096,
+    read_times=read_file_times, scan_body=None):
+    """
+    Loads a doc from a file path, like `load`, but only reads the
+    frontmatter block and the first `peek_size` characters of the body.
+
+    Head docs have everything needed to build a stub (meta, title, and
+    enough content for a summary), so you can index large files
+    without reading them. Load the full doc with `load` when you need
+    to render it.
+
+    If you need to look at the whole body anyway (e.g. to find links),
+    pass a `scan_body` function. It is called with an iterator of the
+    body's lines, frontmatter excluded, in the same pass that reads the
+    head. Only the head is kept in memory.
+
+    Returns a doc.
+    """
+    with open(pathlike, 'r') as f:
+        frontmatter, body = yamltools.split_head(f, peek_size)
+        if scan_body is not None:
+            # Finish the line the head stopped in, so no line is split.
+            scan_body(chain((body + f.readline(),), f))
+    return _from_file(
+        pathlike, frontmatter + body,
+        relative_to=relative_to, read_times=read_times)
+
+
 def from_stub(stub):
     """
     Create a doc dictionary from an stub dictionary.
@@ -235,7 +275,7 @@ def annotates_exceptions(func):
 
 @annotates_exceptions
 def parse_frontmatter(doc):
-    meta, content = frontmatter.parse(doc.content)
+    meta, content = yamltools.parse_frontmatter(doc.content)
     return doc._replace(
         meta=meta,
         content=content
@@ -270,7 +310,7 @@ def parse_yaml(doc):
     Parse YAML in the doc's content property, placing it in meta
     and replacing content property with an empty string.
     """
-    meta = yaml.load(doc.content)
+    meta = yamltools.loads(doc.content)
     return doc._replace(
         meta=meta,
         content=""
@@ -291,15 +331,67 @@ def parse_json(doc):
     )
 
 
+# How many cache files `DocCache.load_all` reads ahead.
+PREFETCH_SIZE = 16
+
+
+def _read_bytes(file_path):
+    with open(file_path, "rb") as f:
+        return f.read()
+
+
+def _read_ahead(file_paths, size):
+    """
+    Read files on a background thread, yielding their bytes in order.
+    At most `size` files are held in memory ahead of the consumer.
+    """
+    chunks = Queue(maxsize=size)
+    stopped = Event()
+
+    def put(item):
+        # Give up if the consumer has stopped listening.
+        while not stopped.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def read_all():
+        try:
+            for file_path in file_paths:
+                if not put((_read_bytes(file_path), None)):
+                    return
+        except Exception as error:
+            put((None, error))
+            return
+        put((None, None))
+
+    reader = Thread(target=read_all, daemon=True)
+    reader.start()
+    try:
+        while True:
+            data, error = chunks.get()
+            if error is not None:
+                raise error
+            if data is None:
+                return
+            yield data
+    finally:
+        stopped.set()
+        reader.join()
+
+
 def _hashstr(s):
     return hashlib.md5(str(s).encode()).hexdigest()
 
 
-def _cache_path(id_path):
+def _cache_path(id_path, suffix=".pkl"):
     """
     Read a doc ID path
     """
-    return PurePath(_hashstr(id_path)).with_suffix('.pkl')
+    return PurePath(_hashstr(id_path)).with_suffix(suffix)
 
 
 class DocCache:
@@ -309,31 +401,67 @@ class DocCache:
     This lets us support loading a larger total number of docs, since
     not all of them need to be in memory at once.
 
+    Builds typically use the cache in two phases:
+
+    1. `dump_each` spills docs to cache as they stream past, so you can
+       build stubs (or anything else) from them in the same pass.
+    2. `load_all` streams the docs back, in the order they were dumped.
+
+    This way each doc is only serialized and deserialized once.
+
+    Docs are serialized with `codec` (see `lettersmith.codec`). By default,
+    this is pickle, with the highest protocol.
+
     For convenience, you might want to use `DocCacheDir` instead of `DocCache`,
     because `DocCacheDir` automatically creates a temporary cache directory
     and will clean it up when you're done with it.
     """
-    def __init__(self, cache_path):
+    def __init__(self, cache_path, codec=None):
         self.cache_path = Path(cache_path)
+        self.codec = codec if codec is not None else codectools.pickle_codec()
+        # Insertion-ordered record of the id_paths dumped to this cache.
+        self._id_paths = {}
+        # Size of the largest file dumped, in bytes. Useful for sizing
+        # read-ahead buffers.
+        self.max_file_size = 0
 
     def dump(self, doc):
         """
         Dump a doc into cache
         """
-        doc_cache_path = _cache_path(doc.id_path)
+        doc_cache_path = _cache_path(doc.id_path, self.codec.suffix)
+        data = self.codec.dumps(doc)
         with open(PurePath(self.cache_path, doc_cache_path), "wb") as f:
-            pickle.dump(doc, f)
-            return doc
+            f.write(data)
+        self._id_paths[doc.id_path] = True
+        self.max_file_size = max(self.max_file_size, len(data))
+        return doc
 
     def load(self, id_path):
         """
         Load a doc from cache by `id_path`
         """
-        doc_cache_path = _cache_path(id_path)
+        doc_cache_path = _cache_path(id_path, self.codec.suffix)
         with open(PurePath(self.cache_path, doc_cache_path), "rb") as f:
-            return pickle.load(f)
+            return self.codec.loads(f.read())
+
+    def load_many(self, id_paths):
+        """
+        Load docs from cache for each of `id_paths`, in a single pass.
+        Returns a tuple of docs, in the same order.
+        """
+        suffix = self.codec.suffix
+        loads = self.codec.loads
+        return tuple(
+            loads(_read_bytes(
+                PurePath(self.cache_path, _cache_path(id_path, suffix))))
+            for id_path in id_paths
+        )
 
     def dump_each(self, docs):
+        """
+        Dump each doc into cache as it passes through, yielding it.
+        """
         for doc in docs:
             self.dump(doc)
             yield doc
@@ -342,10 +470,128 @@ class DocCache:
         for doc in docs:
             self.dump(doc)
 
-    def load_all(self):
-        for file_path in self.cache_path.glob("*.pkl"):
-            with open(file_path, "rb") as f:
-                yield pickle.load(f)
+    def _file_paths(self):
+        if self._id_paths:
+            for id_path in tuple(self._id_paths):
+                yield PurePath(
+                    self.cache_path, _cache_path(id_path, self.codec.suffix))
+        else:
+            # Sort, so the order doesn't depend on the file system.
+            yield from sorted(self.cache_path.glob("*" + self.codec.suffix))
+
+    def load_all(self, prefetch=PREFETCH_SIZE):
+        """
+        Load all docs from cache.
+
+        Docs dumped through this cache are loaded in the order they were
+        dumped. If this cache has not dumped anything (e.g. it was opened
+        on an existing directory), all cache files are loaded, sorted
+        by file name.
+
+        Files are read ahead on a background thread, up to `prefetch`
+        files at a time, so reading from disk overlaps with whatever
+        you do with each doc. Set `prefetch` to 0 to read on the
+        calling thread.
+        """
+        if prefetch > 0:
+            chunks = _read_ahead(self._file_paths(), prefetch)
+        else:
+            chunks = (_read_bytes(file_path) for file_path in self._file_paths())
+        for data in chunks:
+            yield self.codec.loads(data)
+
+
+# Default size of a DocLRU, in bytes of UTF-8 encoded content.
+LRU_SIZE = 32 * 1024 * 1024
+
+
+class DocLRU:
+    """
+    An in-memory, least-recently-used cache of loaded docs, in front of
+    a slower `load` function, like `DocCache.load`.
+
+    The cache is bounded by the total size of doc content in UTF-8
+    encoded bytes, rather than the number of docs, since docs vary so
+    much in size. Docs bigger than `max_size` are never cached.
+
+    `load_many` is used to load misses in bulk, when given. Otherwise,
+    misses are loaded one at a time with `load`.
+
+    Usage:
+
+        lru = DocLRU(cache.load, load_many=cache.load_many)
+        doc = lru.load("posts/hello.md")
+        docs = lru.load_many(("posts/a.md", "posts/b.md"))
+    """
+    def __init__(self, load, max_size=LRU_SIZE, load_many=None):
+        self._load = load
+        self._load_many = load_many
+        self.max_size = max_size
+        self.size = 0
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0}
+        # Docs and their content sizes, least recently used first.
+        self._docs = OrderedDict()
+
+    def _get(self, id_path):
+        doc, size = self._docs[id_path]
+        self._docs.move_to_end(id_path)
+        self.stats["hits"] = self.stats["hits"] + 1
+        return doc
+
+    def _put(self, id_path, doc):
+        size = len(doc.content.encode("utf-8"))
+        if size > self.max_size:
+            return
+        self._docs[id_path] = doc, size
+        self.size = self.size + size
+        while self.size > self.max_size:
+            evicted_id_path, (evicted, evicted_size) = self._docs.popitem(
+                last=False)
+            self.size = self.size - evicted_size
+            self.stats["evicted"] = self.stats["evicted"] + 1
+
+    def load(self, id_path):
+        """
+        Load a doc by `id_path`.
+        """
+        try:
+            return self._get(id_path)
+        except KeyError:
+            pass
+        self.stats["misses"] = self.stats["misses"] + 1
+        doc = self._load(id_path)
+        self._put(id_path, doc)
+        return doc
+
+    def load_many(self, id_paths):
+        """
+        Load docs for each of `id_paths`. Cached docs are served from
+        memory, and misses are loaded together in a single batch.
+
+        Returns a tuple of docs, in the same order as `id_paths`.
+        """
+        id_paths = tuple(id_paths)
+        found = {}
+        # An ordered set of misses.
+        missing = {}
+        for id_path in id_paths:
+            if id_path in found or id_path in missing:
+                continue
+            try:
+                found[id_path] = self._get(id_path)
+            except KeyError:
+                missing[id_path] = True
+        if missing:
+            missing = tuple(missing)
+            self.stats["misses"] = self.stats["misses"] + len(missing)
+            if self._load_many is not None:
+                loaded = self._load_many(missing)
+            else:
+                loaded = tuple(self._load(id_path) for id_path in missing)
+            for id_path, doc in zip(missing, loaded):
+                found[id_path] = doc
+                self._put(id_path, doc)
+        return tuple(found[id_path] for id_path in id_paths)
 
 
 class DocCacheDir:
@@ -365,13 +611,98 @@ class DocCacheDir:
             ...
             cache.load(some_id_path)
     """
-    def __init__(self, docs=_EMPTY_TUPLE):
+    def __init__(self, docs=_EMPTY_TUPLE, codec=None):
         self.__temporary_directory = TemporaryDirectory(prefix="lettersmith_")
-        self.__cache = DocCache(self.__temporary_directory.name)
+        self.__cache = DocCache(self.__temporary_directory.name, codec=codec)
         self.__cache.dump_all(docs)
 
     def __enter__(self):
         return self.__cache
 
     def __exit__(self, *args):
-        self.__temporary_directory.__exit__(*args)
\ No newline at end of file
+        self.__temporary_directory.__exit__(*args)
+
+
+class SourceCache:
+    """
+    A persistent cache of parsed docs, that lives between builds.
+
+    Entries are keyed by a hash of the doc's source file content, plus a
+    `fingerprint` of any config that affects parsing (for example,
+    markdown extensions). When a source file hasn't changed, the parsed
+    doc is reloaded from cache instead of being parsed again.
+
+    File times are not part of the key, so checkouts that touch every
+    file still hit the cache. Cached docs get fresh file times on load.
+
+    Call `collect_garbage` at the end of a build to evict entries for
+    docs that were not loaded, e.g. because their source was deleted.
+
+    Usage:
+
+        cache = SourceCache(".lettersmith/cache", fingerprint="gfm")
+        docs = (cache.load(path, parse=render_doc) for path in paths)
+        ...
+        cache.collect_garbage()
+    """
+    def __init__(self, cache_path, fingerprint="", codec=None):
+        self.cache_path = Path(cache_path)
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+        self.fingerprint = str(fingerprint)
+        self.codec = codec if codec is not None else codectools.pickle_codec()
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0}
+        self._seen = set()
+
+    def _entry_path(self, id_path):
+        return PurePath(self.cache_path, _cache_path(id_path, self.codec.suffix))
+
+    def _key(self, doc):
+        h = hashlib.sha1(self.fingerprint.encode())
+        h.update(doc.id_path.encode())
+        h.update(doc.content.encode())
+        return h.hexdigest().encode()
+
+    def load(self, pathlike, relative_to="", parse=None,
+        read_times=read_file_times):
+        """
+        Load a doc from `pathlike`, and parse it with `parse`, reusing
+        the cached parsed doc if the source is unchanged.
+        """
+        loaded = load(pathlike, relative_to=relative_to, read_times=read_times)
+        entry_path = self._entry_path(loaded.id_path)
+        self._seen.add(entry_path.name)
+        key = self._key(loaded)
+        try:
+            with open(entry_path, "rb") as f:
+                cached_key, data = f.read().split(b"\n", 1)
+            if cached_key == key:
+                self.stats["hits"] = self.stats["hits"] + 1
+                cached = self.codec.loads(data)
+                return uplift_meta(cached._replace(
+                    input_path=loaded.input_path,
+                    created=loaded.created,
+                    modified=loaded.modified
+                ))
+        except FileNotFoundError:
+            pass
+        except Exception:
+            # Treat any unreadable entry (for example, one written by an
+            # older version of Lettersmith) as a miss, and overwrite it.
+            pass
+        self.stats["misses"] = self.stats["misses"] + 1
+        doc = parse(loaded) if parse is not None else loaded
+        write_file_atomic(entry_path, key + b"\n" + self.codec.dumps(doc))
+        return doc
+
+    def collect_garbage(self):
+        """
+        Evict cache entries for docs that were not loaded through this
+        cache. Returns the number of entries evicted.
+        """
+        evicted = 0
+        for entry_path in self.cache_path.glob("*" + self.codec.suffix):
+            if entry_path.name not in self._seen:
+                entry_path.unlink()
+                evicted = evicted + 1
+        self.stats["evicted"] = self.stats["evicted"] + evicted
+        return evicted
@@ -1,7 +1,7 @@
 """
 File utilities
 """
-from os import path, makedirs
+from os import path, makedirs, replace
 import subprocess
 from pathlib import Path
 
@@ -16,6 +16,21 @@ def write_file_deep(pathlike, content):
         f.write(content)
 
 
+def write_file_atomic(pathlike, content):
+    """
+    Write `content` (bytes or str) to a file, creating directories if
+    necessary. Writes to a temporary file first, then moves it into
+    place, so an interrupted write never leaves a partial file behind.
+    """
+    file_path = str(pathlike)
+    makedirs(path.dirname(file_path), exist_ok=True)
+    tmp_path = file_path + ".tmp"
+    mode = "wb" if isinstance(content, bytes) else "w"
+    with open(tmp_path, mode) as f:
+        f.write(content)
+    replace(tmp_path, file_path)
+
+
 def _copy_dir(input_path, output_path, recursive=True, content=True):
     """
     Copies a directory at `input_path` to `output_path`.
@@ -0,0 +1,159 @@
+"""
+A Jinja extension for caching rendered template fragments.
+
+Shared partials, like navigation, sidebars and "recent posts" lists,
+often render the same way on every page. Wrap them in a `cache` block,
+and they are rendered once per build:
+
+    {% cache "recent" %}
+      {% for stub in index.id_path.values() | sort_by("created") %}
+        ...
+      {% endfor %}
+    {% endcache %}
+
+The key is any expression. Fragments are cached per template and block,
+so the same key in two different blocks doesn't collide. Use the key
+for anything the fragment varies on, e.g. `{% cache "recent", doc.section %}`.
+
+To keep a fragment between builds, give it explicit dependencies. The
+fragment is rendered again when the dependencies (or the theme) change:
+
+    {% cache "nav", depends=site.nav %}...{% endcache %}
+
+Persistent fragments need a `FragmentCache` with a `cache_path`.
+"""
+import hashlib
+from pathlib import Path
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from lettersmith.file import write_file_atomic
+
+
+class FragmentCache:
+    """
+    A store for rendered fragments.
+
+    Fragments are kept in memory for the life of the cache (typically
+    one build). If `cache_path` is given, fragments with dependencies are
+    also written there, and reused by later builds, as long as their
+    key, dependencies and `fingerprint` (e.g. a hash of the theme) are
+    unchanged.
+
+    Call `collect_garbage` at the end of a build to evict persisted
+    fragments that were not used.
+    """
+    def __init__(self, cache_path=None, fingerprint=""):
+        self.cache_path = Path(cache_path) if cache_path is not None else None
+        if self.cache_path is not None:
+            self.cache_path.mkdir(parents=True, exist_ok=True)
+        self.fingerprint = str(fingerprint)
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0}
+        self._fragments = {}
+        self._seen = set()
+
+    def _entry_path(self, key, depends):
+        h = hashlib.sha1(self.fingerprint.encode())
+        h.update(repr(key).encode())
+        h.update(repr(depends).encode())
+        return Path(self.cache_path, h.hexdigest() + ".html")
+
+    def _load_persisted(self, key, depends, render):
+        entry_path = self._entry_path(key, depends)
+        self._seen.add(entry_path.name)
+        try:
+            with open(str(entry_path), "r") as f:
+                fragment = Markup(f.read())
+            self.stats["hits"] = self.stats["hits"] + 1
+            return fragment
+        except FileNotFoundError:
+            pass
+        self.stats["misses"] = self.stats["misses"] + 1
+        fragment = render()
+        write_file_atomic(entry_path, str(fragment))
+        return Markup(fragment)
+
+    def get(self, key, render, depends=None):
+        """
+        Get the fragment for `key`, calling `render` to render it if it
+        isn't cached. `key` may be any value with a stable `repr`.
+
+        If `depends` is given and the cache has a `cache_path`, the
+        fragment is persisted between builds, keyed by `depends` too.
+        """
+        mem_key = repr(key)
+        try:
+            fragment = self._fragments[mem_key]
+            self.stats["hits"] = self.stats["hits"] + 1
+            return fragment
+        except KeyError:
+            pass
+        if depends is not None and self.cache_path is not None:
+            fragment = self._load_persisted(key, depends, render)
+        else:
+            self.stats["misses"] = self.stats["misses"] + 1
+            fragment = render()
+        self._fragments[mem_key] = fragment
+        return fragment
+
+    def collect_garbage(self):
+        """
+        Evict persisted fragments that were not used through this cache.
+        Returns the number of fragments evicted.
+        """
+        if self.cache_path is None:
+            return 0
+        evicted = 0
+        for entry_path in self.cache_path.glob("*.html"):
+            if entry_path.name not in self._seen:
+                entry_path.unlink()
+                evicted = evicted + 1
+        self.stats["evicted"] = self.stats["evicted"] + evicted
+        return evicted
+
+
+class FragmentCacheExtension(Extension):
+    """
+    Adds `{% cache key %}...{% endcache %}` blocks to an environment.
+    Fragments are stored in `environment.fragment_cache`.
+    """
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=FragmentCache())
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = parser.parse_expression()
+        depends = nodes.Const(None)
+        if parser.stream.skip_if("comma"):
+            # Keys may be a tuple of expressions, e.g.
+            # `{% cache "recent", doc.section %}`.
+            parts = [key]
+            while parser.stream.current.type != "block_end":
+                if (
+                    parser.stream.current.test("name:depends") and
+                    parser.stream.look().test("assign")
+                ):
+                    next(parser.stream)
+                    next(parser.stream)
+                    depends = parser.parse_expression()
+                    break
+                parts.append(parser.parse_expression())
+                if not parser.stream.skip_if("comma"):
+                    break
+            if len(parts) > 1:
+                key = nodes.Tuple(parts, "load", lineno=lineno)
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        # Scope keys to this template and block. Blocks are numbered in
+        # the order they appear, which is stable for a given template.
+        index = getattr(parser, "_fragment_cache_index", 0)
+        parser._fragment_cache_index = index + 1
+        scope = nodes.Const((parser.name, index))
+        call = self.call_method("_render_fragment", [scope, key, depends])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render_fragment(self, scope, key, depends, caller):
+        return self.environment.fragment_cache.get(
+            (scope, key), caller, depends)
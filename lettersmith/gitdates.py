@@ -0,0 +1,128 @@
+"""
+Read created and modified dates for files from git history.
+
+File system times are meaningless after a fresh checkout, since every
+file is created at checkout time. Git history knows better. We read the
+whole history of a directory with a single `git log` walk, rather than
+running git once per file.
+
+Usage:
+
+    read_times = git_times_reader("content")
+    doc = Doc.load(path, read_times=read_times)
+"""
+import os
+import pickle
+import subprocess
+from pathlib import Path
+from lettersmith.date import read_file_times, from_timestamp
+
+# Marks the start of each commit in `git log` output, so that commit
+# timestamps can't be confused with file names.
+_COMMIT_MARK = "\x01"
+
+
+def _git(dir_path, *args):
+    return subprocess.run(
+        ("git", "-C", str(dir_path)) + args,
+        check=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL
+    ).stdout.decode("utf-8", "surrogateescape")
+
+
+def parse_git_log(output, root=""):
+    """
+    Parse the output of
+    `git log -z --name-status --no-renames --format=%x01%ct`.
+
+    Returns a dict of `{path: (created, modified)}`, where paths are
+    joined to `root`, and times are unix timestamps of the first and
+    last commit that touched the file.
+    """
+    times = {}
+    timestamp = None
+    tokens = iter(output.split("\0"))
+    for token in tokens:
+        if token.startswith(_COMMIT_MARK):
+            timestamp = int(token[1:])
+        elif token.strip():
+            # A status token, followed by a path.
+            path = os.path.join(root, next(tokens))
+            try:
+                created, modified = times[path]
+                # Commits are listed newest first, so each older commit
+                # pushes the created time back.
+                times[path] = (timestamp, modified)
+            except KeyError:
+                times[path] = (timestamp, timestamp)
+    return times
+
+
+def read_git_times(dir_path):
+    """
+    Read created and modified timestamps for every file in the git
+    history of `dir_path`, with a single `git log` walk.
+
+    Returns a tuple of `(head, times)`, where `head` is the commit hash
+    of HEAD, and `times` is a dict of `{absolute path: (created, modified)}`.
+    """
+    root = _git(dir_path, "rev-parse", "--show-toplevel").strip()
+    head = _git(dir_path, "rev-parse", "HEAD").strip()
+    output = _git(
+        dir_path, "log", "-z", "--name-status", "--no-renames",
+        "--format=" + "%x01%ct", "--", "."
+    )
+    return head, parse_git_log(output, root)
+
+
+def load_git_times(dir_path, cache_path=None):
+    """
+    Like `read_git_times`, but caches the result in the file at
+    `cache_path`, keyed by HEAD. Later builds only walk history again
+    when HEAD has moved.
+
+    Returns a dict of `{absolute path: (created, modified)}`.
+    """
+    dir_key = str(Path(dir_path).resolve())
+    if cache_path is not None:
+        head = _git(dir_path, "rev-parse", "HEAD").strip()
+        try:
+            with open(cache_path, "rb") as f:
+                cached_head, cached_dir, times = pickle.load(f)
+            if cached_head == head and cached_dir == dir_key:
+                return times
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            pass
+    head, times = read_git_times(dir_path)
+    if cache_path is not None:
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, "wb") as f:
+            pickle.dump((head, dir_key, times), f)
+    return times
+
+
+def git_times_reader(dir_path, cache_path=None):
+    """
+    Create a function like `date.read_file_times` that reads times from
+    the git history of `dir_path`. Files that aren't committed yet fall
+    back to file system times.
+
+    If `dir_path` is not in a git repository (or git isn't installed),
+    returns `date.read_file_times`.
+    """
+    try:
+        times = load_git_times(dir_path, cache_path)
+    except (OSError, subprocess.CalledProcessError):
+        return read_file_times
+
+    def read_times(pathlike):
+        try:
+            created, modified = times[str(Path(pathlike).resolve())]
+        except KeyError:
+            return read_file_times(pathlike)
+        # Commit times are normalized to UTC, like dates in frontmatter,
+        # so they don't depend on where the site is built.
+        return from_timestamp(created), from_timestamp(modified)
+
+    return read_times
@@ -0,0 +1,208 @@
+"""
+A cache for syntax-highlighted code blocks in markdown.
+
+Highlighting fenced code blocks with Pygments is by far the slowest part
+of rendering markdown for code-heavy docs. `HighlightCacheExtension`
+highlights each distinct block once, keyed by language, code and
+highlighter options, and reuses the HTML for every doc it appears in.
+With `HighlightCache.persist`, highlighted blocks are kept between
+builds too.
+
+Usage:
+
+    cache = HighlightCache()
+    html = markdown(s, extensions=(
+        GithubFlavoredMarkdownExtension(),
+        HighlightCacheExtension(cache=cache)
+    ))
+"""
+import pickle
+import hashlib
+from pathlib import Path
+from functools import partial, lru_cache
+from collections import OrderedDict
+import markdown
+from markdown.extensions import Extension
+from markdown.extensions.codehilite import CodeHilite, CodeHiliteExtension
+from markdown.extensions.fenced_code import FencedBlockPreprocessor
+from lettersmith.file import write_file_atomic
+
+
+# Maximum number of highlighted blocks to keep.
+HIGHLIGHT_CACHE_SIZE = 10000
+
+
+class HighlightCache:
+    """
+    A store for highlighted code blocks, keyed by a hash of the block.
+
+    Blocks are kept in memory, up to `max_entries`, least recently used
+    blocks first out. Call `persist` to load blocks from a previous build
+    and keep them in a file, and `save` at the end of the build.
+    """
+    def __init__(self, max_entries=HIGHLIGHT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.cache_path = None
+        self.stats = {"hits": 0, "misses": 0}
+        self._blocks = OrderedDict()
+        self._changed = False
+
+    def persist(self, cache_path):
+        """
+        Keep blocks in the file at `cache_path` between builds. Loads
+        any blocks saved there by a previous build.
+        """
+        self.cache_path = Path(cache_path)
+        try:
+            with open(str(self.cache_path), "rb") as f:
+                blocks = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return
+        # Blocks loaded from disk are older than blocks already in memory.
+        blocks.update(self._blocks)
+        self._blocks = OrderedDict(blocks)
+
+    def get(self, key, render):
+        """
+        Get the block for `key`, calling `render` to highlight it if it
+        isn't cached.
+        """
+        try:
+            html = self._blocks[key]
+            self._blocks.move_to_end(key)
+            self.stats["hits"] = self.stats["hits"] + 1
+            return html
+        except KeyError:
+            pass
+        self.stats["misses"] = self.stats["misses"] + 1
+        html = render()
+        self._blocks[key] = html
+        self._changed = True
+        while len(self._blocks) > self.max_entries:
+            self._blocks.popitem(last=False)
+        return html
+
+    def save(self):
+        """
+        Write blocks to `cache_path`, if anything was highlighted since
+        they were loaded.
+        """
+        if self.cache_path is None or not self._changed:
+            return
+        write_file_atomic(
+            self.cache_path,
+            pickle.dumps(dict(self._blocks), pickle.HIGHEST_PROTOCOL)
+        )
+        self._changed = False
+
+
+@lru_cache(maxsize=None)
+def pygments_version():
+    """
+    Get the version of Pygments, or None if it isn't installed.
+    Pygments is optional. Without it, code blocks aren't highlighted.
+    """
+    try:
+        import pygments
+    except ImportError:
+        return None
+    return pygments.__version__
+
+
+def _key(lang, code, config):
+    h = hashlib.sha1()
+    # Highlighted HTML depends on the versions of markdown and Pygments.
+    h.update(markdown.__version__.encode())
+    h.update(pygments_version().encode())
+    h.update(repr(sorted(config.items())).encode())
+    h.update(repr(lang).encode())
+    h.update(code.encode())
+    return h.hexdigest()
+
+
+def _hilite(lang, code, config):
+    # The same call the fenced code preprocessor makes.
+    config = dict(config)
+    highliter = CodeHilite(
+        code,
+        lang=lang,
+        style=config.pop("pygments_style", "default"),
+        **config
+    )
+    return highliter.hilite(shebang=False)
+
+
+class CachedFencedBlockPreprocessor(FencedBlockPreprocessor):
+    """
+    Highlights fenced code blocks through a `HighlightCache`, before the
+    fenced code preprocessor sees them.
+
+    Only plain blocks (a fence with an optional language) are handled.
+    Blocks with attributes or highlighted lines are left for the fenced
+    code preprocessor.
+    """
+    def __init__(self, md, cache):
+        super().__init__(md, {})
+        self.cache = cache
+
+    def _read_config(self):
+        """
+        Read the highlighter options the fenced code preprocessor uses.
+        """
+        for ext in self.md.registeredExtensions:
+            if isinstance(ext, CodeHiliteExtension):
+                return ext.getConfigs()
+        try:
+            fenced = self.md.preprocessors["fenced_code_block"]
+        except KeyError:
+            return None
+        return getattr(fenced, "codehilite_conf", None)
+
+    def run(self, lines):
+        config = self._read_config()
+        if (
+            not config or
+            not config.get("use_pygments") or
+            pygments_version() is None
+        ):
+            return lines
+        text = "\n".join(lines)
+        index = 0
+        while True:
+            m = self.FENCED_BLOCK_RE.search(text, index)
+            if not m:
+                break
+            if m.group("attrs") or m.group("hl_lines"):
+                index = m.end()
+                continue
+            lang = m.group("lang") or None
+            code = m.group("code")
+            html = self.cache.get(
+                _key(lang, code, config),
+                partial(_hilite, lang, code, config)
+            )
+            placeholder = self.md.htmlStash.store(html)
+            text = "{}\n{}\n{}".format(
+                text[:m.start()], placeholder, text[m.end():])
+            index = m.start() + 1 + len(placeholder)
+        return text.split("\n")
+
+
+class HighlightCacheExtension(Extension):
+    """
+    A markdown extension that highlights fenced code blocks through a
+    `HighlightCache`. Use it alongside an extension that highlights
+    fenced code, like GitHub-flavored markdown.
+    """
+    def __init__(self, cache=None, **kwargs):
+        self.cache = cache if cache is not None else HighlightCache()
+        super().__init__(**kwargs)
+
+    def extendMarkdown(self, md):
+        md.registerExtension(self)
+        # Run just before the fenced code preprocessor (priority 25).
+        md.preprocessors.register(
+            CachedFencedBlockPreprocessor(md, self.cache),
+            "highlight_cache",
+            26
+        )
@@ -1,8 +1,11 @@
 import random
+import hashlib
 import itertools
 import json
+from pathlib import Path
 
-from jinja2 import Environment, FileSystemLoader
+import jinja2
+from jinja2 import Environment, FileSystemLoader, ModuleLoader, ChoiceLoader
 
 from lettersmith import util
 from lettersmith import docs as Docs
@@ -10,7 +13,9 @@ from lettersmith import doc as Doc
 from lettersmith import templatetools
 from lettersmith import path as pathtools
 from lettersmith.markdowntools import house_markdown
+from lettersmith.stringtools import summarize
 from lettersmith import taxonomy
+from lettersmith.fragmentcache import FragmentCacheExtension
 
 
 def _choice(iterable):
@@ -49,15 +54,69 @@ def permalink(base_url):
 
 
 class FileSystemEnvironment(Environment):
-    def __init__(self, templates_path, filters={}, context={}):
-        loader = FileSystemLoader(templates_path)
-        super().__init__(loader=loader)
+    def __init__(self, templates_path, filters={}, context={}, loader=None,
+        extensions=()):
+        if loader is None:
+            loader = FileSystemLoader(templates_path)
+        super().__init__(loader=loader, extensions=extensions)
         self.filters.update(filters)
         self.globals.update(context)
 
 
+# Written to the compiled theme directory after a successful compile.
+COMPILED_STAMP = "lettersmith-theme.json"
+
+
+def compiled_theme_path(templates_path):
+    """
+    The default location for a compiled theme: a sibling of the theme
+    directory, e.g. "theme.compiled" for "theme".
+    """
+    templates_path = Path(templates_path)
+    return templates_path.with_name(templates_path.name + ".compiled")
+
+
+def _stamp(templates_path):
+    return {"fingerprint": theme_fingerprint(templates_path)}
+
+
+def is_compiled_fresh(templates_path, compiled_path):
+    """
+    Check if the compiled theme at `compiled_path` is up to date with
+    the theme at `templates_path`. It is fresh if it was compiled from
+    the same templates, with the same contents, with the same version
+    of Jinja. Modification times are not trusted, since checkouts and
+    copies can leave an edited template with an older time.
+    """
+    stamp_path = Path(compiled_path, COMPILED_STAMP)
+    try:
+        with open(str(stamp_path)) as f:
+            stamp = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return stamp == _stamp(templates_path)
+
+
+def theme_loader(templates_path, compiled_path=None):
+    """
+    Create a loader for the theme at `templates_path`.
+
+    If the compiled theme at `compiled_path` is fresh, templates are
+    loaded from compiled modules, falling back to source for anything
+    that didn't compile. Otherwise, templates are loaded from source.
+    """
+    source_loader = FileSystemLoader(str(templates_path))
+    if compiled_path is None:
+        compiled_path = compiled_theme_path(templates_path)
+    if is_compiled_fresh(templates_path, compiled_path):
+        module_loader = ModuleLoader(str(Path(compiled_path).resolve()))
+        return ChoiceLoader((module_loader, source_loader))
+    return source_loader
+
+
 TEMPLATE_FUNCTIONS = {
     "markdown": house_markdown,
+    "summary": summarize,
     "sorted": sorted,
     "json_dumps": json.dumps,
     "sum": sum,
@@ -100,17 +159,81 @@ TEMPLATE_FUNCTIONS = {
 class LettersmithEnvironment(FileSystemEnvironment):
     """
     Specialized version of default Jinja environment class that
-    offers additional filters and environment variables.
+    offers additional filters and environment variables, and
+    `{% cache %}` blocks (see `lettersmith.fragmentcache`).
     """
-    def __init__(self, templates_path, filters={}, context={}):
-        loader = FileSystemLoader(templates_path)
+    def __init__(self, templates_path, filters={}, context={},
+        compiled_path=None, fragment_cache=None):
+        """
+        Templates are loaded from the compiled theme at `compiled_path`
+        when it is fresher than the sources (see `compile_theme`).
+        `compiled_path` defaults to `compiled_theme_path(templates_path)`.
+
+        `fragment_cache` is the `FragmentCache` used by `{% cache %}`
+        blocks. Defaults to an in-memory cache for this environment.
+        """
         super().__init__(
             templates_path,
             filters=TEMPLATE_FUNCTIONS,
-            context=TEMPLATE_FUNCTIONS
+            context=TEMPLATE_FUNCTIONS,
+            loader=theme_loader(templates_path, compiled_path),
+            extensions=(FragmentCacheExtension,)
         )
         self.filters.update(filters)
         self.globals.update(context)
+        if fragment_cache is not None:
+            self.fragment_cache = fragment_cache
+
+
+def theme_fingerprint(templates_path):
+    """
+    Get a hash of every template in a theme. If it changes, cached
+    fragments rendered with the theme may be out of date.
+    """
+    h = hashlib.sha1(jinja2.__version__.encode())
+    for name in sorted(templatetools.list_templates(templates_path)):
+        h.update(name.encode())
+        h.update(Path(templates_path, name).read_bytes())
+    return h.hexdigest()
+
+
+def compile_theme(templates_path, compiled_path=None):
+    """
+    Compile the templates in a theme to Python modules, for Jinja's
+    `ModuleLoader`. `LettersmithEnvironment` loads them instead of the
+    sources, until a source template changes.
+
+    Returns the path to the compiled theme.
+    """
+    if compiled_path is None:
+        compiled_path = compiled_theme_path(templates_path)
+    compiled_path = Path(compiled_path)
+    compiled_path.mkdir(parents=True, exist_ok=True)
+    # Remove the stamp first, so an interrupted compile is never
+    # mistaken for a fresh one. Then clear out stale modules.
+    stamp_path = Path(compiled_path, COMPILED_STAMP)
+    if stamp_path.exists():
+        stamp_path.unlink()
+    for module_path in compiled_path.glob("tmpl_*.py"):
+        module_path.unlink()
+    names = templatetools.list_templates(templates_path)
+    stamp = _stamp(templates_path)
+    # Compile from source, never from another compiled theme.
+    env = FileSystemEnvironment(
+        templates_path,
+        filters=TEMPLATE_FUNCTIONS,
+        context=TEMPLATE_FUNCTIONS,
+        extensions=(FragmentCacheExtension,)
+    )
+    env.compile_templates(
+        str(compiled_path),
+        filter_func=names.__contains__,
+        zip=None,
+        ignore_errors=False
+    )
+    with open(str(stamp_path), "w") as f:
+        json.dump(stamp, f)
+    return compiled_path
 
 
 def should_template(doc):
@@ -138,7 +261,8 @@ def doc_renderer(env):
     return render_doc
 
 
-def lettersmith_doc_renderer(templates_path="theme", context={}, filters={}):
+def lettersmith_doc_renderer(templates_path="theme", context={}, filters={},
+    compiled_path=None, fragment_cache=None):
     """
     Wraps up the gory details of creating a Jinja renderer.
     Returns a render function that takes a doc and returns a rendered doc.
@@ -148,5 +272,7 @@ def lettersmith_doc_renderer(templates_path="theme", context={}, filters={}):
     return doc_renderer(LettersmithEnvironment(
         templates_path,
         filters=filters,
-        context=context
+        context=context,
+        compiled_path=compiled_path,
+        fragment_cache=fragment_cache
     ))
\ No newline at end of file
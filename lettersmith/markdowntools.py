@@ -1,11 +1,62 @@
 from pathlib import PurePath
-from markdown import markdown
-from mdx_gfm import GithubFlavoredMarkdownExtension
+from functools import lru_cache
 
 from lettersmith import doc as Doc
 
 
-MD_LANG_EXTENSIONS=(GithubFlavoredMarkdownExtension(),)
+# Markdown and its extensions are imported the first time we render,
+# since they are slow to import, and many builds don't need them.
+@lru_cache(maxsize=None)
+def highlight_cache():
+    """
+    Get the highlighted code block cache shared by every doc rendered
+    with house markdown. See `lettersmith.highlight`.
+    """
+    from lettersmith.highlight import HighlightCache
+    return HighlightCache()
+
+
+@lru_cache(maxsize=None)
+def house_extensions():
+    """
+    Get the markdown extensions for our house flavor of markdown.
+    """
+    from mdx_gfm import GithubFlavoredMarkdownExtension
+    from lettersmith.highlight import HighlightCacheExtension
+    return (
+        GithubFlavoredMarkdownExtension(),
+        HighlightCacheExtension(cache=highlight_cache())
+    )
+
+
+def __getattr__(name):
+    # `MD_LANG_EXTENSIONS` is resolved lazily, so importing this module
+    # doesn't import markdown.
+    if name == "MD_LANG_EXTENSIONS":
+        return house_extensions()
+    raise AttributeError(
+        "module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def fingerprint(extensions=None):
+    """
+    Get a string that identifies the markdown and Pygments versions and
+    extensions used to render. If it changes, rendered output may
+    change too.
+    """
+    import markdown as markdownlib
+    from lettersmith.highlight import pygments_version
+    if extensions is None:
+        extensions = house_extensions()
+    names = (
+        type(ext).__module__ + "." + type(ext).__name__
+        for ext in extensions
+    )
+    versions = (
+        markdownlib.__version__,
+        "pygments-" + str(pygments_version())
+    )
+    return " ".join(versions + tuple(names))
 
 
 def house_markdown(s):
@@ -13,20 +64,24 @@ def house_markdown(s):
     Just a wrapper for our house flavor of markdown.
     We use Github-flavored markdown as a base.
     """
-    return markdown(s, extensions=MD_LANG_EXTENSIONS)
+    from markdown import markdown
+    return markdown(s, extensions=house_extensions())
 
 
 @Doc.maps_if_ext(".md", ".markdown", ".mdown", ".txt")
 @Doc.uplifts_frontmatter
-def render_doc(doc, extensions=MD_LANG_EXTENSIONS):
+def render_doc(doc, extensions=None):
     """
     Render markdown in content field of doc dictionary.
     Updates the output path to .html.
     Returns a new doc.
     """
+    from markdown import markdown
+    if extensions is None:
+        extensions = house_extensions()
     content = markdown(doc.content, extensions=extensions)
     output_path = PurePath(doc.output_path).with_suffix(".html")
     return doc._replace(
         content=content,
         output_path=str(output_path)
-    )
\ No newline at end of file
+    )
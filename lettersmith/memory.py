@@ -0,0 +1,125 @@
+"""
+Tools for measuring and budgeting memory use during a build.
+"""
+import sys
+import re
+
+try:
+    import resource
+except ImportError:
+    # `resource` is only available on Unix.
+    resource = None
+
+
+_SIZE_UNITS = {
+    "": 1,
+    "B": 1,
+    "K": 1024,
+    "KB": 1024,
+    "M": 1024 ** 2,
+    "MB": 1024 ** 2,
+    "G": 1024 ** 3,
+    "GB": 1024 ** 3
+}
+_SIZE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([a-zA-Z]*)\s*$")
+
+
+def parse_size(size):
+    """
+    Parse a human-friendly size like `512MB` or `2G` into a number of bytes.
+    Integers are treated as a number of bytes. `None` is returned as-is.
+    """
+    if size is None or isinstance(size, int):
+        return size
+    match = _SIZE_PATTERN.match(str(size))
+    if not match:
+        raise ValueError("Could not parse size: {}".format(size))
+    number, unit = match.groups()
+    try:
+        return int(float(number) * _SIZE_UNITS[unit.upper()])
+    except KeyError:
+        raise ValueError("Unknown size unit: {}".format(unit)) from None
+
+
+def format_size(n):
+    """
+    Format a number of bytes as a human-friendly string.
+    """
+    if n < 1024:
+        return "{}B".format(n)
+    for unit in ("KB", "MB", "GB"):
+        n = n / 1024
+        if n < 1024 or unit == "GB":
+            return "{:.1f}{}".format(n, unit)
+
+
+# Shares of a memory budget given to in-memory buffers during a build.
+# Docs loaded by templates are kept in an LRU, and docs are read ahead
+# of rendering. Everything else (stubs, indexes) is spooled to disk in
+# low memory mode.
+LOAD_CACHE_SHARE = 1 / 8
+PREFETCH_SHARE = 1 / 16
+
+
+def share(budget, fraction, default=None):
+    """
+    Get a `fraction` of `budget` bytes, but no more than `default`,
+    if given. Returns `default` if there is no budget.
+    """
+    if budget is None:
+        return default
+    size = int(budget * fraction)
+    return size if default is None else min(size, default)
+
+
+def fit(size, item_size, default):
+    """
+    Get how many items of `item_size` bytes fit in `size` bytes, at
+    least 1 and no more than `default`. Returns `default` if there is
+    no `size`.
+    """
+    if size is None:
+        return default
+    if item_size <= 0:
+        return default
+    return max(1, min(size // item_size, default))
+
+
+def peak_rss():
+    """
+    Read the peak resident set size of this process, in bytes.
+    Returns `None` if peak RSS can't be read on this platform.
+    """
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports kilobytes.
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def report(budget=None):
+    """
+    Create a short human-readable report of peak memory use,
+    comparing it to `budget` (in bytes), if given.
+    """
+    peak = peak_rss()
+    if peak is None:
+        return "Peak memory: unknown"
+    if budget is None:
+        return "Peak memory: {}".format(format_size(peak))
+    return "Peak memory: {peak} (budget {budget}{over})".format(
+        peak=format_size(peak),
+        budget=format_size(budget),
+        over=", exceeded" if peak > budget else ""
+    )
+
+
+def is_over_budget(budget=None):
+    """
+    Check if peak memory use went over `budget` bytes. Returns False if
+    there is no budget, or peak memory can't be read on this platform.
+    """
+    if budget is None:
+        return False
+    peak = peak_rss()
+    return peak is not None and peak > budget
@@ -4,7 +4,9 @@ Tools for building pagination.
 
 from math import ceil
 from itertools import islice, chain
-from lettersmith.util import chunk, decorate_group_matching_id_path
+from collections.abc import Sequence
+from lettersmith.util import decorate_group_matching_id_path, view
+from lettersmith.path import to_url
 from lettersmith import doc as Doc
 
 
@@ -36,27 +38,46 @@ def next_i(i, length):
     return min(i + 1, length - 1)
 
 
+def _page_url(output_path_template, n, page_count, base_url):
+    if n < 1 or n > page_count:
+        return None
+    return to_url(output_path_template.format(n=n), base_url)
+
+
 @decorate_group_matching_id_path
 def gen_paging(stubs,
     template=None,
     output_path_template=None,
-    per_page=10):
+    per_page=10,
+    base_url="/"):
     """
-    Generate paging docs from stubs
+    Generate paging docs from stubs.
+
+    Each page's `page_list` is a lazy view over `stubs`, so pages share
+    one sequence of stubs rather than holding copies. If `stubs` is a
+    disk-backed sequence (like a Spool), pages stay on disk too.
+
+    Page meta includes `prev_url` and `next_url`, which are None on the
+    first and last page.
     """
-    paged = tuple(chunk(stubs, per_page))
-    page_count = len(paged)
+    stubs = stubs if isinstance(stubs, Sequence) else tuple(stubs)
+    output_path_template = output_path_template or OUTPUT_PATH_TEMPLATE
+    page_count = count_pages(len(stubs), per_page)
     templates = (template,) + TEMPLATES if template is not None else TEMPLATES
-    n = 0
-    for stubs in paged:
-        n = n + 1
-        output_path = (output_path_template or OUTPUT_PATH_TEMPLATE).format(n=n)
-        page_list = tuple(stub for stub in stubs)
+    for i in range(page_count):
+        n = i + 1
+        output_path = output_path_template.format(n=n)
+        page_start = i * per_page
+        page_list = view(stubs, page_start, page_start + per_page)
         meta = {
             "page_n": n,
             "per_page": per_page,
             "page_count": page_count,
-            "page_list": page_list
+            "page_list": page_list,
+            "prev_url": _page_url(
+                output_path_template, n - 1, page_count, base_url),
+            "next_url": _page_url(
+                output_path_template, n + 1, page_count, base_url)
         }
         yield Doc.doc(
             id_path=output_path,
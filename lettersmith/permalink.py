@@ -1,4 +1,39 @@
+"""
+Tools for mapping doc output paths through permalink templates.
+
+Templates are Python format strings, like `"{yyyy}/{mm}/{stem}/index.html"`.
+Each template is compiled once, and only the tokens it uses are computed
+for each doc.
+
+Usage:
+
+    map_permalink = permalink.permalinker({
+        "posts": "{yyyy}/{mm}/{stem}/index.html"
+    })
+    docs = (map_permalink(doc) for doc in docs)
+"""
 from pathlib import PurePath
+from string import Formatter
+from functools import lru_cache
+
+
+# Tokens read from the doc's id_path. They share a single PurePath.
+PATH_TOKENS = {
+    "name": lambda id_path: id_path.name,
+    "stem": lambda id_path: id_path.stem,
+    "suffix": lambda id_path: id_path.suffix,
+    "parents": lambda id_path: str(id_path.parent),
+    "parent": lambda id_path: id_path.parent.stem
+}
+
+# Tokens read from other doc fields. Dates come from `created`.
+DOC_TOKENS = {
+    "section": lambda doc: doc.section,
+    "yy": lambda doc: "{:02d}".format(doc.created.year % 100),
+    "yyyy": lambda doc: "{:04d}".format(doc.created.year),
+    "mm": lambda doc: "{:02d}".format(doc.created.month),
+    "dd": lambda doc: "{:02d}".format(doc.created.day)
+}
 
 
 def read_doc_permalink(doc):
@@ -6,19 +41,76 @@ def read_doc_permalink(doc):
     Read doc, producing a flat dictionary of permalink template token values.
     """
     id_path = PurePath(doc.id_path)
-    return {
-        "section": doc.section,
-        "name": id_path.name,
-        "stem": id_path.stem,
-        "suffix": id_path.suffix,
-        "parents": str(id_path.parent),
-        "parent": id_path.parent.stem,
-        "yy": doc.date.strftime("%y"),
-        "yyyy": doc.date.strftime("%Y"),
-        "mm": doc.date.strftime("%m"),
-        "dd": doc.date.strftime("%d")
+    tokens = {key: read(id_path) for key, read in PATH_TOKENS.items()}
+    for key, read in DOC_TOKENS.items():
+        tokens[key] = read(doc)
+    return tokens
+
+
+def _field_names(path_template):
+    for literal, field, spec, conversion in Formatter().parse(path_template):
+        if field is not None:
+            # Strip attribute and index access, e.g. `{stem[0]}`.
+            yield field.split(".", 1)[0].split("[", 1)[0]
+
+
+@lru_cache(maxsize=None)
+def compile_template(path_template):
+    """
+    Compile a permalink template into a function that takes a doc and
+    returns its output path. Only the tokens used in the template are
+    read from the doc.
+
+    Raises a `ValueError` if the template uses an unknown token.
+    """
+    names = frozenset(_field_names(path_template))
+    unknown = names - PATH_TOKENS.keys() - DOC_TOKENS.keys()
+    if unknown:
+        raise ValueError(
+            'Unknown token(s) {tokens} in permalink template "{template}"'
+            .format(tokens=", ".join(sorted(unknown)), template=path_template)
+        )
+    path_reads = tuple(
+        (name, read) for name, read in PATH_TOKENS.items() if name in names)
+    doc_reads = tuple(
+        (name, read) for name, read in DOC_TOKENS.items() if name in names)
+
+    def render_permalink(doc):
+        tokens = {}
+        if path_reads:
+            id_path = PurePath(doc.id_path)
+            for name, read in path_reads:
+                tokens[name] = read(id_path)
+        for name, read in doc_reads:
+            tokens[name] = read(doc)
+        return str(PurePath(path_template.format(**tokens)))
+
+    return render_permalink
+
+
+def permalinker(permalink_templates):
+    """
+    Create a function that maps a doc's output_path through the
+    permalink template for its section. Templates are compiled up front,
+    so mistakes in templates are reported before any docs are read.
+
+    `permalink_templates` is a dictionary of section/template pairs.
+    Docs in sections without a template are returned untouched.
+    """
+    compiled = {
+        section: compile_template(path_template)
+        for section, path_template in permalink_templates.items()
     }
 
+    def map_permalink(doc):
+        try:
+            render_permalink = compiled[doc.section]
+        except KeyError:
+            return doc
+        return doc._replace(output_path=render_permalink(doc))
+
+    return map_permalink
+
 
 def map_doc_permalink(doc, permalink_templates):
     """
@@ -31,8 +123,67 @@ def map_doc_permalink(doc, permalink_templates):
     """
     try:
         path_template = permalink_templates[doc.section]
-        output_path = path_template.format(**read_doc_permalink(doc))
-        output_path = str(PurePath(output_path))
-        return doc._replace(output_path=output_path)
     except KeyError:
-        return doc
\ No newline at end of file
+        return doc
+    output_path = compile_template(path_template)(doc)
+    return doc._replace(output_path=output_path)
+
+
+class OutputCollision(Exception):
+    pass
+
+
+class OutputIndex:
+    """
+    An index of output paths, for catching docs that would be written to
+    the same file. Build it while docs stream past, then call `check`
+    before rendering anything.
+
+    Usage:
+
+        outputs = OutputIndex()
+        docs = outputs.track(docs)
+        ...
+        outputs.check()
+    """
+    def __init__(self):
+        self.paths = {}
+        self.collisions = {}
+
+    def add(self, doc):
+        """
+        Record a doc's output path.
+        """
+        output_path = str(doc.output_path)
+        id_path = str(doc.id_path)
+        existing = self.paths.setdefault(output_path, id_path)
+        if existing != id_path:
+            self.collisions.setdefault(output_path, [existing]).append(id_path)
+
+    def track(self, docs):
+        """
+        Record output paths for docs as they are iterated over.
+        Yields docs unchanged.
+        """
+        for doc in docs:
+            self.add(doc)
+            yield doc
+
+    def check(self):
+        """
+        Raise `OutputCollision` listing every output path that more
+        than one doc would be written to.
+        """
+        if self.collisions:
+            lines = (
+                '"{output_path}" from {id_paths}'.format(
+                    output_path=output_path,
+                    id_paths=", ".join(
+                        '"{}"'.format(id_path) for id_path in id_paths)
+                )
+                for output_path, id_paths in sorted(self.collisions.items())
+            )
+            raise OutputCollision(
+                "Multiple docs have the same output path:\n" +
+                "\n".join(lines)
+            )
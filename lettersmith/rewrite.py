@@ -0,0 +1,124 @@
+"""
+Tools for rewriting tokens in content, like URLs and wikilinks, in a
+single scan.
+
+A rewriter is a regular expression for the tokens it handles, and a
+`render` function that takes a match and returns the replacement
+string. Rewriters are composed into a single regular expression, so
+content is scanned once and produces one output string, no matter how
+many rewriters you add.
+
+Usage:
+
+    rewrite_doc = rewrite.doc_rewriter(
+        absolutize.rewriter(base_url),
+        wikilink.rewriter(stubs, base_url)
+    )
+    docs = (rewrite_doc(doc) for doc in docs)
+"""
+import re
+from collections import namedtuple
+from lettersmith.util import replace
+
+
+Rewriter = namedtuple("Rewriter", ("pattern", "render", "test"))
+Rewriter.__doc__ = """
+A token rewriter.
+
+- `pattern` is a compiled regular expression matching tokens.
+- `render` takes a match for `pattern`, and returns a replacement string.
+- `test` is a cheap check for whether a string might contain tokens,
+  like a substring test. Strings that fail every rewriter's test are
+  returned untouched, without running the regular expression.
+"""
+
+
+def _always(s):
+    return True
+
+
+def rewriter(pattern, render, test=_always):
+    """
+    Create a rewriter from a pattern string and a render function.
+
+    Patterns must not use numbered backreferences, since groups are
+    renumbered when rewriters are composed.
+    """
+    return Rewriter(re.compile(pattern), render, test)
+
+
+def _scanner(rewriters):
+    """
+    Compile rewriters into a single regular expression, and a function
+    that renders its matches.
+    """
+    # Wrap each pattern in a group, and remember which group index
+    # belongs to which rewriter. Since the outer group closes last,
+    # `match.lastindex` is always the index of the outer group.
+    by_group = {}
+    parts = []
+    index = 1
+    for r in rewriters:
+        by_group[index] = r
+        parts.append("(" + r.pattern.pattern + ")")
+        index = index + 1 + r.pattern.groups
+    scanner = re.compile("|".join(parts))
+
+    def render_match(match):
+        r = by_group[match.lastindex]
+        # Re-match the token with the rewriter's own pattern, so its
+        # render function sees the group numbers it expects.
+        return r.render(r.pattern.match(match.group(match.lastindex)))
+
+    return scanner, render_match
+
+
+def compose(*rewriters):
+    """
+    Compose rewriters into a single function that rewrites a string
+    in one scan.
+
+    Only rewriters whose test passes for a string are run over it.
+    Where patterns from different rewriters could match at the same
+    position, rewriters listed first win.
+    """
+    # One scanner per combination of passing tests, compiled on
+    # first use.
+    scanners = {}
+
+    def rewrite_str(s):
+        active = tuple(r for r in rewriters if r.test(s))
+        if not active:
+            return s
+        try:
+            scanner, render_match = scanners[active]
+        except KeyError:
+            scanner, render_match = _scanner(active)
+            scanners[active] = scanner, render_match
+        return scanner.sub(render_match, s)
+
+    return rewrite_str
+
+
+def rewrite_doc(rewrite_str, doc):
+    """
+    Rewrite doc content with `rewrite_str`. Returns the same doc if
+    nothing changed.
+    """
+    content = rewrite_str(doc.content)
+    if content is doc.content:
+        return doc
+    return replace(doc, content=content)
+
+
+def doc_rewriter(*rewriters):
+    """
+    Compose rewriters into a function that rewrites doc content in
+    one scan.
+    """
+    rewrite_str = compose(*rewriters)
+
+    def rewrite(doc):
+        return rewrite_doc(rewrite_str, doc)
+
+    return rewrite
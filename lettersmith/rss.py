@@ -1,16 +1,18 @@
 from pathlib import Path
-from itertools import islice
+from heapq import nlargest
 from datetime import datetime
-from lettersmith.util import sort_by, decorate_group_matching_id_path
-from lettersmith.jinjatools import FileSystemEnvironment
+from operator import attrgetter
+from lettersmith.util import decorate_group_matching_id_path
 from lettersmith.path import to_url, to_slug
+from lettersmith.stringtools import summarize
 from lettersmith import doc as Doc
 
 MODULE_PATH = Path(__file__).parent
 TEMPLATE_PATH = Path(MODULE_PATH, "package_data", "template")
 
 FILTERS = {
-  "to_url": to_url
+  "to_url": to_url,
+  "summary": summarize
 }
 
 def render_rss(stubs,
@@ -24,6 +26,8 @@ def render_rss(stubs,
     "last_build_date": last_build_date,
     "read_more": read_more
   }
+  # Jinja is imported on first render, to keep startup fast.
+  from lettersmith.jinjatools import FileSystemEnvironment
   env = FileSystemEnvironment(
     str(TEMPLATE_PATH),
     context=context,
@@ -36,7 +40,11 @@ def render_rss(stubs,
 
 
 def most_recent(stubs, nitems=24):
-  return islice(sort_by(stubs, "created", reverse=True), nitems)  
+  """
+  Select the `nitems` most recently created stubs, newest first.
+  Streams over `stubs`, keeping only `nitems` in memory at a time.
+  """
+  return nlargest(nitems, stubs, key=attrgetter("created"))
 
 
 @decorate_group_matching_id_path
@@ -2,7 +2,6 @@ from pathlib import Path
 from datetime import datetime
 from itertools import islice
 from lettersmith import doc as Doc
-from lettersmith.jinjatools import FileSystemEnvironment
 from lettersmith.path import to_url
 
 MODULE_PATH = Path(__file__).parent
@@ -17,6 +16,8 @@ def render_sitemap(stubs,
   base_url="/", last_build_date=None,
   title="Feed", description="", author=""):
   context = {"base_url": base_url}
+  # Jinja is imported on first render, to keep startup fast.
+  from lettersmith.jinjatools import FileSystemEnvironment
   env = FileSystemEnvironment(
     str(TEMPLATE_PATH),
     context=context,
@@ -0,0 +1,117 @@
+"""
+Disk-backed sequences for collecting many items without holding them
+all in memory.
+
+A Spool pickles each item to an anonymous temporary file as it is
+appended, and loads it back on access. Only a compact array of file
+offsets is kept in memory. Spools are meant to be used as a low-memory
+stand-in for the tuples we usually collect stubs into.
+
+Usage:
+
+    stubs = Spool(Stub.from_doc(doc) for doc in docs)
+    len(stubs)
+    stubs[0]
+    page = stubs[10:20]
+"""
+import os
+import pickle
+from array import array
+from tempfile import TemporaryFile
+from collections.abc import Sequence, Mapping
+from lettersmith.util import take, get, View
+
+
+class Spool(Sequence):
+    """
+    An append-only, disk-backed sequence.
+
+    Reads and writes use `pread`/`pwrite`, so many views over the same
+    spool may be iterated at once.
+    """
+    def __init__(self, items=(), dir=None):
+        self._file = TemporaryFile(prefix="lettersmith_", suffix=".spool", dir=dir)
+        self._fd = self._file.fileno()
+        # Offsets of record boundaries. Record i spans
+        # `offsets[i]` to `offsets[i + 1]`.
+        self._offsets = array("q", (0,))
+        self.extend(items)
+
+    def append(self, item):
+        data = pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)
+        end = self._offsets[-1]
+        os.pwrite(self._fd, data, end)
+        self._offsets.append(end + len(data))
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def _load(self, i):
+        start = self._offsets[i]
+        data = os.pread(self._fd, self._offsets[i + 1] - start, start)
+        return pickle.loads(data)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return SpoolView(self, range(len(self))[i])
+        if i < 0:
+            i = i + len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError("Spool index out of range")
+        return self._load(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._load(i)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class SpoolView(View):
+    """
+    A lazy view over some of the items in a Spool.
+    `indices` is a sequence of item positions within the spool.
+
+    Spools can't be pickled, so views pickle as a tuple of their items.
+    """
+
+
+@take.register(Spool)
+def take_spool(spool, indices):
+    return SpoolView(spool, array("q", indices))
+
+
+class Index(Mapping):
+    """
+    A read-only mapping from `key` to item, over one or more sequences.
+
+    Only item positions are kept in memory. Items are looked up in their
+    sequence on access, so an Index over Spools stays small.
+    """
+    def __init__(self, key, *sequences):
+        self._sequences = sequences
+        self._positions = {}
+        for n, sequence in enumerate(sequences):
+            for i, item in enumerate(sequence):
+                self._positions[get(item, key)] = (n, i)
+
+    def __getitem__(self, key):
+        n, i = self._positions[key]
+        return self._sequences[n][i]
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self):
+        return len(self._positions)
@@ -1,9 +1,19 @@
 import re
+from html import escape, unescape
+
+
+HTML_TAG = re.compile('<[^<]+?>')
+# Tags whose bodies are not visible text.
+RAW_TEXT_TAG = re.compile(r'<\s*(script|style)\b', re.IGNORECASE)
+RAW_TEXT_END = {
+    "script": re.compile(r'</\s*script\s*>', re.IGNORECASE),
+    "style": re.compile(r'</\s*style\s*>', re.IGNORECASE)
+}
 
 
 def strip_html(html_str):
     """Remove html tags from a string."""
-    return re.sub('<[^<]+?>', '', html_str)
+    return HTML_TAG.sub('', html_str)
 
 
 def truncate(text, max_len=250, suffix="..."):
@@ -16,4 +26,59 @@ def truncate(text, max_len=250, suffix="..."):
         return stripped
     substr = stripped[0:max_len + 1]
     words = " ".join(re.split(r"\s+", substr)[0:-1])
-    return words + suffix
\ No newline at end of file
+    return words + suffix
+
+
+def gen_visible_text(html_str):
+    """
+    Scan an HTML string, yielding chunks of visible text between tags.
+    Skips the bodies of `<script>` and `<style>` tags. Entities are
+    left as-is.
+
+    This is a generator, so you can stop scanning whenever you have
+    enough text.
+    """
+    pos = 0
+    while True:
+        match = HTML_TAG.search(html_str, pos)
+        if match is None:
+            yield html_str[pos:]
+            return
+        yield html_str[pos:match.start()]
+        pos = match.end()
+        raw = RAW_TEXT_TAG.match(match.group(0))
+        if raw and not match.group(0).endswith("/>"):
+            end = RAW_TEXT_END[raw.group(1).lower()].search(html_str, pos)
+            pos = end.end() if end else len(html_str)
+
+
+def summarize(html_str, max_len=250, suffix="..."):
+    """
+    Get a plain text summary of an HTML string, at most `max_len`
+    characters long (plus `suffix`), trimmed to the nearest word
+    boundary. Whitespace is collapsed.
+
+    Entities are decoded while counting, so they are never cut in half,
+    and the summary is escaped again before it is returned. It is safe
+    to render as HTML without further escaping.
+
+    Unlike `truncate(strip_html(s))`, this stops scanning as soon as it
+    has enough visible text, so it only reads the beginning of long
+    documents.
+    """
+    chunks = []
+    seen = 0
+    for chunk in gen_visible_text(html_str):
+        chunk = unescape(chunk)
+        chunks.append(chunk)
+        # Count non-whitespace characters. Collapsed text is always at
+        # least this long, so once we pass max_len we have enough.
+        seen = seen + len("".join(chunk.split()))
+        if seen > max_len + 1:
+            break
+    text = " ".join("".join(chunks).split())
+    if len(text) <= max_len:
+        return escape(text)
+    substr = text[0:max_len + 1]
+    words = " ".join(substr.split(" ")[0:-1])
+    return escape(words + suffix)
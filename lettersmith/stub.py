@@ -1,11 +1,10 @@
 from datetime import datetime
 from pathlib import PurePath
 from collections import namedtuple
-import frontmatter
 from lettersmith.util import replace, get
 from lettersmith import path as pathtools
 from lettersmith.date import EPOCH
-from lettersmith.stringtools import truncate, strip_html
+from lettersmith.stringtools import summarize
 
 Stub = namedtuple("Stub", (
     "id_path", "output_path", "input_path",
@@ -60,7 +59,7 @@ def from_doc(doc, max_len=250, suffix="..."):
     try:
         summary = doc.meta["summary"]
     except KeyError:
-        summary = truncate(strip_html(doc.content), max_len, suffix)
+        summary = summarize(doc.content, max_len, suffix)
 
     return stub(
         id_path=doc.id_path,
@@ -0,0 +1,438 @@
+"""
+A SQLite-backed store for stubs, taxonomy terms and wikilink edges.
+
+The store is persisted between builds and updated incrementally. Only
+stubs that changed since the last build are rewritten, and stubs that
+no longer exist are evicted.
+
+Templates can query the store through the usual `index` global, and the
+`lettersmith.util.where*` and `sort_by` helpers, which are translated
+to SQL when they are given a `StubQuery`.
+
+Usage:
+
+    with StubDB("index.sqlite") as db:
+        db.update(stubs, taxonomies=("tags",))
+        recent = util.sort_by(db.all(), "created", reverse=True)
+"""
+import json
+import pickle
+from pathlib import Path
+from datetime import datetime
+from collections.abc import Mapping
+from lettersmith import util
+from lettersmith.path import to_slug
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stubs (
+    id_path TEXT PRIMARY KEY,
+    output_path TEXT,
+    input_path TEXT,
+    created TEXT,
+    modified TEXT,
+    title TEXT,
+    summary TEXT,
+    section TEXT,
+    slug TEXT,
+    data BLOB
+);
+CREATE INDEX IF NOT EXISTS stubs_output_path ON stubs (output_path);
+CREATE INDEX IF NOT EXISTS stubs_created ON stubs (created);
+CREATE INDEX IF NOT EXISTS stubs_modified ON stubs (modified);
+CREATE INDEX IF NOT EXISTS stubs_title ON stubs (title);
+CREATE INDEX IF NOT EXISTS stubs_section ON stubs (section);
+CREATE INDEX IF NOT EXISTS stubs_slug ON stubs (slug);
+CREATE TABLE IF NOT EXISTS terms (
+    taxonomy TEXT,
+    term TEXT,
+    id_path TEXT
+);
+CREATE INDEX IF NOT EXISTS terms_taxonomy_term ON terms (taxonomy, term);
+CREATE INDEX IF NOT EXISTS terms_id_path ON terms (id_path);
+CREATE TABLE IF NOT EXISTS links (
+    id_path TEXT,
+    slug TEXT
+);
+CREATE INDEX IF NOT EXISTS links_id_path ON links (id_path);
+CREATE INDEX IF NOT EXISTS links_slug ON links (slug);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Stub fields that are stored as indexed columns, and can be queried in SQL.
+# Any other key (e.g. meta keys) is queried in Python.
+COLUMNS = frozenset((
+    "id_path", "output_path", "input_path", "created", "modified",
+    "title", "summary", "section"
+))
+
+_UPSERT = """
+INSERT INTO stubs (
+    id_path, output_path, input_path, created, modified,
+    title, summary, section, slug, data
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id_path) DO UPDATE SET
+    output_path = excluded.output_path,
+    input_path = excluded.input_path,
+    created = excluded.created,
+    modified = excluded.modified,
+    title = excluded.title,
+    summary = excluded.summary,
+    section = excluded.section,
+    slug = excluded.slug,
+    data = excluded.data
+WHERE stubs.data IS NOT excluded.data
+"""
+
+
+def _sql_value(value):
+    """
+    Convert a Python value to the value stored in SQL columns.
+    Datetimes are stored as ISO 8601 strings, so that they sort correctly.
+    """
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _iter_terms(stub, taxonomies):
+    for taxonomy in taxonomies:
+        for term in stub.meta.get(taxonomy, ()):
+            yield taxonomy, str(term)
+
+
+class StubDB:
+    """
+    A SQLite store for stubs. `path` may be a file path, or ":memory:"
+    for a store that only lives as long as this object.
+    """
+    def __init__(self, path=":memory:"):
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        import sqlite3
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript(_SCHEMA)
+        self.id_path = StubTable(self)
+        self.taxonomy = TaxonomyIndex(self)
+
+    def update(self, stubs, taxonomies=()):
+        """
+        Update the store with an iterable of stubs, so that it holds
+        exactly these stubs. Unchanged stubs are left untouched, and
+        stubs that are not in `stubs` are removed.
+
+        If `taxonomies` differs from the last update, the term and link
+        edges of every stub are rebuilt.
+
+        Returns a dict of stats.
+        """
+        connection = self.connection
+        taxonomies = tuple(taxonomies)
+        taxonomies_json = json.dumps(sorted(taxonomies))
+        with connection:
+            row = connection.execute(
+                "SELECT value FROM meta WHERE key = 'taxonomies'").fetchone()
+            rebuild_edges = row is None or row[0] != taxonomies_json
+            connection.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS seen "
+                "(id_path TEXT PRIMARY KEY)")
+            connection.execute("DELETE FROM seen")
+            changed = 0
+            for stub in stubs:
+                connection.execute(
+                    "INSERT OR IGNORE INTO seen VALUES (?)", (stub.id_path,))
+                cursor = connection.execute(_UPSERT, (
+                    stub.id_path,
+                    stub.output_path,
+                    stub.input_path,
+                    _sql_value(stub.created),
+                    _sql_value(stub.modified),
+                    stub.title,
+                    stub.summary,
+                    stub.section,
+                    to_slug(stub.title),
+                    pickle.dumps(stub, protocol=pickle.HIGHEST_PROTOCOL)
+                ))
+                if cursor.rowcount > 0:
+                    changed = changed + 1
+                    self._update_edges(stub, taxonomies)
+                elif rebuild_edges:
+                    self._update_edges(stub, taxonomies)
+            removed = connection.execute(
+                "DELETE FROM stubs WHERE id_path NOT IN "
+                "(SELECT id_path FROM seen)").rowcount
+            connection.execute(
+                "DELETE FROM terms WHERE id_path NOT IN "
+                "(SELECT id_path FROM seen)")
+            connection.execute(
+                "DELETE FROM links WHERE id_path NOT IN "
+                "(SELECT id_path FROM seen)")
+            connection.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('taxonomies', ?)",
+                (taxonomies_json,))
+        return {"changed": changed, "removed": removed}
+
+    def _update_edges(self, stub, taxonomies):
+        connection = self.connection
+        connection.execute(
+            "DELETE FROM terms WHERE id_path = ?", (stub.id_path,))
+        connection.executemany(
+            "INSERT INTO terms VALUES (?, ?, ?)",
+            (
+                (taxonomy, term, stub.id_path)
+                for taxonomy, term in _iter_terms(stub, taxonomies)
+            )
+        )
+        connection.execute(
+            "DELETE FROM links WHERE id_path = ?", (stub.id_path,))
+        connection.executemany(
+            "INSERT INTO links VALUES (?, ?)",
+            (
+                (stub.id_path, slug)
+                for slug in frozenset(stub.meta.get("wikilinks", ()))
+            )
+        )
+
+    def all(self):
+        """
+        Query all stubs.
+        """
+        return StubQuery(self)
+
+    def links(self, id_path):
+        """
+        Query the stubs that the stub at `id_path` links to.
+        """
+        return StubQuery(self).filter(
+            "slug IN (SELECT slug FROM links WHERE id_path = ?)", id_path)
+
+    def backlinks(self, id_path):
+        """
+        Query the stubs that link to the stub at `id_path`.
+        """
+        return StubQuery(self).filter(
+            "id_path IN (SELECT links.id_path FROM links "
+            "JOIN stubs ON links.slug = stubs.slug WHERE stubs.id_path = ?)",
+            id_path
+        )
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class StubQuery:
+    """
+    A lazy query over the stubs in a StubDB.
+
+    Queries are immutable. Filtering and ordering return a new query.
+    The query is run when you iterate over it. `len()` runs a
+    `COUNT` query without loading any stubs.
+
+    Like the tuples in the in-memory index, queries can be indexed and
+    sliced, e.g. `index.taxonomy["tags"]["x"][0]`. Slices return tuples.
+    """
+    def __init__(self, db, clauses=(), params=(), order=()):
+        self.db = db
+        self.clauses = clauses
+        self.params = params
+        self.order = order
+
+    def filter(self, clause, *params):
+        """
+        Return a new query, filtered by a SQL `clause`.
+        """
+        return StubQuery(
+            self.db,
+            clauses=self.clauses + (clause,),
+            params=self.params + params,
+            order=self.order
+        )
+
+    def order_by(self, column, reverse=False):
+        """
+        Return a new query, ordered by `column`. Ties keep the order in
+        which stubs were first added to the store.
+        """
+        if not isinstance(column, str) or column not in COLUMNS:
+            raise ValueError("Cannot order by {}".format(column))
+        direction = "DESC" if reverse else "ASC"
+        return StubQuery(
+            self.db,
+            clauses=self.clauses,
+            params=self.params,
+            order=("{} {}".format(column, direction),)
+        )
+
+    def _where_sql(self):
+        if not self.clauses:
+            return ""
+        return " WHERE " + " AND ".join(
+            "({})".format(clause) for clause in self.clauses)
+
+    def _select(self, limit=-1, offset=0):
+        sql = (
+            "SELECT data FROM stubs{where} ORDER BY {order} "
+            "LIMIT ? OFFSET ?"
+        ).format(
+            where=self._where_sql(),
+            order=", ".join(self.order + ("rowid ASC",))
+        )
+        params = self.params + (limit, offset)
+        for (data,) in self.db.connection.execute(sql, params):
+            yield pickle.loads(data)
+
+    def __iter__(self):
+        return self._select()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return tuple(self)[index]
+            return tuple(self._select(max(stop - start, 0), start))
+        if index < 0:
+            index = index + len(self)
+        if index >= 0:
+            for stub in self._select(1, index):
+                return stub
+        raise IndexError("StubQuery index out of range")
+
+    def __len__(self):
+        sql = "SELECT COUNT(*) FROM stubs" + self._where_sql()
+        (count,) = self.db.connection.execute(sql, self.params).fetchone()
+        return count
+
+
+class StubTable(Mapping):
+    """
+    A read-only mapping of `id_path` to stub, backed by a StubDB.
+    Behaves like the dict `index["id_path"]` in templates.
+    """
+    def __init__(self, db):
+        self.db = db
+
+    def __getitem__(self, id_path):
+        row = self.db.connection.execute(
+            "SELECT data FROM stubs WHERE id_path = ?", (id_path,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(id_path)
+        return pickle.loads(row[0])
+
+    def __iter__(self):
+        cursor = self.db.connection.execute(
+            "SELECT id_path FROM stubs ORDER BY rowid")
+        for (id_path,) in cursor:
+            yield id_path
+
+    def __len__(self):
+        return len(self.db.all())
+
+    def values(self):
+        return self.db.all()
+
+
+class TaxonomyIndex(Mapping):
+    """
+    A read-only mapping of taxonomy to `TermIndex`, backed by a StubDB.
+    Behaves like the dict `index["taxonomy"]` in templates.
+    """
+    def __init__(self, db):
+        self.db = db
+
+    def __getitem__(self, taxonomy):
+        row = self.db.connection.execute(
+            "SELECT 1 FROM terms WHERE taxonomy = ? LIMIT 1", (taxonomy,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(taxonomy)
+        return TermIndex(self.db, taxonomy)
+
+    def __iter__(self):
+        cursor = self.db.connection.execute(
+            "SELECT DISTINCT taxonomy FROM terms ORDER BY taxonomy")
+        for (taxonomy,) in cursor:
+            yield taxonomy
+
+    def __len__(self):
+        (count,) = self.db.connection.execute(
+            "SELECT COUNT(DISTINCT taxonomy) FROM terms").fetchone()
+        return count
+
+
+class TermIndex(Mapping):
+    """
+    A read-only mapping of term to a `StubQuery` of stubs with that term,
+    newest first, like `taxonomy.index_by_taxonomy`.
+    """
+    def __init__(self, db, taxonomy):
+        self.db = db
+        self.taxonomy = taxonomy
+
+    def __getitem__(self, term):
+        query = StubQuery(self.db).filter(
+            "id_path IN "
+            "(SELECT id_path FROM terms WHERE taxonomy = ? AND term = ?)",
+            self.taxonomy, str(term)
+        ).order_by("created", reverse=True)
+        if not query:
+            raise KeyError(term)
+        return query
+
+    def __iter__(self):
+        cursor = self.db.connection.execute(
+            "SELECT DISTINCT term FROM terms WHERE taxonomy = ? ORDER BY term",
+            (self.taxonomy,)
+        )
+        for (term,) in cursor:
+            yield term
+
+    def __len__(self):
+        (count,) = self.db.connection.execute(
+            "SELECT COUNT(DISTINCT term) FROM terms WHERE taxonomy = ?",
+            (self.taxonomy,)
+        ).fetchone()
+        return count
+
+
+def _registers_sql_where(where, operator):
+    """
+    Register a SQL implementation of a `util.where*` function for
+    StubQuery. Keys that are not indexed columns fall back to filtering
+    in Python.
+    """
+    fallback = where.dispatch(object)
+    @where.register(StubQuery)
+    def where_query(query, key, value):
+        # Key paths (e.g. `("meta", "tags")`) are never columns.
+        if isinstance(key, str) and key in COLUMNS:
+            return query.filter(
+                "{} {} ?".format(key, operator), _sql_value(value))
+        return fallback(query, key, value)
+    return where_query
+
+
+_registers_sql_where(util.where, "IS")
+_registers_sql_where(util.where_not, "IS NOT")
+_registers_sql_where(util.where_gt, ">")
+_registers_sql_where(util.where_lt, "<")
+_registers_sql_where(util.where_matches, "GLOB")
+
+
+@util.sort_by.register(StubQuery)
+def sort_by_query(query, key, default=None, reverse=False):
+    if isinstance(key, str) and key in COLUMNS:
+        return query.order_by(key, reverse=reverse)
+    return util.sort_by.dispatch(object)(
+        query, key, default=default, reverse=reverse)
@@ -1,15 +1,19 @@
 """
 Tools for indexing docs by tag (taxonomy).
 """
+from collections.abc import Sequence
 from lettersmith import util
 from datetime import datetime
 from lettersmith import path as pathtools
+from lettersmith import paging
+from lettersmith.util import replace
 from lettersmith.doc import doc
 
 
 _EMPTY_TUPLE = tuple()
 DEFAULT_TAXONOMIES = ("tags",)
 ARCHIVE_PATH_TEMPLATE = "{taxonomy}/{term}/all/index.html"
+PAGED_ARCHIVE_PATH_TEMPLATE = "{taxonomy}/{term}/page/{n}/index.html"
 
 
 def items_with_keys(d, keys):
@@ -21,41 +25,90 @@ def items_with_keys(d, keys):
             yield key, value
 
 
-def gen_taxonomy_archives(stubs,
-    output_path_template=None,
-    taxonomies=None, templates=_EMPTY_TUPLE):
+def gen_archives_from_index(tax_index,
+    output_path_template=None, templates=_EMPTY_TUPLE,
+    per_page=None, base_url="/", now=None):
     """
-    Creates a full archive page for each taxonomy term. One page per term.
+    Creates archive pages for each term in a taxonomy index, like the one
+    returned by `index_by_taxonomy`.
+
+    If `per_page` is set, each term gets paged archives, generated with
+    `lettersmith.paging`. Otherwise each term gets one page listing all
+    of its stubs. `output_path_template` may use `{taxonomy}`, `{term}`
+    and, for paged archives, `{n}`.
     """
-    output_path_template = output_path_template or ARCHIVE_PATH_TEMPLATE
-    tax_index = index_by_taxonomy(stubs, taxonomies)
+    if output_path_template is None:
+        output_path_template = (
+            ARCHIVE_PATH_TEMPLATE if per_page is None
+            else PAGED_ARCHIVE_PATH_TEMPLATE
+        )
+    now = now if now is not None else datetime.now()
     for taxonomy, terms in tax_index.items():
+        tax_templates = templates + (
+            "taxonomy/{}/all.html".format(taxonomy),
+            "taxonomy/{}/list.html".format(taxonomy),
+            "taxonomy/all.html",
+            "taxonomy/list.html",
+            "list.html",
+            "default.html"
+        )
         for term, stubs in terms.items():
             output_path = output_path_template.format(
                 taxonomy=pathtools.to_slug(taxonomy),
-                term=pathtools.to_slug(term)
-            )
-            tax_templates = (
-                "taxonomy/{}/all.html".format(taxonomy),
-                "taxonomy/{}/list.html".format(taxonomy),
-                "taxonomy/all.html",
-                "taxonomy/list.html",
-                "list.html"
-            )
-            meta = {"stubs": stubs}
-            yield doc(
-                id_path=output_path,
-                output_path=output_path,
-                created=datetime.now(),
-                modified=datetime.now(),
-                title=term,
-                section=taxonomy,
-                templates=templates + tax_templates,
-                meta=meta
+                term=pathtools.to_slug(term),
+                n="{n}"
             )
+            meta = {
+                "taxonomy": taxonomy,
+                "term": term,
+                "count": len(stubs)
+            }
+            if per_page is None:
+                yield doc(
+                    id_path=output_path,
+                    output_path=output_path,
+                    created=now,
+                    modified=now,
+                    title=term,
+                    section=taxonomy,
+                    templates=tax_templates,
+                    meta=replace(meta, stubs=stubs)
+                )
+            else:
+                pages = paging.gen_paging.inner(
+                    stubs,
+                    output_path_template=output_path,
+                    per_page=per_page,
+                    base_url=base_url
+                )
+                for page in pages:
+                    yield page._replace(
+                        created=now,
+                        modified=now,
+                        title=term,
+                        section=taxonomy,
+                        templates=tax_templates,
+                        meta=replace(page.meta, stubs=stubs, **meta)
+                    )
+
+
+def gen_taxonomy_archives(stubs,
+    output_path_template=None,
+    taxonomies=None, templates=_EMPTY_TUPLE, per_page=None):
+    """
+    Creates a full archive page for each taxonomy term. One page per term,
+    or several if `per_page` is set.
+    """
+    tax_index = index_by_taxonomy(stubs, taxonomies)
+    return gen_archives_from_index(
+        tax_index,
+        output_path_template=output_path_template,
+        templates=templates,
+        per_page=per_page
+    )
 
 
-def index_by_taxonomy(stubs, taxonomies=None):
+def index_by_taxonomy(stubs, taxonomies=None, key="created", reverse=True):
     """
     Create a new index by taxonomy.
     `taxonomies` is an indexable whitelist of meta keys that should
@@ -65,19 +118,57 @@ def index_by_taxonomy(stubs, taxonomies=None):
 
         {
             "tags": {
-                "term_a": [stub, ...],
-                "term_b": [stub, ...]
+                "term_a": (stub, ...),
+                "term_b": (stub, ...)
             }
         }
+
+    Stubs for each term are sorted by `key` (a key path, like in
+    `util.sort_by`), newest first by default, so templates don't need
+    to sort them.
+
+    The index is built in a single pass over `stubs`. Terms are indexed
+    by position and collected with `util.take`, so if `stubs` is a
+    disk-backed sequence, the index holds lazy views rather than stubs.
     """
     taxonomies = taxonomies or DEFAULT_TAXONOMIES
-    tax_index = {}
-    for stub in stubs:
+    stubs = stubs if isinstance(stubs, Sequence) else tuple(stubs)
+    positions = {}
+    sort_keys = []
+    for i, stub in enumerate(stubs):
+        sort_keys.append(util.get_deep(stub, key))
         for tax, terms in items_with_keys(stub.meta, taxonomies):
-            if not tax_index.get(tax):
-                tax_index[tax] = {}
+            if not positions.get(tax):
+                positions[tax] = {}
             for term in terms:
-                if not tax_index[tax].get(term):
-                    tax_index[tax][term] = []
-                tax_index[tax][term].append(stub)
-    return tax_index
\ No newline at end of file
+                if not positions[tax].get(term):
+                    positions[tax][term] = []
+                positions[tax][term].append(i)
+    return {
+        tax: {
+            term: util.take(stubs, sorted(
+                indices, key=sort_keys.__getitem__, reverse=reverse))
+            for term, indices in terms.items()
+        }
+        for tax, terms in positions.items()
+    }
+
+
+def count_terms(tax_index):
+    """
+    Count stubs for each term in a taxonomy index, without reading the
+    stubs themselves.
+
+    Returns a dict that looks like:
+
+        {
+            "tags": {
+                "term_a": 12,
+                "term_b": 3
+            }
+        }
+    """
+    return {
+        tax: {term: len(stubs) for term, stubs in terms.items()}
+        for tax, terms in tax_index.items()
+    }
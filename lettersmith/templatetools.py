@@ -1,4 +1,7 @@
+import os
+from os import path
 from pathlib import PurePath
+from functools import lru_cache
 
 from lettersmith import path as pathtools
 from lettersmith.util import replace
@@ -7,16 +10,10 @@ from lettersmith.util import replace
 SECTION_TEMPLATE = "section/{section}/{basename}"
 
 
-def read_affiliated_templates(pathlike):
-    """
-    Return a tuple of templates that are related to the given the path.
-    Typically used for files read from FS.
-    """
-    purepath = PurePath(pathlike)
-    name = purepath.stem
-    section = pathtools.tld(purepath)
+@lru_cache(maxsize=None)
+def _affiliated_templates(section, is_index):
     templates = []
-    single_basename = "index.html" if name == "index" else "single.html"
+    single_basename = "index.html" if is_index else "single.html"
 
     if section != "":
         templates.append(SECTION_TEMPLATE.format(
@@ -29,7 +26,43 @@ def read_affiliated_templates(pathlike):
     templates.append(single_basename)
     templates.append("default.html")
 
-    return templates
+    return tuple(templates)
+
+
+def read_affiliated_templates(pathlike):
+    """
+    Return a tuple of templates that are related to the given the path.
+    Typically used for files read from FS.
+    """
+    purepath = PurePath(pathlike)
+    return list(_affiliated_templates(
+        pathtools.tld(purepath),
+        purepath.stem == "index"
+    ))
+
+
+def _is_index(id_path):
+    return path.splitext(path.basename(id_path))[0] == "index"
+
+
+@lru_cache(maxsize=None)
+def _candidates(custom_template, section, is_index, templates):
+    candidates = () if custom_template is None else (custom_template,)
+    return candidates + _affiliated_templates(section, is_index) + templates
+
+
+def _read_candidates(doc):
+    """
+    Read the candidate templates for a doc. Candidates only depend on
+    the custom template, section, and whether the doc is an index, so
+    they are memoized on those keys.
+    """
+    return _candidates(
+        doc.meta.get("template"),
+        doc.section,
+        _is_index(doc.id_path),
+        tuple(doc.templates)
+    )
 
 
 def add_templates(doc):
@@ -40,21 +73,73 @@ def add_templates(doc):
     - Allows you to add additional templates via `templates` kwarg.
     - Reads affiliated "smart" templates based on doc info
     """
-    templates = []
-    try:
-        custom_template = doc.meta["template"]
-        templates.insert(0, custom_template)
-    except KeyError:
-        pass
-
-    # Add some "affiliated" implicit templates... these are templates that
-    # are associated with doc attributes.
-    affiliated_templates = read_affiliated_templates(doc.id_path)
-    templates.extend(affiliated_templates)
-
-    # Carry over any existing templates
-    try:
-        templates.extend(doc.templates)
-    except KeyError:
-        pass
-    return replace(doc, templates=tuple(templates))
\ No newline at end of file
+    return replace(doc, templates=_read_candidates(doc))
+
+
+# Extensions of files in a theme that are templates. Anything else, and
+# anything under "static/", is copied, not rendered.
+TEMPLATE_EXT = (
+    ".html", ".htm", ".xml", ".rss", ".atom", ".txt", ".json",
+    ".j2", ".jinja", ".jinja2"
+)
+
+
+def is_template(name):
+    """
+    Check if a file name in a theme is a template.
+    """
+    return (
+        not name.startswith("static/") and
+        path.splitext(name)[1].lower() in TEMPLATE_EXT
+    )
+
+
+def list_templates(templates_path):
+    """
+    List the names of all templates in a theme directory, as a set of
+    paths relative to the directory, using "/" separators (the same
+    names Jinja uses). See `is_template`.
+    """
+    names = set()
+    for dir_path, dir_names, file_names in os.walk(str(templates_path)):
+        rel_dir = path.relpath(dir_path, str(templates_path))
+        for file_name in file_names:
+            name = file_name if rel_dir == "." else path.join(rel_dir, file_name)
+            name = name.replace(path.sep, "/")
+            if is_template(name):
+                names.add(name)
+    return names
+
+
+def _normalize_name(template):
+    # Jinja ignores empty and "." segments in template names.
+    return "/".join(
+        part for part in str(template).split("/")
+        if part and part != "."
+    )
+
+
+def template_resolver(templates_path):
+    """
+    Create a function like `add_templates` that resolves candidates
+    against the templates in `templates_path`, so each doc carries the
+    single template that exists, rather than a list of candidates to
+    probe at render time.
+
+    The theme directory is listed once, when the resolver is created.
+    Docs with no existing candidate keep the whole list, so rendering
+    reports the missing templates as usual.
+    """
+    existing = list_templates(templates_path)
+
+    @lru_cache(maxsize=None)
+    def resolve(candidates):
+        for template in candidates:
+            if _normalize_name(template) in existing:
+                return (template,)
+        return candidates
+
+    def resolve_templates(doc):
+        return replace(doc, templates=resolve(_read_candidates(doc)))
+
+    return resolve_templates
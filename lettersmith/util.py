@@ -4,6 +4,7 @@ Mostly tools for working with dictionaries and iterables.
 """
 from functools import reduce, singledispatch, wraps, partial
 from fnmatch import fnmatch
+from collections.abc import Sequence
 
 
 def id(x):
@@ -127,13 +128,137 @@ def maps_if(predicate):
     return wrap
 
 
+@singledispatch
+def take(sequence, indices):
+    """
+    Take the items at `indices` from a sequence.
+    This is a singledispatch function, so that disk-backed sequences
+    can return a lazy view instead of a tuple.
+    """
+    return tuple(sequence[i] for i in indices)
+
+
+class View(Sequence):
+    """
+    A lazy view over some of the items in a sequence.
+    `indices` is a sequence of item positions, like a `range`.
+
+    Views let many collections share one underlying sequence, without
+    copying references to its items.
+    """
+    def __init__(self, sequence, indices):
+        self._sequence = sequence
+        self._indices = indices
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return type(self)(self._sequence, self._indices[i])
+        return self._sequence[self._indices[i]]
+
+    def __iter__(self):
+        for i in self._indices:
+            yield self._sequence[i]
+
+    def __reduce__(self):
+        # Pickle as a tuple of items, rather than pickling the whole
+        # underlying sequence.
+        return (tuple, (tuple(self),))
+
+
+def view(sequence, start, stop):
+    """
+    Get a lazy view of `sequence[start:stop]`.
+    """
+    return View(sequence, range(len(sequence))[start:stop])
+
+
+def key_getter(key, default=None):
+    """
+    Compile a key path into a function that gets its value, like
+    `get_deep`, but splitting the key path only once.
+    """
+    keys = key.split(".") if type(key) is str else tuple(key)
+    def get_key(x):
+        for k in keys:
+            x = get(x, k)
+            if x == None:
+                return default
+        return x
+    return get_key
+
+
+def sorter(items):
+    """
+    Create a function that sorts a sequence of `items` by a key path.
+
+    Each sort is done once per `(key, reverse)` and remembered, so
+    groups that share a sort order share one sorted sequence. Sorting
+    is done on positions, and the result is collected with `take`, so
+    disk-backed sequences are sorted without loading them into memory.
+    Ties keep their original order. Items without a value for `key`
+    come last, in either direction.
+
+    Usage:
+
+        sort = sorter(stubs)
+        sort("created", reverse=True)
+    """
+    cache = {}
+    def sort(key, reverse=False):
+        cache_key = (
+            key if type(key) is str else tuple(key),
+            bool(reverse)
+        )
+        try:
+            return cache[cache_key]
+        except KeyError:
+            pass
+        get_key = key_getter(key)
+        keys = [get_key(item) for item in items]
+        # Set aside items with missing values, and append them after the
+        # sorted items, so they come last in either direction.
+        present = [i for i, value in enumerate(keys) if value is not None]
+        missing = [i for i, value in enumerate(keys) if value is None]
+        # Python's sort is stable, even in reverse.
+        order = sorted(
+            present, key=keys.__getitem__, reverse=bool(reverse))
+        sorted_items = take(items, order + missing)
+        cache[cache_key] = sorted_items
+        return sorted_items
+    return sort
+
+
 def decorate_group_matching(predicate):
+    """
+    Decorate a function so it is called once per group of matching items.
+
+    `collect` controls how the matches for each group are collected
+    before being passed to the function. Defaults to `tuple`.
+
+    Groups may have a `sort_by` key path and `reverse` flag, to sort
+    matches before they are collected. Sorts are shared between groups.
+    You can also pass in a `sort` function created with `sorter`, to
+    share sorts across calls.
+    """
     def decorate_f(f):
-        def f_match_group(iter, groups, defaults={}):
-            items = tuple(iter)
+        def f_match_group(iter, groups, defaults={}, collect=tuple,
+            sort=None):
+            items = iter if isinstance(iter, Sequence) else tuple(iter)
+            sort = sort if sort is not None else sorter(items)
             for pattern, kwargs in groups.items():
-                matches = tuple(item for item in items if predicate(item, pattern))
-                yield f(matches, **replace(defaults, **kwargs))
+                kwargs = replace(defaults, **kwargs)
+                sort_by = kwargs.pop("sort_by", None)
+                reverse = kwargs.pop("reverse", False)
+                group_items = (
+                    sort(sort_by, reverse) if sort_by is not None
+                    else items
+                )
+                matches = collect(
+                    item for item in group_items if predicate(item, pattern))
+                yield f(matches, **kwargs)
         f_match_group.inner = f
         return f_match_group
     return decorate_f
@@ -181,12 +306,15 @@ def _compare_where(compare):
     """
     Query an iterable of dictionaries for keys matching value.
     `key` may be an iterable of keys representing a key path.
+
+    The resulting function is a singledispatch function, so that
+    queryable collections (like `lettersmith.stubdb.StubQuery`) can
+    provide their own implementation.
     """
+    @singledispatch
     @wraps(compare)
     def where(dicts, key, value):
-        for x in dicts:
-            if compare(get_deep(x, key), value):
-                yield x
+        return (x for x in dicts if compare(get_deep(x, key), value))
     return where
 
 
@@ -263,8 +391,13 @@ def lift_iter(f):
     return f_iter
 
 
+@singledispatch
 def sort_by(dicts_iter, key, default=None, reverse=False):
-    """Sort an iterable of dicts via a key path"""
+    """
+    Sort an iterable of dicts via a key path.
+    This is a singledispatch function, so that queryable collections
+    can provide their own implementation.
+    """
     fkey = lambda x: get_deep(x, key, default=default)
     return sorted(dicts_iter, key=fkey, reverse=reverse)
 
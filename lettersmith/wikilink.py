@@ -13,6 +13,7 @@ from pathlib import PurePath
 from os import path
 from collections import namedtuple
 from lettersmith import doc as Doc
+from lettersmith import rewrite
 from lettersmith.path import to_slug, to_url
 from lettersmith.util import replace, get
 
@@ -72,30 +73,41 @@ def find_wikilinks(s):
         yield parse_wikilink(match.group(0))
 
 
+def has_wikilinks(s):
+    """
+    Quick check for wikilinks in a string.
+    """
+    return "[[" in s
+
+
 def _render_strip_wikilink(match):
     slug, text = parse_wikilink(match.group(0))
     return text
 
 
+# A rewriter that replaces wikilinks with their plaintext equivalent.
+STRIP_REWRITER = rewrite.rewriter(
+    WIKILINK, _render_strip_wikilink, has_wikilinks)
+
+_strip_wikilinks = rewrite.compose(STRIP_REWRITER)
+
+
 def strip_wikilinks(s):
     """
     Find all wikilinks in a string (if any)
     and strips them, replacing them with their plaintext equivalent.
     """
-    return re.sub(WIKILINK, _render_strip_wikilink, s)
+    return _strip_wikilinks(s)
 
 
-def doc_renderer(stubs,
+def rewriter(stubs,
     base_url="",
     link_template=LINK_TEMPLATE, nolink_template=NOLINK_TEMPLATE):
     """
-    Given a tuple of stubs, returns a doc rendering function that will
-    render all `[[wikilinks]]` to HTML links.
+    Given a tuple of stubs, returns a rewriter that renders
+    `[[wikilinks]]` to HTML links, for use with `lettersmith.rewrite`.
 
-    `[[wikilink]]` is replaced with a link to a stub with the same title
-    (case insensitive), using the `link_template`.
-    If no stub exists with that title it will be rendered
-    using `nolink_template`.
+    See `doc_renderer` for details.
     """
     slug_to_url = _index_slug_to_url(stubs, base_url)
     def render_inner_match(match):
@@ -106,22 +118,27 @@ def doc_renderer(stubs,
         except KeyError:
             return nolink_template.format(text=text)
 
-    def render_doc(doc):
-        """
-        Render a doc's wikilinks to HTML links.
-
-        If a `[[wikilink]]` exists in the index, it will be rendered as an
-        HTML link. However, if it doesn't exist, it will be rendered
-        using `nolink_template`.
-        """
-        content = re.sub(
-            WIKILINK,
-            render_inner_match,
-            doc.content
-        )
-        return replace(doc, content=content)
+    return rewrite.rewriter(WIKILINK, render_inner_match, has_wikilinks)
+
+
+def doc_renderer(stubs,
+    base_url="",
+    link_template=LINK_TEMPLATE, nolink_template=NOLINK_TEMPLATE):
+    """
+    Given a tuple of stubs, returns a doc rendering function that will
+    render all `[[wikilinks]]` to HTML links.
 
-    return render_doc
+    `[[wikilink]]` is replaced with a link to a stub with the same title
+    (case insensitive), using the `link_template`.
+    If no stub exists with that title it will be rendered
+    using `nolink_template`.
+    """
+    return rewrite.doc_rewriter(rewriter(
+        stubs,
+        base_url=base_url,
+        link_template=link_template,
+        nolink_template=nolink_template
+    ))
 
 
 def strip_doc_wikilinks(doc):
@@ -129,8 +146,7 @@ def strip_doc_wikilinks(doc):
     Strip wikilinks from doc content field.
     Useful for making stubs with a clean summary.
     """
-    content = strip_wikilinks(doc.content)
-    return replace(doc, content=content)
+    return rewrite.rewrite_doc(_strip_wikilinks, doc)
 
 
 def uplift_wikilinks(doc):
@@ -142,19 +158,31 @@ def uplift_wikilinks(doc):
     return Doc.replace_meta(doc, wikilinks=slugs)
 
 
-def _index_backlinks(slug_index):
+def find_line_wikilinks(lines):
     """
-    Index all backlinks in an iterable of docs. This assumes you have
+    Find all wikilinks in an iterable of lines, a line at a time, so
+    that the whole text is never held in memory.
+    Returns an iterator of 2-tuples for slug, title.
+    """
+    for line in lines:
+        yield from find_wikilinks(line)
+
+
+def _index_backlinks(stubs, slug_index):
+    """
+    Index all backlinks in an iterable of stubs. This assumes you have
     already uplifted wikilinks from content with `uplift_wikilinks`.
+
+    Returns a dict of `id_path` to a list of `Link`s.
     """
     backlink_index = {}
-    for stub in slug_index.values():
-        for slug in frozenset(stub.meta["wikilinks"]):
+    for stub in stubs:
+        for slug in dict.fromkeys(stub.meta["wikilinks"]):
             try:
                 id_path = slug_index[slug].id_path
                 if id_path not in backlink_index:
                     backlink_index[id_path] = []
-                backlink_index[id_path].append(stub)
+                backlink_index[id_path].append(link_from_stub(stub))
             except KeyError:
                 pass
     return backlink_index
@@ -165,23 +193,24 @@ def collate_links(stubs):
     Annotate stubs with links and backlinks. This assumes your stubs
     have uplifted wikilinks to meta with `uplift_wikilinks`.
 
+    `stubs` must be re-iterable (e.g. a tuple or a Spool). Only `Link`s
+    are held in memory while indexing, not whole stubs.
+
     Returns an iterator for new stubs.
     Meta will have 2 new fields: `links` and `backlinks`, each containing
     a tuple of `Link` namedtuples.
     """
     slug_index = {
-        to_slug(stub.title): stub
+        to_slug(stub.title): link_from_stub(stub)
         for stub in stubs
     }
-    backlink_index = _index_backlinks(slug_index)
+    backlink_index = _index_backlinks(stubs, slug_index)
     for stub in stubs:
-        backlinks = tuple(
-            link_from_stub(backlink_stub)
-            for backlink_stub in backlink_index.get(stub.id_path, tuple())
-        )
-        slugs = frozenset(stub.meta["wikilinks"])
+        backlinks = tuple(backlink_index.get(stub.id_path, tuple()))
+        # Dedupe slugs, keeping their order, so output is deterministic.
+        slugs = dict.fromkeys(stub.meta["wikilinks"])
         links = tuple(
-            link_from_stub(slug_index[slug])
+            slug_index[slug]
             for slug in slugs
             if slug in slug_index
         )
@@ -192,4 +221,4 @@ def collate_links(stubs):
                 links=links,
                 backlinks=backlinks
             )
-        )
\ No newline at end of file
+        )
@@ -1,15 +1,162 @@
-import yaml
-import frontmatter
+"""
+Tools for parsing YAML and YAML frontmatter.
 
+All YAML in Lettersmith is parsed through this module. We use the
+libyaml-backed `CSafeLoader` when PyYAML was built with it, falling back
+to the pure-Python `SafeLoader` otherwise.
 
-ParserError = yaml.parser.ParserError
-ScannerError = yaml.scanner.ScannerError
+PyYAML is imported the first time YAML is parsed, so scripts that never
+parse YAML don't pay for it at startup.
+"""
+import re
+from copy import deepcopy
+from functools import lru_cache
+from lettersmith.hash import hash_digest
+
+
+@lru_cache(maxsize=None)
+def get_loader():
+    """
+    Get the fastest available safe YAML loader class.
+    """
+    import yaml
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def __getattr__(name):
+    # `Loader`, `ParserError` and `ScannerError` are resolved lazily,
+    # so importing this module doesn't import PyYAML.
+    if name == "Loader":
+        return get_loader()
+    if name == "ParserError":
+        import yaml
+        return yaml.parser.ParserError
+    if name == "ScannerError":
+        import yaml
+        return yaml.scanner.ScannerError
+    raise AttributeError(
+        "module {!r} has no attribute {!r}".format(__name__, name))
+
+
+FRONTMATTER_FENCE = re.compile(r"^-{3,}\s*$", re.MULTILINE)
+
+
+def loads(s):
+    """
+    Parse a YAML string or open file to python data.
+    """
+    import yaml
+    return yaml.load(s, Loader=get_loader())
+
+
+def load(file_path):
+    """
+    Given a file path, read the file contents and parse YAML to
+    python dict. Returns a python dict.
+    """
+    with open(file_path, "r") as f:
+        return loads(f.read())
+    return {}
+
+
+def split_frontmatter(text):
+    """
+    Split text into a tuple of `(frontmatter, content)` strings.
+
+    Frontmatter is a block fenced by `---` lines at the very beginning
+    of the text. If there is no frontmatter, returns an empty string for
+    frontmatter, and the (stripped) text as content.
+    """
+    text = text.strip()
+    if not FRONTMATTER_FENCE.match(text):
+        return "", text
+    parts = FRONTMATTER_FENCE.split(text, 2)
+    if len(parts) < 3:
+        return "", text
+    _, frontmatter, content = parts
+    return frontmatter, content.strip()
+
+
+def split_head(f, peek_size=4096):
+    """
+    Read the frontmatter block and the first `peek_size` characters of
+    the body from an open text file, without reading the rest of it.
+
+    Returns a tuple of `(frontmatter, body)` strings, as they were read,
+    fences and whitespace included. The file is left positioned just
+    after the body text that was read.
+    """
+    lines = []
+    line = f.readline()
+    # Skip leading blank lines, like `split_frontmatter` does.
+    while line and not line.strip():
+        lines.append(line)
+        line = f.readline()
+    if not FRONTMATTER_FENCE.match(line):
+        return "".join(lines), line + f.read(peek_size)
+    lines.append(line)
+    line = f.readline()
+    while line:
+        lines.append(line)
+        if FRONTMATTER_FENCE.match(line):
+            break
+        line = f.readline()
+    return "".join(lines), f.read(peek_size)
+
+
+def read_frontmatter_head(f, peek_size=4096):
+    """
+    Read the frontmatter block and the first `peek_size` characters of
+    the body from an open text file, without reading the rest of it.
+
+    Returns the text that was read. It can be parsed with
+    `parse_frontmatter`, just like the whole file.
+    """
+    return "".join(split_head(f, peek_size))
+
+
+# Parsed frontmatter, keyed by a hash of the frontmatter string.
+_frontmatter_cache = {}
+FRONTMATTER_CACHE_SIZE = 1024
+
+
+def _loads_frontmatter(frontmatter):
+    digest = hash_digest(frontmatter)
+    try:
+        return _frontmatter_cache[digest]
+    except KeyError:
+        pass
+    meta = loads(frontmatter)
+    meta = meta if isinstance(meta, dict) else {}
+    if len(_frontmatter_cache) >= FRONTMATTER_CACHE_SIZE:
+        # Evict the oldest entry. Dicts keep insertion order.
+        del _frontmatter_cache[next(iter(_frontmatter_cache))]
+    _frontmatter_cache[digest] = meta
+    return meta
+
+
+def parse_frontmatter(text):
+    """
+    Parse a string with YAML frontmatter.
+    Returns a tuple of `(meta, content)`, where `meta` is always a dict.
+
+    Parsed frontmatter is cached by content hash, so docs that share
+    frontmatter are only parsed once.
+    """
+    frontmatter, content = split_frontmatter(text)
+    if not frontmatter.strip():
+        return {}, content
+    # Copy deeply, so that callers can't mutate the cached value, or any
+    # lists and dicts nested in it.
+    return deepcopy(_loads_frontmatter(frontmatter)), content
 
 
 def load_frontmatter(pathlike):
+    from yaml.parser import ParserError
+    from yaml.scanner import ScannerError
     with open(str(pathlike)) as f:
         try:
-            meta, content = frontmatter.parse(f.read())
+            meta, content = parse_frontmatter(f.read())
             return meta, content
         # Raise a more descriptive errors
         except ParserError as error:
@@ -20,16 +167,3 @@ def load_frontmatter(pathlike):
             raise ScannerError(
                 'Error scanning "{}"'.format(pathlike)
             ) from error
-
-
-def load(file_path):
-    """
-    Given a file path, read the file contents and parse YAML to
-    python dict. Returns a python dict.
-    """
-    with open(file_path, "r") as f:
-        return yaml.load(f.read())
-    return {}
-
-
-loads = yaml.load
\ No newline at end of file
@@ -16,23 +16,26 @@ setup(
     classifiers=[
         "Development Status :: 3 - Alpha",
         "Intended Audience :: Developers",
-        "Programming Language :: Python :: 3.6",
+        "Programming Language :: Python :: 3.7",
     ],
+    python_requires=">=3.7",
     packages=find_packages(exclude=("tests", "tests.*")),
     install_requires=[
         "PyYAML",
         "py-gfm>=0.1.3",
-        "python-frontmatter>=0.3.1",
         "Jinja2>=2.7",
         # TODO
         # "watchdog>=0.6.0"
     ],
-    extras_require={},
+    extras_require={
+        "msgpack": ["msgpack>=1.0"]
+    },
     include_package_data=True,
     entry_points={
         "console_scripts": [
             "lettersmith_site=lettersmith.bin.site:main",
             "lettersmith_scaffold=lettersmith.bin.scaffold:main",
+            "lettersmith_compile_theme=lettersmith.bin.compile_theme:main",
         ]
     }
 )
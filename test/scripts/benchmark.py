@@ -0,0 +1,595 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for Lettersmith's hot paths.
+
+Each benchmark compares a baseline implementation against the one
+Lettersmith uses, on generated fixtures.
+
+Usage:
+
+    python test/scripts/benchmark.py yaml
+    python test/scripts/benchmark.py all -n 1000
+"""
+import re
+import random
+import pickle
+import argparse
+import timeit
+import yaml
+from generate_fixtures import gen_text, gen_docs
+from lettersmith import yamltools
+from lettersmith import doc as Doc
+from lettersmith import stub as Stub
+from lettersmith import codec
+from lettersmith import absolutize
+from lettersmith import path as pathtools
+from lettersmith import stringtools
+from lettersmith import date
+from lettersmith import permalink
+from lettersmith import templatetools
+from lettersmith import jinjatools
+from lettersmith.util import replace
+from jinja2 import Environment, FileSystemLoader
+from tempfile import TemporaryDirectory
+from pathlib import PurePath, Path
+from datetime import datetime
+from lettersmith.markdowntools import house_markdown
+
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """
+    Register a benchmark function under `name`.
+    """
+    def register(f):
+        BENCHMARKS[name] = f
+        return f
+    return register
+
+
+def measure(label, f, items, number=1):
+    """
+    Time `f`, printing the best of 3 runs, total and per item.
+    Returns the best time in seconds.
+    """
+    best = min(timeit.repeat(f, number=number, repeat=3)) / number
+    print("  {label:<44} {ms:>10.1f}ms {us:>10.1f}us/item".format(
+        label=label,
+        ms=best * 1e3,
+        us=best / items * 1e6
+    ))
+    return best
+
+
+def compare(name, baseline, optimized):
+    print("  {name}: {speedup:.1f}x faster".format(
+        name=name,
+        speedup=baseline / optimized
+    ))
+
+
+FRONTMATTER_TEMPLATE = """---
+title: "Test Doc {i}"
+created: 2018-01-{day:02d}
+modified: 2018-02-{day:02d}
+summary: "A summary of test doc {i}, with some words in it."
+tags:
+- {tag_a}
+- {tag_b}
+author:
+  name: "Some Author"
+  url: "https://example.com/{i}"
+template: single.html
+---
+
+{text}"""
+
+TAGS = ("python", "static sites", "yaml", "markdown", "jinja", "wiki")
+
+
+def gen_frontmatter_doc(i):
+    return FRONTMATTER_TEMPLATE.format(
+        i=i,
+        day=i % 28 + 1,
+        tag_a=random.choice(TAGS),
+        tag_b=random.choice(TAGS),
+        text=gen_text()
+    )
+
+
+@benchmark("yaml")
+def bench_yaml(n):
+    """
+    Frontmatter parsing: pure-Python SafeLoader vs yamltools.
+    """
+    texts = tuple(gen_frontmatter_doc(i) for i in range(n))
+
+    def parse_pure():
+        for text in texts:
+            frontmatter, content = yamltools.split_frontmatter(text)
+            yaml.load(frontmatter, Loader=yaml.SafeLoader)
+
+    def parse_yamltools():
+        yamltools._frontmatter_cache.clear()
+        for text in texts:
+            yamltools.parse_frontmatter(text)
+
+    def parse_yamltools_cached():
+        for text in texts:
+            yamltools.parse_frontmatter(text)
+
+    print("Frontmatter parsing ({} docs, loader: {})".format(
+        n, yamltools.Loader.__name__))
+    baseline = measure("yaml.SafeLoader", parse_pure, n)
+    optimized = measure("yamltools.parse_frontmatter", parse_yamltools, n)
+    parse_yamltools_cached()
+    cached = measure("yamltools.parse_frontmatter (cached)",
+        parse_yamltools_cached, n)
+    compare("uncached", baseline, optimized)
+    compare("cached", baseline, cached)
+
+
+@benchmark("cache")
+def bench_cache(n):
+    """
+    DocCache round-trips: dump then load twice vs. spill once.
+    """
+    docs = tuple(gen_docs(n))
+
+    def double_round_trip():
+        with Doc.DocCacheDir(docs) as cache:
+            stubs = tuple(Stub.from_doc(doc) for doc in cache.load_all())
+            for doc in cache.load_all():
+                pass
+
+    def spill_once():
+        with Doc.DocCacheDir() as cache:
+            spilled = cache.dump_each(docs)
+            stubs = tuple(Stub.from_doc(doc) for doc in spilled)
+            for doc in cache.load_all():
+                pass
+
+    print("DocCache round-trips ({} docs)".format(n))
+    baseline = measure("dump, load for stubs, load to render",
+        double_round_trip, n)
+    optimized = measure("spill with stubs, load to render", spill_once, n)
+    compare("spill once", baseline, optimized)
+
+    with Doc.DocCacheDir(docs) as cache:
+        def load_render(prefetch):
+            def run():
+                for doc in cache.load_all(prefetch=prefetch):
+                    stringtools.summarize(house_markdown(doc.content))
+            return run
+
+        baseline = measure("load and render, no read-ahead",
+            load_render(0), n)
+        optimized = measure("load and render, read-ahead",
+            load_render(Doc.PREFETCH_SIZE), n)
+        compare("read-ahead", baseline, optimized)
+
+
+@benchmark("codec")
+def bench_codec(n):
+    """
+    DocCache codecs: dump/load throughput and disk footprint.
+    """
+    docs = tuple(
+        doc._replace(content=house_markdown(doc.content))
+        for doc in gen_docs(n)
+    )
+    configs = (
+        ("pickle (default protocol)", codec.pickle_codec(pickle.DEFAULT_PROTOCOL)),
+        ("pickle", codec.from_config(Doc.Doc)),
+        ("pickle+zlib:1", codec.from_config(Doc.Doc, compression="zlib", level=1)),
+        ("pickle+zlib:6", codec.from_config(Doc.Doc, compression="zlib", level=6)),
+        ("pickle+lzma:0", codec.from_config(Doc.Doc, compression="lzma", level=0)),
+    )
+    if codec.msgpack is not None:
+        configs = configs + (
+            ("msgpack", codec.from_config(Doc.Doc, codec="msgpack")),
+            ("msgpack+zlib:1", codec.from_config(
+                Doc.Doc, codec="msgpack", compression="zlib", level=1)),
+        )
+
+    print("DocCache codecs ({} rendered docs)".format(n))
+    for label, c in configs:
+        def round_trip():
+            with Doc.DocCacheDir(docs, codec=c) as cache:
+                for doc in cache.load_all():
+                    pass
+        size = sum(len(c.dumps(doc)) for doc in docs)
+        measure("{label} [{kb:.0f}KB]".format(label=label, kb=size / 1024),
+            round_trip, n)
+
+
+LINK_PATHS = tuple("/posts/post-{}/".format(i) for i in range(50)) + (
+    "https://example.org/elsewhere/",
+    "#footnote",
+    "images/photo.png",
+)
+
+
+def gen_link_page(n_links=200):
+    """
+    Generate an HTML page with lots of links and images.
+    """
+    parts = []
+    for i in range(n_links):
+        url = random.choice(LINK_PATHS)
+        parts.append('<p>{text} <a href="{url}">link {i}</a></p>'.format(
+            text=gen_text()[:200], url=url, i=i))
+        if i % 10 == 0:
+            parts.append('<img src="/static/img-{}.png">'.format(i % 5))
+    return "\n".join(parts)
+
+
+@benchmark("absolutize")
+def bench_absolutize(n):
+    """
+    URL absolutizing on link-heavy pages: re.sub per doc vs.
+    compiled, memoized absolutize.
+    """
+    base_url = "https://example.com/blog/"
+    docs = tuple(
+        Doc.doc("page-{}.md".format(i), "page-{}.html".format(i),
+            content=gen_link_page())
+        for i in range(n)
+    )
+    # A third of the docs have no links at all.
+    docs = docs + tuple(
+        doc._replace(content=gen_text()) for doc in docs[:n // 3])
+
+    def render_inner_match(match):
+        url = pathtools.qualify_url(match.group(2), base_url)
+        return '{attr}="{url}"'.format(attr=match.group(1), url=url)
+
+    def absolutize_baseline():
+        for doc in docs:
+            doc._replace(content=re.sub(
+                absolutize.URL_ATTR, render_inner_match, doc.content))
+
+    def absolutize_optimized():
+        absolutize_doc_urls = absolutize.absolutize(base_url)
+        for doc in docs:
+            absolutize_doc_urls(doc)
+
+    print("Absolutize ({} docs)".format(len(docs)))
+    baseline = measure("re.sub + qualify_url", absolutize_baseline, len(docs))
+    optimized = measure("absolutize.absolutize", absolutize_optimized,
+        len(docs))
+    compare("absolutize", baseline, optimized)
+
+
+@benchmark("summary")
+def bench_summary(n):
+    """
+    Stub summaries on long rendered docs: truncate(strip_html(...)) vs.
+    the streaming summarize.
+    """
+    docs = tuple(
+        doc._replace(content=house_markdown(
+            "\n\n".join(gen_text() for _ in range(20))))
+        for doc in gen_docs(n)
+    )
+
+    def summary_baseline():
+        for doc in docs:
+            stringtools.truncate(stringtools.strip_html(doc.content))
+
+    def summary_streaming():
+        for doc in docs:
+            stringtools.summarize(doc.content)
+
+    print("Summaries ({} docs, {:.0f}KB average)".format(
+        n, sum(len(doc.content) for doc in docs) / n / 1024))
+    baseline = measure("truncate(strip_html(...))", summary_baseline, n)
+    optimized = measure("stringtools.summarize", summary_streaming, n)
+    compare("summarize", baseline, optimized)
+
+
+def _strptime_isoformat(dt_str):
+    # The previous date parser, for comparison.
+    try:
+        return datetime.strptime(dt_str, "%Y-%m-%d")
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(dt_str, "%Y%m%d")
+    except ValueError:
+        pass
+    return datetime.strptime(dt_str, "%Y %m %d")
+
+
+@benchmark("date")
+def bench_date(n):
+    """
+    Date string parsing: strptime fallthrough vs. date.parse_isoformat.
+    """
+    styles = ("{:04d}-{:02d}-{:02d}", "{:04d}{:02d}{:02d}", "{:04d} {:02d} {:02d}")
+    strings = tuple(
+        random.choice(styles).format(
+            random.randint(2000, 2020),
+            random.randint(1, 12),
+            random.randint(1, 28)
+        )
+        for i in range(n)
+    )
+
+    def parse_strptime():
+        for s in strings:
+            _strptime_isoformat(s)
+
+    def parse_uncached():
+        for s in strings:
+            date.parse_isoformat.__wrapped__(s)
+
+    def parse_cached():
+        for s in strings:
+            date.parse_isoformat(s)
+
+    print("Date parsing ({} strings, {} distinct)".format(
+        n, len(set(strings))))
+    baseline = measure("strptime fallthrough", parse_strptime, n)
+    uncached = measure("date.parse_isoformat (uncached)", parse_uncached, n)
+    cached = measure("date.parse_isoformat", parse_cached, n)
+    compare("uncached", baseline, uncached)
+    compare("cached", baseline, cached)
+
+
+def _read_all_tokens(doc):
+    # The previous permalink token reader, for comparison.
+    id_path = PurePath(doc.id_path)
+    return {
+        "section": doc.section,
+        "name": id_path.name,
+        "stem": id_path.stem,
+        "suffix": id_path.suffix,
+        "parents": str(id_path.parent),
+        "parent": id_path.parent.stem,
+        "yy": doc.created.strftime("%y"),
+        "yyyy": doc.created.strftime("%Y"),
+        "mm": doc.created.strftime("%m"),
+        "dd": doc.created.strftime("%d")
+    }
+
+
+@benchmark("permalink")
+def bench_permalink(n):
+    """
+    Permalink mapping: all tokens per doc vs. compiled templates.
+    """
+    docs = tuple(
+        Doc.doc(
+            id_path="posts/{}.md".format(i),
+            output_path="posts/{}.html".format(i),
+            section="posts",
+            created=datetime(2020, 1 + i % 12, 1 + i % 28)
+        )
+        for i in range(n)
+    )
+    templates = {"posts": "{yyyy}/{mm}/{stem}/index.html"}
+
+    def map_baseline():
+        for doc in docs:
+            output_path = templates[doc.section].format(
+                **_read_all_tokens(doc))
+            doc._replace(output_path=str(PurePath(output_path)))
+
+    map_permalink = permalink.permalinker(templates)
+
+    def map_compiled():
+        for doc in docs:
+            map_permalink(doc)
+
+    print("Permalinks ({} docs)".format(n))
+    baseline = measure("format with every token", map_baseline, n)
+    optimized = measure("permalink.permalinker", map_compiled, n)
+    compare("permalink", baseline, optimized)
+
+
+def _add_templates_baseline(doc):
+    # The previous candidate reader, for comparison.
+    templates = []
+    try:
+        templates.insert(0, doc.meta["template"])
+    except KeyError:
+        pass
+    templates.extend(templatetools.read_affiliated_templates(doc.id_path))
+    templates.extend(doc.templates)
+    return replace(doc, templates=tuple(templates))
+
+
+@benchmark("templates")
+def bench_templates(n):
+    """
+    Template selection: per-doc candidates probed with select_template
+    vs. candidates memoized and resolved against the theme up front.
+    """
+    sections = ("posts", "notes", "")
+    docs = tuple(
+        Doc.doc(
+            id_path="/".join(
+                x for x in (random.choice(sections), "{}.md".format(i)) if x),
+            output_path="{}.html".format(i)
+        )
+        for i in range(n)
+    )
+    docs = tuple(
+        doc._replace(section=pathtools.tld(doc.id_path)) for doc in docs)
+
+    with TemporaryDirectory() as theme_path:
+        Path(theme_path, "section", "notes").mkdir(parents=True)
+        Path(theme_path, "section", "notes", "default.html").write_text("")
+        Path(theme_path, "default.html").write_text("")
+        env = Environment(loader=FileSystemLoader(theme_path))
+
+        def select_baseline():
+            for doc in docs:
+                env.select_template(_add_templates_baseline(doc).templates)
+
+        def select_resolved():
+            # Listing the theme is part of the cost, so it's measured too.
+            resolve_templates = templatetools.template_resolver(theme_path)
+            for doc in docs:
+                env.select_template(resolve_templates(doc).templates)
+
+        print("Template selection ({} docs)".format(n))
+        baseline = measure(
+            "add_templates + select_template", select_baseline, n)
+        optimized = measure("template_resolver", select_resolved, n)
+        compare("templates", baseline, optimized)
+
+THEME_TEMPLATE = """{{% extends "_base.html" %}}
+{{% block content %}}
+  <h1>{{{{ doc.title }}}}</h1>
+  {{% for stub in index.values() | sort_by("created") %}}
+    {{% if stub.section == "s{i}" %}}
+      <a href="{{{{ stub.output_path | to_url }}}}">{{{{ stub.title }}}}</a>
+      <p>{{{{ stub.summary | truncate(80) }}}}</p>
+    {{% endif %}}
+  {{% endfor %}}
+  {{{{ doc.content }}}}
+{{% endblock %}}
+"""
+
+
+@benchmark("theme")
+def bench_theme(n):
+    """
+    Theme startup: loading every template from source vs. from a theme
+    compiled with `jinjatools.compile_theme`. `-n` is the number of
+    templates.
+    """
+    with TemporaryDirectory() as tmp:
+        theme_path = Path(tmp, "theme")
+        theme_path.mkdir()
+        Path(theme_path, "_base.html").write_text(
+            "<html><body>{% block content %}{% endblock %}</body></html>")
+        names = tuple("t{}.html".format(i) for i in range(n))
+        for i, name in enumerate(names):
+            Path(theme_path, name).write_text(THEME_TEMPLATE.format(i=i))
+
+        def load_all(compiled_path):
+            def run():
+                env = jinjatools.LettersmithEnvironment(
+                    theme_path, compiled_path=compiled_path)
+                for name in names:
+                    env.get_template(name)
+            return run
+
+        print("Theme startup ({} templates)".format(n))
+        baseline = measure(
+            "from source", load_all(Path(tmp, "missing")), n)
+        compiled_path = jinjatools.compile_theme(theme_path)
+        optimized = measure("compiled", load_all(compiled_path), n)
+        compare("theme", baseline, optimized)
+
+
+RECENT_TEMPLATE = """<ul>
+{{% for stub in (stubs | sort_by("created", reverse=True))[:10] %}}
+  <li><a href="{{{{ stub.output_path | to_url }}}}">{{{{ stub.title }}}}</a></li>
+{{% endfor %}}
+</ul>"""
+
+
+@benchmark("fragments")
+def bench_fragments(n):
+    """
+    Shared "recent posts" partial rendered on 200 pages, over `n` stubs:
+    uncached vs. `{% cache %}` block.
+    """
+    stubs = tuple(Stub.from_doc(doc) for doc in gen_docs(n))
+    pages = 200
+    with TemporaryDirectory() as theme_path:
+        Path(theme_path, "plain.html").write_text(
+            RECENT_TEMPLATE.format())
+        Path(theme_path, "cached.html").write_text(
+            '{% cache "recent" %}' + RECENT_TEMPLATE.format() +
+            '{% endcache %}')
+
+        def render_pages(name):
+            def run():
+                env = jinjatools.LettersmithEnvironment(theme_path)
+                template = env.get_template(name)
+                for i in range(pages):
+                    template.render(stubs=stubs)
+            return run
+
+        print("Recent posts partial ({} pages, {} stubs)".format(pages, n))
+        baseline = measure("uncached", render_pages("plain.html"), pages)
+        optimized = measure("{% cache %}", render_pages("cached.html"), pages)
+        compare("fragments", baseline, optimized)
+
+
+CODE_BLOCKS = (
+    "```python\ndef add(a, b):\n    return a + b\n```",
+    "```js\nconst add = (a, b) => a + b;\n```",
+    "```bash\npip install lettersmith\n```",
+    "```yaml\nsite:\n  title: My Site\n```",
+)
+
+
+def gen_code_doc():
+    return "\n\n".join(
+        (gen_text(),) + tuple(random.sample(CODE_BLOCKS, 3)))
+
+
+@benchmark("highlight")
+def bench_highlight(n):
+    """
+    Render `n` docs with shared code blocks:
+    GitHub-flavored markdown vs. highlight block cache.
+    """
+    from markdown import markdown
+    from mdx_gfm import GithubFlavoredMarkdownExtension
+    from lettersmith.highlight import HighlightCache, HighlightCacheExtension
+    texts = tuple(gen_code_doc() for i in range(n))
+    cache = HighlightCache()
+
+    def render_plain():
+        extensions = (GithubFlavoredMarkdownExtension(),)
+        for text in texts:
+            markdown(text, extensions=extensions)
+
+    def render_cached():
+        extensions = (
+            GithubFlavoredMarkdownExtension(),
+            HighlightCacheExtension(cache=cache)
+        )
+        for text in texts:
+            markdown(text, extensions=extensions)
+
+    print("Code-heavy markdown ({} docs)".format(n))
+    baseline = measure("gfm", render_plain, n)
+    optimized = measure("highlight cache", render_cached, n)
+    compare("highlight", baseline, optimized)
+
+
+parser = argparse.ArgumentParser(
+    description="Run Lettersmith micro-benchmarks"
+)
+parser.add_argument(
+    "name",
+    help="Which benchmark to run",
+    choices=sorted(BENCHMARKS) + ["all"]
+)
+parser.add_argument(
+    "-n",
+    help="Number of documents to generate for the benchmark",
+    type=int,
+    default=500
+)
+
+
+def main():
+    args = parser.parse_args()
+    names = sorted(BENCHMARKS) if args.name == "all" else (args.name,)
+    for name in names:
+        BENCHMARKS[name](args.n)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for `lettersmith_site`.
+
+Times `lettersmith_site --help`, and a build of an empty site, in fresh
+interpreters. Heavy dependencies (markdown, Jinja, PyYAML) are imported
+on first use, so startup should only pay for what a run needs. The
+baseline imports them all up front, like Lettersmith used to.
+
+Also prints the slowest imports, as reported by `python -X importtime`.
+
+Usage:
+
+    python test/scripts/startup.py
+    python test/scripts/startup.py -n 20 --top 15
+"""
+import os
+import sys
+import argparse
+import subprocess
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+
+EAGER_IMPORTS = "import yaml, markdown, mdx_gfm, jinja2, sqlite3; "
+
+RUN_SITE = "from lettersmith.bin.site import main; main()"
+
+EMPTY_SITE_CONFIG = """
+input_path: "content"
+output_path: "public"
+theme_path: "theme"
+data_path: "data"
+"""
+
+
+def run(code, args, cwd, importtime=False):
+    """
+    Run `code` in a fresh interpreter, with `args` as its argv.
+    Returns the completed process.
+    """
+    flags = ("-X", "importtime") if importtime else ()
+    return subprocess.run(
+        (sys.executable,) + flags + ("-c", code) + tuple(args),
+        cwd=cwd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        check=True,
+        universal_newlines=True
+    )
+
+
+def measure(label, code, args, cwd, number):
+    """
+    Time `number` runs in fresh interpreters, printing the best run.
+    Returns the best time in seconds.
+    """
+    times = []
+    for i in range(number):
+        start = perf_counter()
+        run(code, args, cwd)
+        times.append(perf_counter() - start)
+    best = min(times)
+    print("  {label:<44} {ms:>10.1f}ms".format(label=label, ms=best * 1e3))
+    return best
+
+
+def slowest_imports(code, args, cwd, top):
+    """
+    Read `-X importtime` output, and return the `top` slowest imports
+    by self time, as `(microseconds, module)` tuples.
+    """
+    stderr = run(code, args, cwd, importtime=True).stderr
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        if self_us.strip().isdigit():
+            timings.append((int(self_us), module.strip()))
+    return sorted(timings, reverse=True)[:top]
+
+
+def make_empty_site(site_path):
+    Path(site_path, "content").mkdir()
+    Path(site_path, "theme").mkdir()
+    Path(site_path, "theme", "default.html").write_text("{{doc.content}}")
+    Path(site_path, "lettersmith.yaml").write_text(EMPTY_SITE_CONFIG)
+
+
+def bench(label, args, cwd, number, top):
+    print(label)
+    baseline = measure(
+        "eager imports", EAGER_IMPORTS + RUN_SITE, args, cwd, number)
+    optimized = measure("lazy imports", RUN_SITE, args, cwd, number)
+    print("  {label}: {speedup:.1f}x faster".format(
+        label=label, speedup=baseline / optimized))
+    print("  Slowest imports (self time):")
+    for us, module in slowest_imports(RUN_SITE, args, cwd, top):
+        print("    {ms:>8.1f}ms  {module}".format(ms=us / 1e3, module=module))
+
+
+parser = argparse.ArgumentParser(
+    description="Benchmark lettersmith_site startup"
+)
+parser.add_argument(
+    "-n",
+    help="Number of runs to take the best of",
+    type=int,
+    default=10
+)
+parser.add_argument(
+    "--top",
+    help="Number of slowest imports to list",
+    type=int,
+    default=10
+)
+
+
+def main():
+    args = parser.parse_args()
+    bench("lettersmith_site --help", ("--help",), os.getcwd(), args.n, args.top)
+    with TemporaryDirectory() as site_path:
+        make_empty_site(site_path)
+        bench(
+            "lettersmith_site (empty site)", ("lettersmith.yaml",),
+            site_path, args.n, args.top
+        )
+
+
+if __name__ == '__main__':
+    main()
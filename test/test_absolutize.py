@@ -0,0 +1,44 @@
+import unittest
+from lettersmith import absolutize
+from lettersmith import doc as Doc
+
+
+class test_absolutize(unittest.TestCase):
+    def setUp(self):
+        self.absolutize_doc_urls = absolutize.absolutize("http://example.com/")
+
+    def test_relative_url(self):
+        doc = Doc.doc("a.md", "a.html",
+            content='<a href="/foo/">Foo</a> <img src=\'bar.png\'>')
+        doc = self.absolutize_doc_urls(doc)
+        self.assertEqual(
+            doc.content,
+            '<a href="http://example.com/foo/">Foo</a> '
+            '<img src="http://example.com/bar.png">'
+        )
+
+    def test_qualified_url(self):
+        doc = Doc.doc("a.md", "a.html",
+            content='<a href="https://other.com/foo/">Foo</a>')
+        doc = self.absolutize_doc_urls(doc)
+        self.assertEqual(doc.content, '<a href="https://other.com/foo/">Foo</a>')
+
+    def test_no_urls(self):
+        doc = Doc.doc("a.md", "a.html", content="<p>No links here</p>")
+        self.assertIs(self.absolutize_doc_urls(doc), doc)
+
+
+class test_absolutizer(unittest.TestCase):
+    def test_base_slash(self):
+        absolutize_str = absolutize.absolutizer("/")
+        s = '<a href="foo/">Foo</a>'
+        self.assertIs(absolutize_str(s), s)
+
+    def test_repeated_urls(self):
+        absolutize_str = absolutize.absolutizer("http://example.com/")
+        s = '<a href="/a/">A</a> <a href="/a/">A</a>'
+        self.assertEqual(
+            absolutize_str(s),
+            '<a href="http://example.com/a/">A</a> '
+            '<a href="http://example.com/a/">A</a>'
+        )
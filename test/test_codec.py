@@ -0,0 +1,51 @@
+import unittest
+from datetime import date, datetime
+from lettersmith import codec
+from lettersmith import doc as Doc
+
+
+DOC = Doc.doc(
+    id_path="a/b.md",
+    output_path="a/b/index.html",
+    created=datetime(2018, 1, 17, 10, 30),
+    title="B",
+    content="<p>Lorem ipsum</p>" * 20,
+    meta={"tags": ("x", "y"), "date": date(2018, 1, 17)},
+    templates=("single.html",)
+)
+
+
+class test_codecs(unittest.TestCase):
+    def assert_round_trip(self, c):
+        self.assertEqual(c.loads(c.dumps(DOC)), DOC)
+
+    def test_pickle(self):
+        self.assert_round_trip(codec.pickle_codec())
+
+    def test_zlib(self):
+        c = codec.compressed(codec.pickle_codec(), "zlib", level=9)
+        self.assert_round_trip(c)
+        self.assertLess(len(c.dumps(DOC)), len(codec.pickle_codec().dumps(DOC)))
+
+    def test_lzma(self):
+        self.assert_round_trip(codec.from_config(Doc.Doc, compression="lzma"))
+
+    @unittest.skipIf(codec.msgpack is None, "msgpack is not installed")
+    def test_msgpack(self):
+        self.assert_round_trip(codec.from_config(Doc.Doc, codec="msgpack"))
+
+    def test_unknown(self):
+        with self.assertRaises(ValueError):
+            codec.from_config(Doc.Doc, codec="nope")
+
+
+class test_doc_cache_codec(unittest.TestCase):
+    def test_round_trip(self):
+        c = codec.from_config(Doc.Doc, compression="zlib")
+        with Doc.DocCacheDir((DOC,), codec=c) as cache:
+            self.assertEqual(cache.load(DOC.id_path), DOC)
+            self.assertEqual(tuple(cache.load_all()), (DOC,))
+
+
+if __name__ == '__main__':
+    unittest.main()
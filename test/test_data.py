@@ -0,0 +1,79 @@
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from lettersmith.data import DataDir
+
+
+class test_data_dir(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        root = Path(self.tmp.name, "data")
+        root.joinpath("products").mkdir(parents=True)
+        root.joinpath("site.yaml").write_text("title: Hello\n")
+        root.joinpath("nav.json").write_text('["a", "b"]')
+        root.joinpath("broken.yaml").write_text("a: [")
+        root.joinpath("products", "shoes.yml").write_text("- boot\n")
+        root.joinpath("notes.txt").write_text("ignored")
+        self.root = root
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_keys(self):
+        data = DataDir(self.root)
+        self.assertEqual(
+            set(data), {"site", "nav", "broken", "products"})
+
+    def test_nested(self):
+        data = DataDir(self.root)
+        self.assertEqual(data["site"]["title"], "Hello")
+        self.assertEqual(data["nav"], ["a", "b"])
+        self.assertEqual(data["products"]["shoes"], ["boot"])
+
+    def test_name_collision(self):
+        # Like `load_data_files`, the last file globbed wins.
+        self.root.joinpath("site.json").write_text('{"title": "JSON"}')
+        self.root.joinpath("products.yaml").write_text("- hat\n")
+        data = DataDir(self.root)
+        self.assertEqual(data["site"]["title"], "JSON")
+        self.assertEqual(data["products"], ["hat"])
+
+    def test_lazy(self):
+        # Broken files are only a problem if you access them.
+        data = DataDir(self.root)
+        self.assertEqual(data["site"]["title"], "Hello")
+
+    def test_missing_dir(self):
+        self.assertEqual(len(DataDir(Path(self.tmp.name, "nope"))), 0)
+
+    def test_snapshot(self):
+        snapshot_path = Path(self.tmp.name, "snapshots")
+        site_path = self.root.joinpath("site.yaml")
+        DataDir(self.root, snapshot_path=snapshot_path)["site"]
+        # Change the file without changing its size or mtime. The
+        # snapshot should be used instead of parsing the file again.
+        stat = site_path.stat()
+        site_path.write_text("title: Howdy\n")
+        os.utime(site_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        data = DataDir(self.root, snapshot_path=snapshot_path)
+        self.assertEqual(data["site"]["title"], "Hello")
+
+    def test_collect_garbage(self):
+        snapshot_path = Path(self.tmp.name, "snapshots")
+        data = DataDir(self.root, snapshot_path=snapshot_path)
+        data["site"]
+        data["nav"]
+        data["products"]["shoes"]
+        self.assertEqual(len(tuple(snapshot_path.glob("*.pkl"))), 3)
+        # Delete one file and change another.
+        self.root.joinpath("nav.json").unlink()
+        shoes_path = self.root.joinpath("products", "shoes.yml")
+        shoes_path.write_text("- boot\n- sandal\n")
+        data = DataDir(self.root, snapshot_path=snapshot_path)
+        self.assertEqual(data.collect_garbage(), 2)
+        self.assertEqual(len(tuple(snapshot_path.glob("*.pkl"))), 1)
+        self.assertEqual(data["site"]["title"], "Hello")
+
+    def test_collect_garbage_without_snapshots(self):
+        self.assertEqual(DataDir(self.root).collect_garbage(), 0)
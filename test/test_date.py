@@ -0,0 +1,51 @@
+import unittest
+from datetime import datetime, timezone, timedelta
+from lettersmith import date
+
+
+class test_parse_isoformat(unittest.TestCase):
+    def test_dashed(self):
+        self.assertEqual(
+            date.parse_isoformat("2017-01-02"), datetime(2017, 1, 2))
+
+    def test_compact(self):
+        self.assertEqual(
+            date.parse_isoformat("20170102"), datetime(2017, 1, 2))
+
+    def test_spaced(self):
+        self.assertEqual(
+            date.parse_isoformat("2017 01 02"), datetime(2017, 1, 2))
+
+    def test_datetime(self):
+        self.assertEqual(
+            date.parse_isoformat("2017-01-02T10:30:00"),
+            datetime(2017, 1, 2, 10, 30)
+        )
+
+    def test_unpadded(self):
+        self.assertEqual(
+            date.parse_isoformat("2017-1-2"), datetime(2017, 1, 2))
+        self.assertEqual(
+            date.parse_isoformat("2017 1 2"), datetime(2017, 1, 2))
+
+    def test_timezone(self):
+        utc = datetime(2017, 1, 2, 10, 30)
+        self.assertEqual(date.parse_isoformat("2017-01-02T10:30:00Z"), utc)
+        self.assertEqual(
+            date.parse_isoformat("2017-01-02T12:30:00+02:00"), utc)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            date.parse_isoformat("January 2nd")
+        with self.assertRaises(ValueError):
+            date.parse_isoformat("20171302")
+
+
+class test_to_datetime(unittest.TestCase):
+    def test_aware_datetime_to_utc(self):
+        dt = datetime(2017, 1, 2, 0, 30, tzinfo=timezone(timedelta(hours=2)))
+        self.assertEqual(date.to_datetime(dt), datetime(2017, 1, 1, 22, 30))
+
+
+if __name__ == '__main__':
+    unittest.main()
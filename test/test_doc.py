@@ -4,6 +4,7 @@ Unit tests for Doc
 
 import unittest
 from pathlib import Path
+from tempfile import TemporaryDirectory
 from lettersmith import doc as Doc
 
 module_path = Path(__file__).parent
@@ -48,6 +49,34 @@ class test_parse_frontmatter(unittest.TestCase):
         self.assertEqual(self.doc.meta["title"], "Doc title")
 
 
+class test_load_head(unittest.TestCase):
+    def setUp(self):
+        doc_path = fixtures_path.joinpath("Doc with meta.md")
+        doc = Doc.load_head(doc_path, relative_to=fixtures_path, peek_size=5)
+        doc = Doc.parse_frontmatter(doc)
+        self.doc = doc
+
+    def test_content(self):
+        self.assertEqual(self.doc.content, "Lorem")
+
+    def test_items(self):
+        self.assertEqual(self.doc.meta["title"], "Doc title")
+
+    def test_id_path(self):
+        self.assertEqual(str(self.doc.id_path), "Doc with meta.md")
+
+    def test_scan_body(self):
+        scanned = []
+        doc = Doc.load_head(
+            fixtures_path.joinpath("Doc with meta.md"),
+            relative_to=fixtures_path,
+            peek_size=3,
+            scan_body=lambda lines: scanned.extend(lines)
+        )
+        self.assertEqual("".join(scanned), "Lorem ipsum")
+        self.assertEqual(Doc.parse_frontmatter(doc).content, "Lor")
+
+
 class test_parse_yaml(unittest.TestCase):
     def setUp(self):
         doc_path = fixtures_path.joinpath("doc.yaml")
@@ -113,5 +142,172 @@ class test_ext(unittest.TestCase):
         )
 
 
+class test_source_cache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.input_path = Path(self.tmp.name, "content")
+        self.input_path.mkdir()
+        self.doc_path = self.input_path.joinpath("a.md")
+        self.doc_path.write_text("---\ntitle: A\n---\nLorem ipsum")
+        self.cache_path = Path(self.tmp.name, "cache")
+        self.parsed = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def parse(self, doc):
+        self.parsed.append(doc.id_path)
+        return Doc.parse_frontmatter(doc)
+
+    def load(self, fingerprint=""):
+        cache = Doc.SourceCache(self.cache_path, fingerprint=fingerprint)
+        doc = cache.load(
+            self.doc_path, relative_to=self.input_path, parse=self.parse)
+        return cache, doc
+
+    def test_reuses_unchanged(self):
+        self.load()
+        cache, doc = self.load()
+        self.assertEqual(len(self.parsed), 1)
+        self.assertEqual(cache.stats["hits"], 1)
+        self.assertEqual(doc.meta["title"], "A")
+        self.assertEqual(doc.content, "Lorem ipsum")
+
+    def test_reparses_changed(self):
+        self.load()
+        self.doc_path.write_text("---\ntitle: B\n---\nLorem ipsum")
+        cache, doc = self.load()
+        self.assertEqual(len(self.parsed), 2)
+        self.assertEqual(doc.meta["title"], "B")
+
+    def test_reparses_changed_fingerprint(self):
+        self.load(fingerprint="a")
+        self.load(fingerprint="b")
+        self.assertEqual(len(self.parsed), 2)
+
+    def test_collect_garbage(self):
+        self.load()
+        cache = Doc.SourceCache(self.cache_path)
+        self.assertEqual(cache.collect_garbage(), 1)
+        self.assertEqual(tuple(self.cache_path.iterdir()), ())
+
+
+class test_doc_cache(unittest.TestCase):
+    def setUp(self):
+        self.docs = tuple(
+            Doc.doc("doc {}.md".format(i), "doc-{}.html".format(i))
+            for i in range(50)
+        )
+
+    def test_load_all_in_dump_order(self):
+        with Doc.DocCacheDir(self.docs) as cache:
+            id_paths = tuple(doc.id_path for doc in cache.load_all())
+        self.assertEqual(id_paths, tuple(doc.id_path for doc in self.docs))
+
+    def test_load_all_without_prefetch(self):
+        with Doc.DocCacheDir(self.docs) as cache:
+            id_paths = tuple(doc.id_path for doc in cache.load_all(prefetch=0))
+        self.assertEqual(id_paths, tuple(doc.id_path for doc in self.docs))
+
+    def test_stop_early(self):
+        with Doc.DocCacheDir(self.docs) as cache:
+            docs = cache.load_all(prefetch=2)
+            self.assertEqual(next(docs).id_path, "doc 0.md")
+            docs.close()
+
+    def test_reopened_cache_is_sorted(self):
+        with Doc.DocCacheDir(self.docs) as cache:
+            reopened = Doc.DocCache(cache.cache_path)
+            first = tuple(doc.id_path for doc in reopened.load_all())
+            second = tuple(doc.id_path for doc in reopened.load_all())
+        self.assertEqual(first, second)
+        self.assertEqual(len(first), 50)
+
+    def test_load_many(self):
+        with Doc.DocCacheDir(self.docs) as cache:
+            docs = cache.load_many(("doc 3.md", "doc 1.md"))
+        self.assertEqual(
+            tuple(doc.id_path for doc in docs), ("doc 3.md", "doc 1.md"))
+
+
+class test_doc_lru(unittest.TestCase):
+    def setUp(self):
+        self.docs = {
+            "doc {}.md".format(i): Doc.doc(
+                "doc {}.md".format(i), "doc-{}.html".format(i),
+                content="x" * 10
+            )
+            for i in range(10)
+        }
+        self.loads = []
+        self.batches = []
+
+    def load(self, id_path):
+        self.loads.append(id_path)
+        return self.docs[id_path]
+
+    def load_many(self, id_paths):
+        self.batches.append(tuple(id_paths))
+        return tuple(self.docs[id_path] for id_path in id_paths)
+
+    def test_hits(self):
+        lru = Doc.DocLRU(self.load)
+        lru.load("doc 1.md")
+        doc = lru.load("doc 1.md")
+        self.assertEqual(doc.id_path, "doc 1.md")
+        self.assertEqual(self.loads, ["doc 1.md"])
+        self.assertEqual(lru.stats["hits"], 1)
+        self.assertEqual(lru.stats["misses"], 1)
+
+    def test_bounded_by_content_size(self):
+        lru = Doc.DocLRU(self.load, max_size=25)
+        lru.load("doc 1.md")
+        lru.load("doc 2.md")
+        # Touch doc 1, so doc 2 is least recently used.
+        lru.load("doc 1.md")
+        lru.load("doc 3.md")
+        self.assertEqual(lru.size, 20)
+        self.assertEqual(lru.stats["evicted"], 1)
+        lru.load("doc 1.md")
+        lru.load("doc 2.md")
+        self.assertEqual(self.loads, [
+            "doc 1.md", "doc 2.md", "doc 3.md", "doc 2.md"])
+
+    def test_sized_in_bytes(self):
+        self.docs["wide.md"] = Doc.doc("wide.md", "wide.html", content="é" * 10)
+        lru = Doc.DocLRU(self.load, max_size=15)
+        lru.load("wide.md")
+        # 10 characters, but 20 bytes, so it is too big to keep.
+        self.assertEqual(lru.size, 0)
+        lru.load("doc 1.md")
+        self.assertEqual(lru.size, 10)
+
+    def test_too_big_to_cache(self):
+        lru = Doc.DocLRU(self.load, max_size=5)
+        lru.load("doc 1.md")
+        lru.load("doc 1.md")
+        self.assertEqual(lru.size, 0)
+        self.assertEqual(len(self.loads), 2)
+
+    def test_load_many(self):
+        lru = Doc.DocLRU(self.load, load_many=self.load_many)
+        lru.load("doc 2.md")
+        docs = lru.load_many(("doc 1.md", "doc 2.md", "doc 3.md", "doc 1.md"))
+        self.assertEqual(
+            tuple(doc.id_path for doc in docs),
+            ("doc 1.md", "doc 2.md", "doc 3.md", "doc 1.md")
+        )
+        self.assertEqual(self.batches, [("doc 1.md", "doc 3.md")])
+        self.assertEqual(lru.stats["misses"], 3)
+        lru.load_many(("doc 1.md", "doc 3.md"))
+        self.assertEqual(len(self.batches), 1)
+
+    def test_load_many_without_batch_loader(self):
+        lru = Doc.DocLRU(self.load)
+        docs = lru.load_many(("doc 1.md", "doc 2.md"))
+        self.assertEqual(len(docs), 2)
+        self.assertEqual(self.loads, ["doc 1.md", "doc 2.md"])
+
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from jinja2 import Environment, DictLoader
+from lettersmith.fragmentcache import FragmentCache, FragmentCacheExtension
+
+
+TEMPLATES = {
+    "page.html": (
+        '{% cache "nav" %}{{ count() }}{% endcache %}|'
+        '{% cache "nav" %}{{ count() }}{% endcache %}|'
+        '{% cache "sec", section %}{{ count() }}{% endcache %}|'
+        '{% cache "deps", depends=nav %}{{ nav | join(",") }}{% endcache %}'
+    )
+}
+
+
+def _env(fragment_cache=None):
+    env = Environment(
+        loader=DictLoader(TEMPLATES),
+        extensions=(FragmentCacheExtension,)
+    )
+    if fragment_cache is not None:
+        env.fragment_cache = fragment_cache
+    calls = []
+
+    def count():
+        calls.append(1)
+        return len(calls)
+
+    env.globals["count"] = count
+    return env
+
+
+class test_fragment_cache_extension(unittest.TestCase):
+    def test_renders_once_per_key(self):
+        env = _env()
+        template = env.get_template("page.html")
+        self.assertEqual(
+            template.render(section="a", nav=["x"]), "1|2|3|x")
+        self.assertEqual(
+            template.render(section="a", nav=["x"]), "1|2|3|x")
+        self.assertEqual(
+            template.render(section="b", nav=["x"]), "1|2|4|x")
+
+    def test_default_cache(self):
+        env = _env()
+        self.assertIsInstance(env.fragment_cache, FragmentCache)
+
+
+class test_fragment_cache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.cache_path = Path(self.tmp.name, "fragments")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_in_memory(self):
+        cache = FragmentCache()
+        self.assertEqual(cache.get("a", lambda: "one"), "one")
+        self.assertEqual(cache.get("a", lambda: "two"), "one")
+        self.assertEqual(cache.stats["hits"], 1)
+
+    def test_persisted_between_builds(self):
+        cache = FragmentCache(self.cache_path, fingerprint="theme")
+        cache.get("nav", lambda: "<nav>", depends=("a",))
+        cache = FragmentCache(self.cache_path, fingerprint="theme")
+        self.assertEqual(
+            cache.get("nav", lambda: "changed", depends=("a",)), "<nav>")
+        self.assertEqual(cache.stats["hits"], 1)
+
+    def test_dependency_change(self):
+        cache = FragmentCache(self.cache_path)
+        cache.get("nav", lambda: "<nav>", depends=("a",))
+        cache = FragmentCache(self.cache_path)
+        self.assertEqual(
+            cache.get("nav", lambda: "new", depends=("b",)), "new")
+
+    def test_fingerprint_change(self):
+        cache = FragmentCache(self.cache_path, fingerprint="one")
+        cache.get("nav", lambda: "<nav>", depends=("a",))
+        cache = FragmentCache(self.cache_path, fingerprint="two")
+        self.assertEqual(
+            cache.get("nav", lambda: "new", depends=("a",)), "new")
+
+    def test_without_depends_not_persisted(self):
+        cache = FragmentCache(self.cache_path)
+        cache.get("nav", lambda: "<nav>")
+        self.assertEqual(tuple(self.cache_path.iterdir()), ())
+
+    def test_collect_garbage(self):
+        cache = FragmentCache(self.cache_path)
+        cache.get("a", lambda: "a", depends=1)
+        cache.get("b", lambda: "b", depends=1)
+        cache = FragmentCache(self.cache_path)
+        cache.get("a", lambda: "a", depends=1)
+        self.assertEqual(cache.collect_garbage(), 1)
+        self.assertEqual(len(tuple(self.cache_path.iterdir())), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import subprocess
+import unittest
+from pathlib import Path
+from datetime import datetime
+from tempfile import TemporaryDirectory
+from lettersmith import gitdates
+from lettersmith.date import read_file_times
+
+
+def _commit(root, message, timestamp):
+    env = dict(
+        os.environ,
+        GIT_AUTHOR_DATE="@{} +0000".format(timestamp),
+        GIT_COMMITTER_DATE="@{} +0000".format(timestamp)
+    )
+    subprocess.run(
+        ("git", "-C", str(root), "add", "-A"), check=True, env=env)
+    subprocess.run(
+        ("git", "-C", str(root), "commit", "-q", "-m", message),
+        check=True, env=env)
+
+
+class test_parse_git_log(unittest.TestCase):
+    def test_first_and_last_commit(self):
+        output = (
+            "\x01200\0\nM\0c/a.md\0A\0c/b.md\0"
+            "\x01100\0\nA\0c/a.md\0"
+        )
+        times = gitdates.parse_git_log(output, "/repo")
+        self.assertEqual(times["/repo/c/a.md"], (100, 200))
+        self.assertEqual(times["/repo/c/b.md"], (200, 200))
+
+    def test_numeric_file_names(self):
+        output = "\x01100\0\nA\0" + "300" + "\0"
+        times = gitdates.parse_git_log(output)
+        self.assertEqual(times, {"300": (100, 100)})
+
+
+class test_git_times_reader(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        root = Path(self.tmp.name, "repo")
+        content = root.joinpath("content")
+        content.mkdir(parents=True)
+        subprocess.run(("git", "init", "-q", str(root)), check=True)
+        subprocess.run(
+            ("git", "-C", str(root), "config", "user.email", "a@b.c"),
+            check=True)
+        subprocess.run(
+            ("git", "-C", str(root), "config", "user.name", "A"),
+            check=True)
+        content.joinpath("a b.md").write_text("one")
+        _commit(root, "one", 1000000000)
+        content.joinpath("a b.md").write_text("two")
+        content.joinpath("b.md").write_text("two")
+        _commit(root, "two", 1000086400)
+        content.joinpath("new.md").write_text("uncommitted")
+        self.root = root
+        self.content = content
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_times(self):
+        read_times = gitdates.git_times_reader(self.content)
+        created, modified = read_times(self.content.joinpath("a b.md"))
+        self.assertEqual(created, datetime(2001, 9, 9, 1, 46, 40))
+        self.assertEqual(modified, datetime(2001, 9, 10, 1, 46, 40))
+
+    def test_relative_path(self):
+        read_times = gitdates.git_times_reader(self.content)
+        cwd = os.getcwd()
+        os.chdir(str(self.root))
+        try:
+            created, modified = read_times(Path("content", "b.md"))
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(created, datetime(2001, 9, 10, 1, 46, 40))
+
+    def test_uncommitted_falls_back(self):
+        read_times = gitdates.git_times_reader(self.content)
+        path = self.content.joinpath("new.md")
+        self.assertEqual(read_times(path), read_file_times(path))
+
+    def test_not_a_repo(self):
+        read_times = gitdates.git_times_reader(self.tmp.name)
+        self.assertIs(read_times, read_file_times)
+
+    def test_cache(self):
+        cache_path = Path(self.tmp.name, "cache", "times.pkl")
+        times = gitdates.load_git_times(self.content, cache_path)
+        self.assertTrue(cache_path.exists())
+        self.assertEqual(
+            gitdates.load_git_times(self.content, cache_path), times)
+        # Moving HEAD invalidates the cache.
+        self.content.joinpath("new.md").write_text("committed")
+        _commit(self.root, "three", 1000172800)
+        times = gitdates.load_git_times(self.content, cache_path)
+        key = str(self.content.joinpath("new.md").resolve())
+        self.assertEqual(times[key], (1000172800, 1000172800))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import sys
+import subprocess
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from markdown import markdown
+from mdx_gfm import GithubFlavoredMarkdownExtension
+from lettersmith.highlight import HighlightCache, HighlightCacheExtension
+
+
+TEXT = """# Code
+
+```python
+def f(x):
+    return x < 1 and "<b>"
+```
+
+Some text.
+
+```
+plain <code>
+```
+
+```js hl_lines="1"
+var a = 1;
+```
+
+~~~ {.python .extra}
+x = 1
+~~~
+
+```python
+def f(x):
+    return x < 1 and "<b>"
+```
+"""
+
+
+def _render(s, cache):
+    return markdown(s, extensions=(
+        GithubFlavoredMarkdownExtension(),
+        HighlightCacheExtension(cache=cache)
+    ))
+
+
+class test_highlight_cache_extension(unittest.TestCase):
+    def test_same_as_uncached(self):
+        expected = markdown(
+            TEXT, extensions=(GithubFlavoredMarkdownExtension(),))
+        cache = HighlightCache()
+        self.assertEqual(_render(TEXT, cache), expected)
+        self.assertEqual(_render(TEXT, cache), expected)
+
+    def test_shared_across_docs(self):
+        cache = HighlightCache()
+        _render(TEXT, cache)
+        # Two distinct plain blocks. The repeated block is a hit.
+        self.assertEqual(cache.stats["misses"], 2)
+        self.assertEqual(cache.stats["hits"], 1)
+        _render(TEXT, cache)
+        self.assertEqual(cache.stats["misses"], 2)
+        self.assertEqual(cache.stats["hits"], 4)
+
+    def test_without_pygments(self):
+        # Block Pygments in a fresh interpreter, as if it weren't installed.
+        code = (
+            "import sys; sys.path.insert(0, {path!r}); "
+            "sys.modules['pygments'] = None; "
+            "from lettersmith import markdowntools; "
+            "print(markdowntools.house_markdown({text!r})); "
+            "print(markdowntools.fingerprint())"
+        ).format(path=str(Path(__file__).parent.parent), text=TEXT)
+        output = subprocess.run(
+            (sys.executable, "-c", code),
+            stdout=subprocess.PIPE,
+            check=True,
+            universal_newlines=True
+        ).stdout
+        self.assertIn("def f(x):", output)
+        self.assertIn("pygments-None", output)
+
+
+class test_highlight_cache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.cache_path = Path(self.tmp.name, "highlight", "blocks.pkl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_persisted_between_builds(self):
+        cache = HighlightCache()
+        cache.persist(self.cache_path)
+        cache.get("a", lambda: "<pre>a</pre>")
+        cache.save()
+        cache = HighlightCache()
+        cache.persist(self.cache_path)
+        self.assertEqual(cache.get("a", lambda: "changed"), "<pre>a</pre>")
+        self.assertEqual(cache.stats["hits"], 1)
+
+    def test_bounded(self):
+        cache = HighlightCache(max_entries=2)
+        cache.get("a", lambda: "a")
+        cache.get("b", lambda: "b")
+        cache.get("a", lambda: "a")
+        cache.get("c", lambda: "c")
+        self.assertEqual(cache.get("b", lambda: "new"), "new")
+        self.assertEqual(cache.get("c", lambda: "new"), "c")
+
+    def test_save_without_changes(self):
+        cache = HighlightCache()
+        cache.persist(self.cache_path)
+        cache.save()
+        self.assertFalse(self.cache_path.exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
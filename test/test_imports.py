@@ -0,0 +1,57 @@
+import sys
+import subprocess
+import unittest
+from pathlib import Path
+
+
+PACKAGE_PATH = str(Path(__file__).parent.parent)
+
+
+def _imported_after(statement, modules):
+    """
+    Run `statement` in a fresh interpreter, and return the subset of
+    `modules` that ended up imported.
+    """
+    code = (
+        "import sys; sys.path.insert(0, {path!r}); {statement}; "
+        "print(' '.join(m for m in {modules!r} if m in sys.modules))"
+    ).format(path=PACKAGE_PATH, statement=statement, modules=modules)
+    output = subprocess.run(
+        (sys.executable, "-c", code),
+        stdout=subprocess.PIPE,
+        check=True,
+        universal_newlines=True
+    ).stdout
+    return set(output.split())
+
+
+class test_lazy_imports(unittest.TestCase):
+    def test_site_startup(self):
+        imported = _imported_after(
+            "import lettersmith.bin.site",
+            ("markdown", "mdx_gfm", "jinja2", "yaml", "sqlite3")
+        )
+        self.assertEqual(imported, set())
+
+    def test_first_use(self):
+        imported = _imported_after(
+            "from lettersmith import markdowntools; "
+            "markdowntools.house_markdown('*hi*')",
+            ("markdown", "mdx_gfm", "jinja2")
+        )
+        self.assertEqual(imported, {"markdown", "mdx_gfm"})
+
+    def test_lazy_module_attributes(self):
+        from lettersmith import yamltools, markdowntools
+        self.assertTrue(hasattr(yamltools.Loader, "construct_mapping"))
+        self.assertTrue(issubclass(yamltools.ParserError, Exception))
+        self.assertEqual(
+            markdowntools.MD_LANG_EXTENSIONS,
+            markdowntools.house_extensions()
+        )
+        with self.assertRaises(AttributeError):
+            yamltools.nope
+
+
+if __name__ == '__main__':
+    unittest.main()
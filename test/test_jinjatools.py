@@ -0,0 +1,92 @@
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from jinja2 import ChoiceLoader, FileSystemLoader
+from lettersmith import jinjatools
+
+
+class test_compile_theme(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        theme = Path(self.tmp.name, "theme")
+        theme.joinpath("static").mkdir(parents=True)
+        theme.joinpath("static", "main.css").write_text("{# not a template")
+        theme.joinpath("_base.html").write_text(
+            "<title>{% block title %}{% endblock %}</title>")
+        theme.joinpath("default.html").write_text(
+            '{% extends "_base.html" %}'
+            '{% block title %}{{doc | upper}}{% endblock %}')
+        self.theme = theme
+        self.compiled = Path(self.tmp.name, "theme.compiled")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _age_sources(self):
+        # Make sure sources are older than anything compiled after.
+        for path in self.theme.rglob("*"):
+            os.utime(str(path), (1, 1))
+
+    def test_default_path(self):
+        self.assertEqual(
+            jinjatools.compiled_theme_path(self.theme), self.compiled)
+
+    def test_compiled_render(self):
+        self._age_sources()
+        jinjatools.compile_theme(self.theme)
+        self.assertTrue(
+            jinjatools.is_compiled_fresh(self.theme, self.compiled))
+        env = jinjatools.LettersmithEnvironment(self.theme)
+        self.assertIsInstance(env.loader, ChoiceLoader)
+        template = env.get_template("default.html")
+        self.assertTrue(template.filename.startswith(str(self.compiled)))
+        self.assertEqual(template.render(doc="hi"), "<title>HI</title>")
+
+    def test_stale_after_edit(self):
+        self._age_sources()
+        jinjatools.compile_theme(self.theme)
+        self.theme.joinpath("default.html").write_text("edited")
+        self.assertFalse(
+            jinjatools.is_compiled_fresh(self.theme, self.compiled))
+        env = jinjatools.LettersmithEnvironment(self.theme)
+        self.assertIsInstance(env.loader, FileSystemLoader)
+        self.assertEqual(env.get_template("default.html").render(), "edited")
+
+    def test_stale_after_edit_with_older_mtime(self):
+        jinjatools.compile_theme(self.theme)
+        self.theme.joinpath("default.html").write_text("edited")
+        self._age_sources()
+        self.assertFalse(
+            jinjatools.is_compiled_fresh(self.theme, self.compiled))
+
+    def test_stale_after_new_template(self):
+        self._age_sources()
+        jinjatools.compile_theme(self.theme)
+        new_path = self.theme.joinpath("single.html")
+        new_path.write_text("new")
+        os.utime(str(new_path), (1, 1))
+        self.assertFalse(
+            jinjatools.is_compiled_fresh(self.theme, self.compiled))
+
+    def test_compile_to_other_path(self):
+        self._age_sources()
+        jinjatools.compile_theme(self.theme)
+        other = Path(self.tmp.name, "other.compiled")
+        jinjatools.compile_theme(self.theme, other)
+        self.assertTrue(jinjatools.is_compiled_fresh(self.theme, other))
+        self.assertTrue(any(other.glob("tmpl_*.py")))
+
+    def test_skips_non_templates(self):
+        self.theme.joinpath("favicon.ico").write_bytes(b"\xff\xd8\x00")
+        jinjatools.compile_theme(self.theme)
+        self.assertTrue(
+            jinjatools.is_compiled_fresh(self.theme, self.compiled))
+
+    def test_not_compiled(self):
+        self.assertFalse(
+            jinjatools.is_compiled_fresh(self.theme, self.compiled))
+
+
+if __name__ == '__main__':
+    unittest.main()
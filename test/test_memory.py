@@ -0,0 +1,53 @@
+import unittest
+from lettersmith import memory
+
+
+class test_parse_size(unittest.TestCase):
+    def test_units(self):
+        self.assertEqual(memory.parse_size("512MB"), 512 * 1024 ** 2)
+        self.assertEqual(memory.parse_size("2G"), 2 * 1024 ** 3)
+        self.assertEqual(memory.parse_size(100), 100)
+        self.assertIsNone(memory.parse_size(None))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            memory.parse_size("lots")
+
+
+class test_share(unittest.TestCase):
+    def test_share(self):
+        self.assertEqual(memory.share(800, 1 / 8, 1000), 100)
+
+    def test_capped(self):
+        self.assertEqual(memory.share(800000, 1 / 8, 1000), 1000)
+
+    def test_no_budget(self):
+        self.assertEqual(memory.share(None, 1 / 8, 1000), 1000)
+        self.assertIsNone(memory.share(None, 1 / 8))
+
+
+class test_fit(unittest.TestCase):
+    def test_fit(self):
+        self.assertEqual(memory.fit(1000, 100, 16), 10)
+        self.assertEqual(memory.fit(100000, 100, 16), 16)
+
+    def test_at_least_one(self):
+        self.assertEqual(memory.fit(10, 100, 16), 1)
+
+    def test_no_size(self):
+        self.assertEqual(memory.fit(None, 100, 16), 16)
+        self.assertEqual(memory.fit(1000, 0, 16), 16)
+
+
+class test_is_over_budget(unittest.TestCase):
+    def test_no_budget(self):
+        self.assertFalse(memory.is_over_budget(None))
+
+    def test_over(self):
+        if memory.peak_rss() is None:
+            self.skipTest("Peak memory can't be read on this platform")
+        self.assertTrue(memory.is_over_budget(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from itertools import chain
+from lettersmith import paging
+from lettersmith import util
+
+
+class test_gen_paging(unittest.TestCase):
+    def setUp(self):
+        self.stubs = tuple({"id_path": "{}.md".format(i)} for i in range(25))
+        self.pages = tuple(chain.from_iterable(paging.gen_paging(
+            self.stubs,
+            {"*": {"per_page": 10}},
+            defaults={"base_url": "/"}
+        )))
+
+    def test_page_count(self):
+        self.assertEqual(len(self.pages), 3)
+        self.assertEqual(self.pages[0].meta["page_count"], 3)
+
+    def test_page_list_is_view(self):
+        page_list = self.pages[2].meta["page_list"]
+        self.assertIsInstance(page_list, util.View)
+        self.assertEqual(tuple(page_list), self.stubs[20:25])
+
+    def test_prev_next_urls(self):
+        first, second, last = self.pages
+        self.assertIsNone(first.meta["prev_url"])
+        self.assertEqual(first.meta["next_url"], "/page/2/")
+        self.assertEqual(second.meta["prev_url"], "/page/1/")
+        self.assertEqual(second.meta["next_url"], "/page/3/")
+        self.assertIsNone(last.meta["next_url"])
+
+
+class test_view(unittest.TestCase):
+    def test_slice(self):
+        v = util.view(tuple(range(10)), 2, 8)
+        self.assertEqual(len(v), 6)
+        self.assertEqual(tuple(v[1:3]), (3, 4))
+        self.assertEqual(v[-1], 7)
@@ -0,0 +1,87 @@
+import unittest
+from datetime import datetime
+from lettersmith import doc as Doc
+from lettersmith import permalink
+
+
+def _doc(id_path, section="posts", output_path=None):
+    return Doc.doc(
+        id_path=id_path,
+        output_path=output_path or id_path,
+        section=section,
+        created=datetime(2019, 3, 7)
+    )
+
+
+class test_compile_template(unittest.TestCase):
+    def test_tokens(self):
+        render = permalink.compile_template(
+            "{section}/{yyyy}/{yy}/{mm}/{dd}/{parent}/{stem}{suffix}")
+        self.assertEqual(
+            render(_doc("posts/2019/hello.md")),
+            "posts/2019/19/03/07/2019/hello.md"
+        )
+
+    def test_matches_read_doc_permalink(self):
+        doc = _doc("posts/a/b.md")
+        path_template = "{parents}/{name}/{section}-{yyyy}"
+        render = permalink.compile_template(path_template)
+        self.assertEqual(
+            render(doc),
+            path_template.format(**permalink.read_doc_permalink(doc))
+        )
+
+    def test_unknown_token(self):
+        with self.assertRaises(ValueError):
+            permalink.compile_template("{date}/{stem}")
+
+
+class test_permalinker(unittest.TestCase):
+    def test_maps_section(self):
+        map_permalink = permalink.permalinker({
+            "posts": "{yyyy}/{mm}/{stem}/index.html"
+        })
+        doc = map_permalink(_doc("posts/hello.md"))
+        self.assertEqual(doc.output_path, "2019/03/hello/index.html")
+
+    def test_other_section_untouched(self):
+        map_permalink = permalink.permalinker({
+            "posts": "{yyyy}/{stem}/index.html"
+        })
+        doc = _doc("pages/about.md", section="pages")
+        self.assertIs(map_permalink(doc), doc)
+
+    def test_map_doc_permalink(self):
+        doc = permalink.map_doc_permalink(
+            _doc("posts/hello.md"),
+            {"posts": "{yyyy}/{stem}/index.html"}
+        )
+        self.assertEqual(doc.output_path, "2019/hello/index.html")
+
+
+class test_output_index(unittest.TestCase):
+    def test_no_collisions(self):
+        outputs = permalink.OutputIndex()
+        docs = tuple(outputs.track((
+            _doc("a.md", output_path="a/index.html"),
+            _doc("b.md", output_path="b/index.html")
+        )))
+        self.assertEqual(len(docs), 2)
+        outputs.check()
+
+    def test_collisions(self):
+        outputs = permalink.OutputIndex()
+        for doc in (
+            _doc("a.md", output_path="a/index.html"),
+            _doc("a/index.md", output_path="a/index.html"),
+            _doc("b.md", output_path="b/index.html")
+        ):
+            outputs.add(doc)
+        self.assertEqual(
+            outputs.collisions, {"a/index.html": ["a.md", "a/index.md"]})
+        with self.assertRaises(permalink.OutputCollision):
+            outputs.check()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from lettersmith import rewrite
+from lettersmith import absolutize
+from lettersmith import wikilink
+from lettersmith import stub as Stub
+from lettersmith import doc as Doc
+
+
+def _render_upper(match):
+    return match.group(1).upper()
+
+
+def _render_count(match):
+    return str(len(match.group(2)))
+
+
+class test_compose(unittest.TestCase):
+    def setUp(self):
+        self.rewrite_str = rewrite.compose(
+            rewrite.rewriter(r"<(\w+)>", _render_upper),
+            rewrite.rewriter(r"\{(x)(\w*)\}", _render_count)
+        )
+
+    def test_dispatches_to_each_rewriter(self):
+        self.assertEqual(self.rewrite_str("a <b> {xyz} <c>"), "a B 2 C")
+
+    def test_untouched(self):
+        s = "nothing to see here"
+        self.assertIs(self.rewrite_str(s), s)
+
+    def test_test_skips_scan(self):
+        rewrite_str = rewrite.compose(
+            rewrite.rewriter(r"<(\w+)>", _render_upper, lambda s: False))
+        s = "a <b>"
+        self.assertIs(rewrite_str(s), s)
+
+    def test_only_passing_rewriters_run(self):
+        rewrite_str = rewrite.compose(
+            rewrite.rewriter(r"<(\w+)>", _render_upper, lambda s: False),
+            rewrite.rewriter(r"\{(x)(\w*)\}", _render_count)
+        )
+        self.assertEqual(rewrite_str("a <b> {xyz}"), "a <b> 2")
+
+
+class test_doc_rewriter(unittest.TestCase):
+    def test_wikilinks_and_urls(self):
+        stubs = (Stub.from_doc(Doc.doc("a.md", "a/index.html", title="A")),)
+        rewrite_doc = rewrite.doc_rewriter(
+            wikilink.rewriter(stubs, "http://example.com/"),
+            absolutize.rewriter("http://example.com/")
+        )
+        doc = Doc.doc("b.md", "b.html",
+            content='[[A]] <a href="/c/">C</a> [[D]]')
+        self.assertEqual(
+            rewrite_doc(doc).content,
+            '<a href="http://example.com/a/" class="wikilink">A</a> '
+            '<a href="http://example.com/c/">C</a> '
+            '<span class="nolink">D</span>'
+        )
+
+    def test_wikilinks_with_root_base_url(self):
+        stubs = (Stub.from_doc(Doc.doc("a.md", "a/index.html", title="A")),)
+        rewrite_doc = rewrite.doc_rewriter(
+            wikilink.rewriter(stubs, "/"),
+            absolutize.rewriter("/")
+        )
+        doc = Doc.doc("b.md", "b.html",
+            content="[[A]] <a href='foo/bar'>B</a> <img src='#top'>")
+        self.assertEqual(
+            rewrite_doc(doc).content,
+            '<a href="/a/" class="wikilink">A</a> '
+            "<a href='foo/bar'>B</a> <img src='#top'>"
+        )
@@ -0,0 +1,43 @@
+import unittest
+from lettersmith import util
+from lettersmith.spool import Spool, SpoolView, Index
+
+
+class test_spool(unittest.TestCase):
+    def setUp(self):
+        self.items = tuple({"id_path": str(i), "n": i} for i in range(10))
+        self.spool = Spool(self.items)
+
+    def tearDown(self):
+        self.spool.close()
+
+    def test_len(self):
+        self.assertEqual(len(self.spool), 10)
+
+    def test_iter(self):
+        self.assertEqual(tuple(self.spool), self.items)
+
+    def test_getitem(self):
+        self.assertEqual(self.spool[3], self.items[3])
+        self.assertEqual(self.spool[-1], self.items[-1])
+
+    def test_slice(self):
+        view = self.spool[2:5]
+        self.assertIsInstance(view, SpoolView)
+        self.assertEqual(tuple(view), self.items[2:5])
+        self.assertEqual(view[-1], self.items[4])
+
+    def test_take(self):
+        view = util.take(self.spool, (1, 3, 5))
+        self.assertEqual(len(view), 3)
+        self.assertEqual(view[1], self.items[3])
+
+    def test_index(self):
+        index = Index("id_path", self.spool, ({"id_path": "extra"},))
+        self.assertEqual(len(index), 11)
+        self.assertEqual(index["7"]["n"], 7)
+        self.assertEqual(index["extra"], {"id_path": "extra"})
+
+
+if __name__ == '__main__':
+    unittest.main()
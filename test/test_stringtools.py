@@ -77,5 +77,52 @@ So long lives this, and this gives life to thee.
             "Shall I compare thee to a summer’s day? Thou art..."
         )
 
+class test_summarize(unittest.TestCase):
+    def test_matches_truncate(self):
+        s = """
+<p>
+<i>Shall I compare thee to a summer’s day?</i><br>
+Thou art more lovely and more temperate.<br>
+Rough winds do shake the darling buds of May,<br>
+</p>
+        """
+        self.assertEqual(
+            stringtools.summarize(s, max_len=50),
+            stringtools.truncate(s, max_len=50)
+        )
+
+    def test_short(self):
+        s = "<p>Shall I compare\nthee</p>"
+        self.assertEqual(stringtools.summarize(s), "Shall I compare thee")
+
+    def test_entities(self):
+        s = "<p>Salt &amp; pepper&hellip;</p>"
+        self.assertEqual(stringtools.summarize(s), "Salt &amp; pepper…")
+
+    def test_escaped(self):
+        s = "<p>&lt;script&gt;alert(\"hi\")&lt;/script&gt;</p>"
+        self.assertEqual(
+            stringtools.summarize(s),
+            "&lt;script&gt;alert(&quot;hi&quot;)&lt;/script&gt;"
+        )
+
+    def test_entities_count_as_one_character(self):
+        s = "<p>" + "&amp;" * 20 + " more</p>"
+        self.assertEqual(
+            stringtools.summarize(s, max_len=20),
+            "&amp;" * 20 + "..."
+        )
+
+    def test_skips_script_and_style(self):
+        s = """<style>p { color: red; }</style>
+<script type="text/javascript">var x = "<p>nope</p>";</script>
+<p>Visible</p>"""
+        self.assertEqual(stringtools.summarize(s), "Visible")
+
+    def test_long(self):
+        s = "<p>Lorem ipsum dolor sit amet</p>" + "<p>more</p>" * 10000
+        self.assertEqual(stringtools.summarize(s, max_len=10), "Lorem...")
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,99 @@
+import unittest
+from datetime import datetime
+from lettersmith import util
+from lettersmith import stub as Stub
+from lettersmith.stubdb import StubDB
+
+
+def _stub(i, section, tags=(), wikilinks=()):
+    return Stub.stub(
+        id_path="{}/doc {}.md".format(section, i),
+        output_path="{}/doc-{}/index.html".format(section, i),
+        created=datetime(2018, 1, i + 1),
+        title="Doc {}".format(i),
+        section=section,
+        meta={"tags": tags, "wikilinks": wikilinks}
+    )
+
+
+STUBS = (
+    _stub(0, "a", tags=("x",), wikilinks=("doc-1",)),
+    _stub(1, "b", tags=("x", "y")),
+    _stub(2, "a", tags=("y",), wikilinks=("doc-1",)),
+)
+
+
+class test_stubdb(unittest.TestCase):
+    def setUp(self):
+        self.db = StubDB()
+        self.db.update(STUBS, taxonomies=("tags",))
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_id_path(self):
+        stub = self.db.id_path["b/doc 1.md"]
+        self.assertEqual(stub, STUBS[1])
+        self.assertEqual(len(self.db.id_path), 3)
+
+    def test_where(self):
+        query = util.where(self.db.id_path.values(), "section", "a")
+        self.assertEqual(len(query), 2)
+        self.assertEqual(tuple(query), (STUBS[0], STUBS[2]))
+
+    def test_where_fallback(self):
+        res = tuple(util.where_in(self.db.all(), ("meta", "tags"), "y"))
+        self.assertEqual(res, (STUBS[1], STUBS[2]))
+
+    def test_where_key_path(self):
+        res = tuple(util.where_in(self.db.all(), ["meta", "tags"], "y"))
+        self.assertEqual(res, (STUBS[1], STUBS[2]))
+        res = tuple(util.where(self.db.all(), ["section"], "b"))
+        self.assertEqual(res, (STUBS[1],))
+
+    def test_sort_by(self):
+        query = util.sort_by(self.db.all(), "created", reverse=True)
+        self.assertEqual(tuple(query), tuple(reversed(STUBS)))
+
+    def test_taxonomy(self):
+        self.assertEqual(set(self.db.taxonomy["tags"]), {"x", "y"})
+        self.assertEqual(len(self.db.taxonomy["tags"]["y"]), 2)
+
+    def test_term_indexing(self):
+        # Terms index like the tuples in the in-memory taxonomy index.
+        stubs = self.db.taxonomy["tags"]["y"]
+        self.assertEqual(stubs[0], STUBS[2])
+        self.assertEqual(stubs[-1], STUBS[1])
+        self.assertEqual(stubs[0:1], (STUBS[2],))
+        self.assertEqual(stubs[1:], (STUBS[1],))
+        self.assertEqual(stubs[::-1], (STUBS[1], STUBS[2]))
+        with self.assertRaises(IndexError):
+            stubs[2]
+
+    def test_backlinks(self):
+        backlinks = tuple(self.db.backlinks("b/doc 1.md"))
+        self.assertEqual(backlinks, (STUBS[0], STUBS[2]))
+
+    def test_incremental_update(self):
+        changed = STUBS[0]._replace(title="Changed")
+        stats = self.db.update((changed, STUBS[1]), taxonomies=("tags",))
+        self.assertEqual(stats, {"changed": 1, "removed": 1})
+        self.assertEqual(len(self.db.taxonomy["tags"]["y"]), 1)
+
+    def test_taxonomies_changed(self):
+        stubs = tuple(
+            stub._replace(meta=dict(stub.meta, category=(stub.section,)))
+            for stub in STUBS
+        )
+        self.db.update(stubs, taxonomies=("tags",))
+        self.assertNotIn("category", self.db.taxonomy)
+        stats = self.db.update(stubs, taxonomies=("tags", "category"))
+        self.assertEqual(stats["changed"], 0)
+        self.assertEqual(set(self.db.taxonomy), {"tags", "category"})
+        self.assertEqual(len(self.db.taxonomy["category"]["a"]), 2)
+        self.db.update(stubs, taxonomies=("category",))
+        self.assertEqual(set(self.db.taxonomy), {"category"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from datetime import datetime
+from lettersmith import taxonomy
+from lettersmith import stub as Stub
+
+
+def _stub(i, day, tags=()):
+    return Stub.stub(
+        id_path="doc {}.md".format(i),
+        output_path="doc-{}/index.html".format(i),
+        created=datetime(2018, 1, day),
+        title="Doc {}".format(i),
+        meta={"tags": tags}
+    )
+
+
+STUBS = (
+    _stub(0, 5, tags=("x",)),
+    _stub(1, 20, tags=("x", "y")),
+    _stub(2, 10, tags=("x",)),
+)
+
+
+class test_index_by_taxonomy(unittest.TestCase):
+    def setUp(self):
+        self.index = taxonomy.index_by_taxonomy(STUBS)
+
+    def test_sorted_newest_first(self):
+        titles = tuple(stub.title for stub in self.index["tags"]["x"])
+        self.assertEqual(titles, ("Doc 1", "Doc 2", "Doc 0"))
+
+    def test_count_terms(self):
+        self.assertEqual(
+            taxonomy.count_terms(self.index),
+            {"tags": {"x": 3, "y": 1}}
+        )
+
+
+class test_gen_taxonomy_archives(unittest.TestCase):
+    def test_one_page_per_term(self):
+        docs = tuple(taxonomy.gen_taxonomy_archives(STUBS))
+        self.assertEqual(
+            tuple(doc.output_path for doc in docs),
+            ("tags/x/all/index.html", "tags/y/all/index.html")
+        )
+        self.assertEqual(docs[0].meta["count"], 3)
+
+    def test_paged(self):
+        docs = tuple(taxonomy.gen_taxonomy_archives(STUBS, per_page=2))
+        self.assertEqual(
+            tuple(doc.output_path for doc in docs),
+            (
+                "tags/x/page/1/index.html",
+                "tags/x/page/2/index.html",
+                "tags/y/page/1/index.html"
+            )
+        )
+        self.assertEqual(len(docs[0].meta["page_list"]), 2)
+        self.assertEqual(docs[1].meta["page_list"][0].title, "Doc 0")
+        self.assertEqual(docs[1].title, "x")
@@ -0,0 +1,85 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from lettersmith import doc as Doc
+from lettersmith import templatetools
+
+
+def _doc(id_path, section="", meta=None):
+    return Doc.doc(
+        id_path=id_path,
+        output_path=id_path,
+        section=section,
+        meta=meta
+    )
+
+
+class test_add_templates(unittest.TestCase):
+    def test_section(self):
+        doc = templatetools.add_templates(_doc("posts/a.md", "posts"))
+        self.assertEqual(doc.templates, (
+            "section/posts/single.html",
+            "section/posts/default.html",
+            "single.html",
+            "default.html"
+        ))
+
+    def test_index(self):
+        doc = templatetools.add_templates(_doc("index.md"))
+        self.assertEqual(doc.templates, ("index.html", "default.html"))
+
+    def test_custom_template(self):
+        doc = templatetools.add_templates(
+            _doc("a.md", meta={"template": "custom.html"}))
+        self.assertEqual(
+            doc.templates, ("custom.html", "single.html", "default.html"))
+
+    def test_matches_read_affiliated_templates(self):
+        doc = templatetools.add_templates(_doc("posts/index.md", "posts"))
+        self.assertEqual(
+            list(doc.templates),
+            templatetools.read_affiliated_templates("posts/index.md")
+        )
+
+
+class test_template_resolver(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        root = Path(self.tmp.name)
+        root.joinpath("section", "posts").mkdir(parents=True)
+        root.joinpath("section", "posts", "default.html").write_text("")
+        root.joinpath("single.html").write_text("")
+        root.joinpath("default.html").write_text("")
+        root.joinpath("favicon.ico").write_bytes(b"\xff")
+        root.joinpath("static").mkdir()
+        root.joinpath("static", "main.html").write_text("")
+        self.resolve = templatetools.template_resolver(root)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_list_templates(self):
+        self.assertEqual(
+            templatetools.list_templates(self.tmp.name),
+            {"section/posts/default.html", "single.html", "default.html"}
+        )
+
+    def test_resolves_first_existing(self):
+        doc = self.resolve(_doc("posts/a.md", "posts"))
+        self.assertEqual(doc.templates, ("section/posts/default.html",))
+        doc = self.resolve(_doc("pages/a.md", "pages"))
+        self.assertEqual(doc.templates, ("single.html",))
+
+    def test_custom_template(self):
+        doc = self.resolve(_doc("a.md", meta={"template": "./default.html"}))
+        self.assertEqual(doc.templates, ("./default.html",))
+
+    def test_missing_keeps_candidates(self):
+        resolve = templatetools.template_resolver(
+            Path(self.tmp.name, "section"))
+        doc = resolve(_doc("a.md"))
+        self.assertEqual(doc.templates, ("single.html", "default.html"))
+
+
+if __name__ == '__main__':
+    unittest.main()
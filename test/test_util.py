@@ -276,5 +276,54 @@ class test_sort_by_keys(unittest.TestCase):
         self.assertEqual(res[1]["id"], 0)
 
 
+class test_sorter(unittest.TestCase):
+    data = (
+        {"meta": {"weight": 2}, "id": 0},
+        {"meta": {"weight": 1}, "id": 1},
+        {"meta": {}, "id": 2},
+        {"meta": {"weight": 1}, "id": 3},
+    )
+
+    def test_sort(self):
+        sort = util.sorter(self.data)
+        res = sort("meta.weight")
+        self.assertEqual(tuple(x["id"] for x in res), (1, 3, 0, 2))
+
+    def test_reverse_keeps_ties_in_order(self):
+        sort = util.sorter(self.data)
+        res = sort(("meta", "weight"), reverse=True)
+        self.assertEqual(tuple(x["id"] for x in res), (0, 1, 3, 2))
+
+    def test_missing_last_in_reverse(self):
+        data = ({"id": 0}, {"n": 1, "id": 1}, {"id": 2}, {"n": 2, "id": 3})
+        sort = util.sorter(data)
+        self.assertEqual(
+            tuple(x["id"] for x in sort("n", reverse=True)), (3, 1, 0, 2))
+        self.assertEqual(
+            tuple(x["id"] for x in sort("n")), (1, 3, 0, 2))
+
+    def test_shared(self):
+        sort = util.sorter(self.data)
+        self.assertIs(sort("meta.weight"), sort("meta.weight"))
+
+
+class test_decorate_group_matching_sort(unittest.TestCase):
+    def test_sort_by(self):
+        @util.decorate_group_matching_id_path
+        def ids(items):
+            return tuple(item["id"] for item in items)
+
+        data = (
+            {"id_path": "a.md", "id": 0, "n": 3},
+            {"id_path": "b.md", "id": 1, "n": 1},
+            {"id_path": "c.txt", "id": 2, "n": 2},
+        )
+        res = tuple(ids(data, {
+            "*.md": {"sort_by": "n"},
+            "*": {"sort_by": "n", "reverse": True}
+        }))
+        self.assertEqual(res, ((1, 0), (0, 2, 1)))
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
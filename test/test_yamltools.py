@@ -0,0 +1,81 @@
+import unittest
+import io
+from datetime import date
+from lettersmith import yamltools
+
+
+class test_split_frontmatter(unittest.TestCase):
+    def test_split(self):
+        frontmatter, content = yamltools.split_frontmatter(
+            "---\ntitle: Doc title\n---\n\nLorem ipsum\n")
+        self.assertEqual(frontmatter.strip(), "title: Doc title")
+        self.assertEqual(content, "Lorem ipsum")
+
+    def test_no_frontmatter(self):
+        frontmatter, content = yamltools.split_frontmatter("Lorem ipsum")
+        self.assertEqual(frontmatter, "")
+        self.assertEqual(content, "Lorem ipsum")
+
+    def test_unclosed(self):
+        frontmatter, content = yamltools.split_frontmatter("---\ntitle: x")
+        self.assertEqual(frontmatter, "")
+        self.assertEqual(content, "---\ntitle: x")
+
+    def test_fence_in_content(self):
+        frontmatter, content = yamltools.split_frontmatter(
+            "---\na: 1\n---\nfoo\n---\nbar")
+        self.assertEqual(content, "foo\n---\nbar")
+
+
+class test_read_frontmatter_head(unittest.TestCase):
+    def test_head(self):
+        f = io.StringIO("\n---\ntitle: x\n---\nLorem ipsum dolor")
+        head = yamltools.read_frontmatter_head(f, peek_size=6)
+        self.assertEqual(head, "\n---\ntitle: x\n---\nLorem ")
+        meta, content = yamltools.parse_frontmatter(head)
+        self.assertEqual(meta, {"title": "x"})
+
+    def test_no_frontmatter(self):
+        f = io.StringIO("Lorem ipsum\ndolor")
+        head = yamltools.read_frontmatter_head(f, peek_size=3)
+        self.assertEqual(head, "Lorem ipsum\ndol")
+
+    def test_split_head(self):
+        f = io.StringIO("---\ntitle: x\n---\nLorem ipsum\ndolor")
+        frontmatter, body = yamltools.split_head(f, peek_size=3)
+        self.assertEqual(frontmatter, "---\ntitle: x\n---\n")
+        self.assertEqual(body, "Lor")
+        self.assertEqual(f.read(), "em ipsum\ndolor")
+
+
+class test_parse_frontmatter(unittest.TestCase):
+    def test_meta(self):
+        meta, content = yamltools.parse_frontmatter(
+            "---\ntitle: Doc title\ncreated: 2018-01-17\n---\nLorem ipsum")
+        self.assertEqual(meta["title"], "Doc title")
+        self.assertEqual(meta["created"], date(2018, 1, 17))
+        self.assertEqual(content, "Lorem ipsum")
+
+    def test_non_dict(self):
+        meta, content = yamltools.parse_frontmatter("---\n- a\n---\nLorem")
+        self.assertEqual(meta, {})
+
+    def test_cached_copy(self):
+        text = "---\ntitle: Cached\n---\nLorem"
+        meta_a, _ = yamltools.parse_frontmatter(text)
+        meta_a["title"] = "Mutated"
+        meta_b, _ = yamltools.parse_frontmatter(text)
+        self.assertEqual(meta_b["title"], "Cached")
+
+    def test_cached_nested_copy(self):
+        text = "---\ntags: [a, b]\nmore: {x: 1}\n---\nLorem"
+        meta_a, _ = yamltools.parse_frontmatter(text)
+        meta_a["tags"].append("c")
+        meta_a["more"]["x"] = 2
+        meta_b, _ = yamltools.parse_frontmatter(text)
+        self.assertEqual(meta_b["tags"], ["a", "b"])
+        self.assertEqual(meta_b["more"], {"x": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()